@@ -0,0 +1,227 @@
+"""
+Activity Combination Solver
+Top-k combinations of catalog activities (variations included) that reach a
+weekly MET-minute target in the least time: for each intensity band a
+grouped-knapsack dynamic program over discretized minutes keeps the K highest
+MET-minute totals for every weekly time, so a query only scans those tables
+"""
+
+import copy
+import itertools
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from met_registry import intensity_band
+from numpy_support import require_numpy
+
+BANDS = ("light", "moderate", "vigorous")
+ANY_BAND = "any"
+
+@dataclass(frozen=True)
+class PlanItem:
+    activity: str  # catalog activity name
+    variation: Optional[str]  # variation name, None for the activity itself
+    met_value: float
+    minutes: int  # per week
+    
+    @property
+    def band(self) -> str:
+        return intensity_band(self.met_value)
+    
+    @property
+    def met_minutes(self) -> float:
+        return self.met_value * self.minutes
+    
+    @property
+    def label(self) -> str:
+        return f"{self.activity}({self.variation})" if self.variation else self.activity
+
+@dataclass(frozen=True)
+class ActivityPlan:
+    items: Tuple[PlanItem, ...]
+    
+    @property
+    def total_minutes(self) -> int:
+        return sum(item.minutes for item in self.items)
+    
+    @property
+    def met_minutes(self) -> float:
+        return sum(item.met_minutes for item in self.items)
+    
+    def minutes_by_band(self) -> Dict[str, int]:
+        minutes = dict.fromkeys(BANDS, 0)
+        for item in self.items:
+            minutes[item.band] += item.minutes
+        return minutes
+
+class _BandTable:
+    """K-best grouped knapsack over one band's activities
+    
+    Each group is one catalog activity with its variations; a plan uses at
+    most one option per group for a whole number of steps between the
+    per-activity bounds. scores[t, r] is the r-th highest MET-minute total
+    using exactly t steps (descending in r, -inf where fewer plans exist).
+    """
+    
+    def __init__(self, groups: List[List[tuple]], step: int, max_steps: int,
+                 min_steps: int, max_activity_steps: int, depth: int):
+        np = require_numpy()
+        self.groups = groups
+        self.step = step
+        self.depth = depth
+        self.units = np.arange(min_steps, max_activity_steps + 1)
+        self.choices = []  # per group: flat candidate index chosen for each (t, r)
+        
+        scores = np.full((max_steps + 1, depth), -np.inf)
+        scores[0, 0] = 0.0
+        times = np.arange(max_steps + 1)
+        # Shifted copies of the previous layer: previous[t - u] for every allocation u
+        sources = times[None, :] - self.units[:, None]
+        valid = (sources >= 0)[:, :, None]
+        sources = np.maximum(sources, 0)
+        
+        for options in groups:
+            mets = np.array([met for _, _, met in options])
+            shifted = np.where(valid, scores[sources], -np.inf)  # (units, T+1, depth)
+            gains = (mets[:, None] * (self.units * step))[:, :, None, None]  # (options, units, 1, 1)
+            candidates = (shifted[None] + gains).transpose(2, 0, 1, 3).reshape(max_steps + 1, -1)
+            candidates = np.concatenate([scores, candidates], axis=1)
+            
+            top = np.argpartition(-candidates, depth - 1, axis=1)[:, :depth]
+            order = np.argsort(-np.take_along_axis(candidates, top, axis=1), axis=1, kind="stable")
+            chosen = np.take_along_axis(top, order, axis=1)
+            scores = np.take_along_axis(candidates, chosen, axis=1)
+            self.choices.append(chosen.astype(np.int32))
+        
+        self.scores = scores
+    
+    def feasible(self, min_met_minutes: float, max_steps: int, limit: int) -> List[Tuple[int, int]]:
+        """First `limit` (steps, rank) cells reaching min_met_minutes, fewest steps first"""
+        np = require_numpy()
+        steps, ranks = np.nonzero(self.scores[:max_steps + 1] >= min_met_minutes - 1e-9)
+        return list(zip(steps[:limit].tolist(), ranks[:limit].tolist()))
+    
+    def reconstruct(self, steps: int, rank: int) -> List[PlanItem]:
+        """Walk the choice layers back from (steps, rank) to the plan's items"""
+        per_group = len(self.units) * self.depth
+        items = []
+        for group in range(len(self.groups) - 1, -1, -1):
+            index = int(self.choices[group][steps, rank])
+            if index < self.depth:
+                rank = index
+                continue
+            option, remainder = divmod(index - self.depth, per_group)
+            unit_index, rank = divmod(remainder, self.depth)
+            activity, variation, met = self.groups[group][option]
+            units = int(self.units[unit_index])
+            items.append(PlanItem(activity, variation, met, units * self.step))
+            steps -= units
+        return items[::-1]
+
+class ActivityCombinationSolver:
+    """Precomputed tables for top-k activity plans over one catalog
+    
+    Activities need name, met_value and variations ({name: MET}). With
+    preferences, plans are drawn from matching activities and variations
+    first, falling back to the whole catalog for a band they cannot cover.
+    with_preferences() reuses the whole-catalog tables for another preference set.
+    """
+    
+    def __init__(self,
+                 activities: Iterable,
+                 preferences: Sequence[str] = (),
+                 step_minutes: int = 5,
+                 max_weekly_minutes: int = 600,
+                 min_activity_minutes: int = 10,
+                 max_activity_minutes: int = 150,
+                 depth: int = 5):
+        self.step = step_minutes
+        self.max_steps = max_weekly_minutes // step_minutes
+        self.depth = depth
+        self._bounds = (min_activity_minutes // step_minutes, max_activity_minutes // step_minutes)
+        
+        options_by_activity = []
+        for activity in activities:
+            options = [(activity.name, None, activity.met_value)]
+            options += [(activity.name, variation, met) for variation, met in activity.variations.items()]
+            options_by_activity.append(options)
+        
+        self._options_by_activity = options_by_activity
+        self.tables = self._build_tables(options_by_activity)
+        self.preferred_tables = self._build_preferred_tables(preferences)
+    
+    def with_preferences(self, preferences: Sequence[str]) -> "ActivityCombinationSolver":
+        """Solver for another preference set sharing this one's whole-catalog tables
+        
+        Only the tables over the preferred activities are built, so a new
+        preference set costs a fraction of a full solver.
+        """
+        solver = copy.copy(self)
+        solver.preferred_tables = self._build_preferred_tables(preferences)
+        return solver
+    
+    def _build_preferred_tables(self, preferences: Sequence[str]) -> Optional[Dict[str, "_BandTable"]]:
+        wanted = [p.lower() for p in preferences]
+        if not wanted:
+            return None
+        preferred = [
+            [option for option in options
+             if any(p in option[0].lower() or p in (option[1] or "").lower() for p in wanted)]
+            for options in self._options_by_activity
+        ]
+        return self._build_tables([options for options in preferred if options])
+    
+    def _build_tables(self, options_by_activity: List[List[tuple]]) -> Dict[str, _BandTable]:
+        tables = {}
+        for band in BANDS + (ANY_BAND,):
+            groups = [
+                [option for option in options if band == ANY_BAND or intensity_band(option[2]) == band]
+                for options in options_by_activity
+            ]
+            tables[band] = _BandTable([group for group in groups if group], self.step, self.max_steps,
+                                      *self._bounds, self.depth)
+        return tables
+    
+    def solve(self,
+              target_met_minutes: float,
+              weekly_time_budget: int = 300,
+              intensity_mix: Optional[Dict[str, float]] = None,
+              top_k: int = 3) -> List[ActivityPlan]:
+        """Up to top_k plans reaching the target within the budget, least total time first
+        
+        intensity_mix maps bands to the share of the target each must supply
+        (shares are normalized); None lets any band supply all of it.
+        """
+        budget = min(weekly_time_budget // self.step, self.max_steps)
+        top_k = min(top_k, self.depth)
+        mix = intensity_mix or {ANY_BAND: 1.0}
+        total_share = sum(mix.values())
+        
+        per_band = []
+        for band, share in mix.items():
+            if share <= 0:
+                continue
+            threshold = target_met_minutes * share / total_share
+            table = self.tables[band]
+            cells = []
+            if self.preferred_tables is not None:
+                table = self.preferred_tables[band]
+                cells = table.feasible(threshold, budget, top_k)
+                if not cells:
+                    table = self.tables[band]
+            cells = cells or table.feasible(threshold, budget, top_k)
+            if not cells:
+                return []
+            per_band.append([(steps, float(table.scores[steps, rank]), table, rank) for steps, rank in cells])
+        
+        combinations = [
+            combination for combination in itertools.product(*per_band)
+            if sum(cell[0] for cell in combination) <= budget
+        ]
+        combinations.sort(key=lambda combination: (sum(cell[0] for cell in combination),
+                                                   -sum(cell[1] for cell in combination)))
+        return [
+            ActivityPlan(tuple(item for steps, _, table, rank in combination
+                               for item in table.reconstruct(steps, rank)))
+            for combination in combinations[:top_k]
+        ]
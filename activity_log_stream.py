@@ -0,0 +1,154 @@
+"""
+Streaming Weekly MET-Minute Aggregation
+Reads activity logs for many users from JSONL or CSV files and yields per-user,
+per-week MET-minute totals in constant memory
+"""
+
+import csv
+import json
+import os
+import tempfile
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, Optional
+
+from met_introduction import METEducationSystem
+
+# WHO: adults should accumulate at least 500 MET-minutes per week
+WHO_WEEKLY_MET_MINUTES = 500
+
+class METValueResolver:
+    """Cached activity name → MET value lookup
+    
+    Uses the same rule as METEducationSystem.calculate_weekly_met_minutes:
+    the first activity returned by search_activities wins.
+    """
+    
+    def __init__(self, system: Optional[METEducationSystem] = None, cache_size: int = 4096):
+        self.system = system or METEducationSystem()
+        self._lookup = lru_cache(maxsize=cache_size)(self._resolve)
+    
+    def __call__(self, activity: str) -> Optional[float]:
+        return self._lookup(activity)
+    
+    def cache_info(self):
+        return self._lookup.cache_info()
+    
+    def _resolve(self, activity: str) -> Optional[float]:
+        found_activities = self.system.search_activities(activity)
+        return found_activities[0].met_value if found_activities else None
+
+@lru_cache(maxsize=1024)
+def iso_week(day: str) -> str:
+    """'2024-03-05' → '2024-W10'"""
+    year, week, _ = date.fromisoformat(day).isocalendar()
+    return f"{year}-W{week:02d}"
+
+def read_activity_log(path: str, file_format: Optional[str] = None) -> Iterator[Dict]:
+    """Yield activity-log records one at a time from a JSONL or CSV file
+    
+    Each record needs user_id, activity, duration_minutes and either week
+    (e.g. '2024-W10') or date (ISO). frequency_per_week (default 1) and
+    met_value (overrides the catalog lookup) are optional.
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+    with open(path, newline="", encoding="utf-8") as handle:
+        if file_format == "jsonl":
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        elif file_format == "csv":
+            for row in csv.DictReader(handle):
+                row["duration_minutes"] = float(row["duration_minutes"])
+                if row.get("frequency_per_week"):
+                    row["frequency_per_week"] = float(row["frequency_per_week"])
+                if row.get("met_value"):
+                    row["met_value"] = float(row["met_value"])
+                else:
+                    row.pop("met_value", None)
+                yield row
+        else:
+            raise ValueError(f"Unsupported activity log format: {file_format!r} (use jsonl or csv)")
+
+def aggregate_weekly_met_minutes(records: Iterable[Dict],
+                                 resolver: Optional[METValueResolver] = None) -> Iterator[Dict]:
+    """Yield one weekly summary per (user_id, week) group
+    
+    Records must arrive grouped by user and week, as in an export sorted by
+    user then date; only the current group is held in memory. Activities
+    without a MET value are skipped, like calculate_weekly_met_minutes.
+    """
+    resolver = resolver or METValueResolver()
+    current_key = None
+    breakdown: Dict[str, Dict] = {}
+    
+    for record in records:
+        week = record.get("week") or iso_week(record["date"])
+        key = (record["user_id"], week)
+        if key != current_key:
+            if current_key is not None:
+                yield _weekly_summary(current_key, breakdown)
+            current_key = key
+            breakdown = {}
+        
+        met_value = record.get("met_value")
+        if met_value is None:
+            met_value = resolver(record["activity"])
+            if met_value is None:
+                continue
+        
+        weekly_minutes = record["duration_minutes"] * record.get("frequency_per_week", 1)
+        entry = breakdown.get(record["activity"])
+        if entry is None:
+            entry = breakdown[record["activity"]] = {
+                "activity": record["activity"],
+                "met_value": met_value,
+                "weekly_minutes": 0,
+                "met_minutes": 0
+            }
+        entry["weekly_minutes"] += weekly_minutes
+        entry["met_minutes"] += met_value * weekly_minutes
+    
+    if current_key is not None:
+        yield _weekly_summary(current_key, breakdown)
+
+def stream_weekly_met_minutes(path: str, file_format: Optional[str] = None,
+                              resolver: Optional[METValueResolver] = None) -> Iterator[Dict]:
+    """read_activity_log + aggregate_weekly_met_minutes in one call"""
+    return aggregate_weekly_met_minutes(read_activity_log(path, file_format), resolver)
+
+def _weekly_summary(key: tuple, breakdown: Dict[str, Dict]) -> Dict:
+    total_met_minutes = sum(entry["met_minutes"] for entry in breakdown.values())
+    return {
+        "user_id": key[0],
+        "week": key[1],
+        "total_met_minutes": total_met_minutes,
+        "who_recommendation_status": "符合" if total_met_minutes >= WHO_WEEKLY_MET_MINUTES else "未達標",
+        "breakdown": list(breakdown.values())
+    }
+
+def main():
+    """Demonstrate streaming aggregation over a small JSONL log"""
+    records = [
+        {"user_id": "u1", "date": "2024-03-04", "activity": "步行", "duration_minutes": 40},
+        {"user_id": "u1", "date": "2024-03-06", "activity": "游泳", "duration_minutes": 45},
+        {"user_id": "u1", "date": "2024-03-08", "activity": "步行", "duration_minutes": 30},
+        {"user_id": "u1", "date": "2024-03-12", "activity": "跑步", "duration_minutes": 30},
+        {"user_id": "u2", "week": "2024-W10", "activity": "瑜珈", "duration_minutes": 60,
+         "frequency_per_week": 3}
+    ]
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "activity_log.jsonl")
+        with open(path, "w", encoding="utf-8") as handle:
+            for record in records:
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        
+        for summary in stream_weekly_met_minutes(path):
+            print(f"{summary['user_id']} {summary['week']}: "
+                  f"{summary['total_met_minutes']:.0f} MET-分鐘 ({summary['who_recommendation_status']})")
+            for item in summary["breakdown"]:
+                print(f"  {item['activity']}: {item['met_value']} METs × {item['weekly_minutes']:.0f}分鐘")
+
+if __name__ == "__main__":
+    main()
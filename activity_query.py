@@ -0,0 +1,347 @@
+"""
+Activity Query Engine
+Bitmap indexes over the activity catalog: category, intensity band, exercise
+type and derived safety attributes (impact, fall risk, supine position,
+isometric effort, contact). Every special population and chronic condition
+maps to an exclusion bitmap, so a compound query such as "moderate, low-impact
+activities safe in pregnancy with osteoporosis" is a handful of bitwise
+operations; results page through opaque cursors
+"""
+
+import base64
+import zlib
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from met_registry import RegisteredActivity, get_registry, intensity_band
+from prescription_rules import KeywordAutomaton
+from special_populations import ChronicCondition, SpecialPopulation, SpecialPopulationExercise
+
+@dataclass(frozen=True)
+class ActivityTraits:
+    """Indexed attributes of one activity"""
+    category: str  # ActivityCategory value, "uncategorized" if none
+    intensity: str  # light / moderate / vigorous (intensity_band)
+    exercise_types: Tuple[str, ...]  # aerobic / resistance / flexibility / balance, or lifestyle
+    impact: str  # low / high
+    fall_risk: bool
+    supine: bool  # performed lying on the back
+    isometric: bool  # heavy lifting, straining or breath holding
+    contact: bool
+
+# (attribute, value, keywords): keywords are matched case-insensitively in the
+# activity name and description; an activity can take several exercise types
+TRAIT_KEYWORDS: Tuple[Tuple[str, Any, Tuple[str, ...]], ...] = (
+    ("exercise_type", "aerobic",
+     ("走", "步行", "跑", "騎", "自行車", "游", "泳", "舞", "有氧", "籃球", "網球", "羽毛球", "爬樓", "心肺",
+      "walk", "run", "jog", "cycl", "bicycl", "swim", "danc", "aerobic", "basketball", "tennis", "stair")),
+    ("exercise_type", "resistance",
+     ("肌力訓練", "重量", "重訓", "crossfit", "搬運", "搬家", "weight", "resistance", "strength")),
+    ("exercise_type", "flexibility",
+     ("伸展", "拉筋", "瑜伽", "瑜珈", "柔軟", "stretch", "yoga", "pilates")),
+    ("exercise_type", "balance", ("太極", "平衡", "tai chi", "balance")),
+    ("impact", "high",
+     ("跑", "籃球", "網球", "羽毛球", "跳", "衝刺", "爬樓", "crossfit",
+      "run", "jog", "jump", "sprint", "basketball", "tennis", "stair", "soccer", "football")),
+    ("fall_risk", True,
+     ("騎", "自行車", "單車", "爬樓", "籃球", "網球", "舞", "溜", "滑", "登山",
+      "cycl", "bicycl", "stair", "basketball", "tennis", "danc", "skat", "ski", "climb", "hiking")),
+    ("supine", True, ("瑜伽", "瑜珈", "伸展", "器械", "重量", "yoga", "pilates", "stretch", "bench press")),
+    ("isometric", True, ("重量", "重訓", "crossfit", "搬運", "搬家", "體力勞動", "weight lifting", "powerlifting")),
+    ("contact", True, ("籃球", "對抗", "碰撞", "足球", "橄欖球", "basketball", "soccer", "football", "rugby", "hockey"))
+)
+
+# (keywords, excluded attribute values): keywords are matched case-insensitively in the
+# contraindications and precautions of special_populations, so each population and
+# condition excludes what its own guideline warns against
+GUIDELINE_EXCLUSION_KEYWORDS: Tuple[Tuple[Tuple[str, ...], Tuple[Tuple[str, Any], ...]], ...] = (
+    (("contact",), (("contact", True),)),
+    (("fall risk", "fall-proof", "unsafe environmental"), (("fall_risk", True),)),
+    (("supine",), (("supine", True),)),
+    (("high-impact", "high impact", "low-impact", "joint"), (("impact", "high"),)),
+    (("heavy lifting", "valsalva", "under load", "blood pressure", "hypertension"), (("isometric", True),)),
+    (("high-intensity", "too intensely", "beyond individual capabilities", "oxygen saturation"),
+     (("intensity", "vigorous"),)),
+    (("beyond individual capabilities",), (("impact", "high"),)),
+    (("angina", "heart attack", "heart failure", "aortic stenosis", "myocarditis"),
+     (("intensity", "vigorous"), ("isometric", True))),
+    (("retinopathy",), (("intensity", "vigorous"), ("impact", "high"), ("isometric", True)))
+)
+
+@lru_cache(maxsize=None)
+def _exclusion_automaton() -> KeywordAutomaton:
+    keywords: Dict[str, set] = {}
+    for index, (rule_keywords, _) in enumerate(GUIDELINE_EXCLUSION_KEYWORDS):
+        for keyword in rule_keywords:
+            keywords.setdefault(keyword.lower(), set()).add(index)
+    return KeywordAutomaton(keywords)
+
+def guideline_exclusions(texts: Iterable[str]) -> Tuple[Tuple[str, Any], ...]:
+    """Attribute values a guideline's contraindication / precaution texts rule out, in table order"""
+    matched = set()
+    for text in texts:
+        matched.update(_exclusion_automaton().find(text.lower()))
+    exclusions = []
+    for index in sorted(matched):
+        for exclusion in GUIDELINE_EXCLUSION_KEYWORDS[index][1]:
+            if exclusion not in exclusions:
+                exclusions.append(exclusion)
+    return tuple(exclusions)
+
+@lru_cache(maxsize=None)
+def population_exclusions() -> Dict[SpecialPopulation, Tuple[Tuple[str, Any], ...]]:
+    """Attribute values each special population rules out, from its guideline"""
+    return {population: guideline_exclusions(guideline.contraindications + guideline.precautions)
+            for population, guideline in SpecialPopulationExercise.shared().guidelines.items()}
+
+@lru_cache(maxsize=None)
+def condition_exclusions() -> Dict[ChronicCondition, Tuple[Tuple[str, Any], ...]]:
+    """Attribute values each chronic condition rules out, from its guideline"""
+    return {condition: guideline_exclusions(list(info["contraindications"]) + list(info["precautions"]))
+            for condition, info in SpecialPopulationExercise.shared().chronic_condition_specifics.items()}
+
+@lru_cache(maxsize=None)
+def _trait_automaton() -> KeywordAutomaton:
+    keywords: Dict[str, set] = {}
+    for index, (_, _, rule_keywords) in enumerate(TRAIT_KEYWORDS):
+        for keyword in rule_keywords:
+            keywords.setdefault(keyword.lower(), set()).add(index)
+    return KeywordAutomaton(keywords)
+
+def derive_traits(name: str, description: str, met_value: float, category: Optional[str]) -> ActivityTraits:
+    """Traits of one activity from its text (one automaton pass) and MET value"""
+    found = {}
+    for index in sorted(_trait_automaton().find(f"{name}\n{description}".lower())):
+        attribute, value, _ = TRAIT_KEYWORDS[index]
+        found.setdefault(attribute, []).append(value)
+    return ActivityTraits(
+        category=category or "uncategorized",
+        intensity=intensity_band(met_value),
+        exercise_types=tuple(found.get("exercise_type", ())) or ("lifestyle",),
+        impact="high" if "impact" in found else "low",
+        fall_risk="fall_risk" in found,
+        supine="supine" in found,
+        isometric="isometric" in found,
+        contact="contact" in found
+    )
+
+# Query filter -> ActivityTraits field
+FILTER_FIELDS = {
+    "category": "category",
+    "intensity": "intensity",
+    "exercise_type": "exercise_types",
+    "impact": "impact",
+    "fall_risk": "fall_risk",
+    "supine": "supine",
+    "isometric": "isometric",
+    "contact": "contact"
+}
+
+def _bitmap(positions: Iterable[int], size: int) -> int:
+    """int with the given bits set, built in O(size) rather than one shift per position"""
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+def _values(value: Any) -> Tuple:
+    """A filter value or collection of values (any of them matches), enums as their value"""
+    values = value if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+    return tuple(sorted({item.value if isinstance(item, Enum) else item for item in values}, key=repr))
+
+@dataclass(frozen=True)
+class ActivityPage:
+    """One page of query results"""
+    activities: List[Any]
+    total: int  # matches across all pages
+    next_cursor: Optional[str]  # None on the last page
+
+class ActivityQueryEngine:
+    """Bitmap-indexed activity catalog; bit i of every bitmap is records[i]
+    
+    Bitmaps are plain ints, so a filter is an OR over its values, a query is an
+    AND over filters, and exclusions are removed with & ~mask.
+    """
+    
+    def __init__(self, records: Sequence[Any], traits: Sequence[ActivityTraits], memo_size: int = 1024):
+        self.records = list(records)
+        self.traits = list(traits)
+        size = len(self.records)
+        self.all = (1 << size) - 1
+        
+        positions: Dict[str, Dict[Any, List[int]]] = {name: {} for name in FILTER_FIELDS}
+        for position, activity_traits in enumerate(self.traits):
+            for name, field in FILTER_FIELDS.items():
+                value = getattr(activity_traits, field)
+                for item in (value if isinstance(value, tuple) else (value,)):
+                    positions[name].setdefault(item, []).append(position)
+        self.indexes: Dict[str, Dict[Any, int]] = {
+            name: {value: _bitmap(value_positions, size) for value, value_positions in values.items()}
+            for name, values in positions.items()
+        }
+        
+        self.population_exclusions = {population: self._exclusion(rules)
+                                      for population, rules in population_exclusions().items()}
+        self.condition_exclusions = {condition: self._exclusion(rules)
+                                     for condition, rules in condition_exclusions().items()}
+        self._memo: Dict[tuple, int] = {}
+        self._memo_size = memo_size
+        # Folded into cursors, so a cursor from another catalog (or catalog order) is rejected
+        self.catalog_digest = zlib.crc32(repr((
+            [getattr(record, "name", record) for record in self.records], self.traits)).encode("utf-8"))
+    
+    @classmethod
+    def from_registry(cls, registry=None) -> "ActivityQueryEngine":
+        """Engine over every registry activity (both the prescription and education catalogs)"""
+        activities: List[RegisteredActivity] = (registry or get_registry()).activities
+        return cls(activities, [derive_traits(activity.name, activity.description, activity.met_value, activity.category)
+                                for activity in activities])
+    
+    @classmethod
+    def from_activities(cls, activities: Iterable[Any]) -> "ActivityQueryEngine":
+        """Engine over METActivity records, e.g. a MappedCompendium or activities_database values"""
+        activities = list(activities)
+        return cls(activities, [derive_traits(activity.name, activity.description, activity.met_value,
+                                              activity.category.value) for activity in activities])
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    def _exclusion(self, rules: Iterable[Tuple[str, Any]]) -> int:
+        mask = 0
+        for attribute, value in rules:
+            mask |= self.indexes[attribute].get(value, 0)
+        return mask
+    
+    def _key(self, filters: Dict[str, Any], population: Optional[SpecialPopulation],
+             conditions: Iterable[ChronicCondition]) -> tuple:
+        unknown = set(filters) - set(FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}; available: {', '.join(FILTER_FIELDS)}")
+        return (
+            tuple((name, _values(filters[name])) for name in FILTER_FIELDS if filters.get(name) is not None),
+            population.value if population else None,
+            tuple(sorted(condition.value for condition in set(conditions)))
+        )
+    
+    def mask(self,
+             population: Optional[SpecialPopulation] = None,
+             conditions: Iterable[ChronicCondition] = (),
+             **filters) -> int:
+        """Bitmap of activities matching every filter and excluded by neither population nor conditions"""
+        return self._mask(self._key(filters, population, conditions))
+    
+    def _mask(self, key: tuple) -> int:
+        mask = self._memo.get(key)
+        if mask is not None:
+            return mask
+        filters, population, conditions = key
+        mask = self.all
+        for name, values in filters:
+            index = self.indexes[name]
+            selected = 0
+            for value in values:
+                selected |= index.get(value, 0)
+            mask &= selected
+        if population:
+            mask &= ~self.population_exclusions[SpecialPopulation(population)]
+        for condition in conditions:
+            mask &= ~self.condition_exclusions[ChronicCondition(condition)]
+        
+        if len(self._memo) >= self._memo_size:
+            self._memo.clear()
+        self._memo[key] = mask
+        return mask
+    
+    def select(self, mask: int) -> List[Any]:
+        """Records of the set bits, in catalog order"""
+        return [self.records[position] for position in _positions(mask)]
+    
+    def query(self,
+              population: Optional[SpecialPopulation] = None,
+              conditions: Iterable[ChronicCondition] = (),
+              limit: int = 20,
+              cursor: Optional[str] = None,
+              **filters) -> ActivityPage:
+        """One page of matching activities in catalog order; pass next_cursor back for the next page
+        
+        Filters take one value or a list of values (any matches): category,
+        intensity, exercise_type, impact ("low"/"high") and the booleans
+        fall_risk, supine, isometric and contact.
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        key = self._key(filters, population, conditions)
+        mask = self._mask(key)
+        fingerprint = zlib.crc32(repr(key).encode("utf-8"), self.catalog_digest)
+        
+        remaining = mask
+        if cursor is not None:
+            remaining &= ~((1 << (_decode_cursor(cursor, fingerprint) + 1)) - 1)
+        positions = []
+        for position in _positions(remaining):
+            positions.append(position)
+            if len(positions) == limit:
+                break
+        
+        more = bool(positions) and remaining >> (positions[-1] + 1) != 0
+        return ActivityPage(
+            activities=[self.records[position] for position in positions],
+            total=mask.bit_count(),
+            next_cursor=_encode_cursor(positions[-1], fingerprint) if more else None
+        )
+
+def _positions(mask: int):
+    """Set bit positions, lowest first"""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+def _encode_cursor(position: int, fingerprint: int) -> str:
+    return base64.urlsafe_b64encode(f"{position}:{fingerprint:x}".encode("ascii")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str, fingerprint: int) -> int:
+    """Position after which the page starts; the cursor must come from the same query and catalog"""
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        position, cursor_fingerprint = text.split(":")
+        if int(cursor_fingerprint, 16) == fingerprint and int(position) >= 0:
+            return int(position)
+    except ValueError:
+        pass
+    raise ValueError("Invalid cursor for this query")
+
+@lru_cache(maxsize=None)
+def default_query_engine() -> ActivityQueryEngine:
+    """Process-wide engine over the MET registry"""
+    return ActivityQueryEngine.from_registry()
+
+def main():
+    """Moderate, low-impact activities safe in pregnancy with osteoporosis, then a paged scan"""
+    engine = default_query_engine()
+    for activity, traits in zip(engine.records, engine.traits):
+        flags = [name for name in ("fall_risk", "supine", "isometric", "contact") if getattr(traits, name)]
+        print(f"{activity.name:<12}{traits.intensity:<10}{traits.impact:<6}{'/'.join(traits.exercise_types):<28}"
+              f"{', '.join(flags)}")
+    
+    page = engine.query(SpecialPopulation.PREGNANCY, [ChronicCondition.OSTEOPOROSIS],
+                        intensity="moderate", impact="low")
+    print(f"\nPregnancy + osteoporosis, moderate, low impact ({page.total}):")
+    for activity in page.activities:
+        print(f"  • {activity.name} ({activity.met_value} METs)")
+    
+    print("\nAll light or moderate activities for hypertension, 4 per page:")
+    cursor = None
+    while True:
+        page = engine.query(conditions=[ChronicCondition.HYPERTENSION], intensity=["light", "moderate"],
+                            limit=4, cursor=cursor)
+        print(f"  {[activity.name for activity in page.activities]}")
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+if __name__ == "__main__":
+    main()
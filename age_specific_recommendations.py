@@ -4,8 +4,14 @@ Based on WHO 2020 Guidelines and evidence-based research
 """
 
 from dataclasses import dataclass
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional, Sequence, Tuple
 import json
+import math
+
+from instrumentation import instrumented, stage
+from met_registry import get_registry
+from shared_tables import shared_instance, shared_table, table_copy
 
 @dataclass
 class ExerciseActivity:
@@ -17,10 +23,179 @@ class ExerciseActivity:
     benefits: List[str]
     considerations: List[str]
 
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# MET source for each recommended activity: a registry activity ID, or a MET value
+# (Compendium of Physical Activities) for activities the registry does not list
+ACTIVITY_MET_SOURCES = {
+    "Active play and games": 5.0,
+    "Sports participation": "basketball",
+    "Playground activities": 5.0,
+    "Dancing": "dancing",
+    "Brisk walking": "brisk_walking",
+    "Resistance training": "weight_training",
+    "Swimming/Water aerobics": "easy_swimming",
+    "Cycling": "leisure_cycling",
+    "Walking programs": "walking",
+    "Tai Chi": "tai_chi",
+    "Chair exercises": 2.8,
+    "Water aerobics": 5.3,
+    "Balance training": 2.5
+}
+
+# Registry activities that count toward strength or balance sessions when chosen by preference
+CATALOG_STRENGTH_IDS = ("weight_training",)
+CATALOG_BALANCE_IDS = ("tai_chi", "yoga")
+
+# Exclusive MET bound of each intensity band (see met_registry.intensity_band)
+BAND_MET_CEILINGS = {"light": 3.0, "moderate": 6.0, "vigorous": math.inf}
+
+@dataclass(frozen=True)
+class ScheduleCandidate:
+    """An activity the schedule optimizer can place, with numeric session bounds"""
+    name: str
+    met_value: float
+    min_minutes: int
+    max_minutes: int
+    aerobic: bool
+    strength: bool
+    balance: bool
+    keywords: Tuple[str, ...]  # lowercased name / registry ID, matched against preferences
+
+@dataclass(frozen=True)
+class ScheduleConstraints:
+    """Weekly schedule requirements; hashable, so identical sets are solved only once"""
+    daily_minutes: Tuple[int, ...] = (60,) * 7  # time limit per day, Monday first
+    rest_days: Tuple[int, ...] = ()  # day indexes, 0 = Monday
+    min_strength_sessions: int = 2
+    min_balance_sessions: int = 0
+    weekly_met_minutes: float = 600.0  # 150 min at 4 METs
+    preferences: Tuple[str, ...] = ()  # lowercased, sorted; see normalized()
+    
+    def __post_init__(self):
+        if len(self.daily_minutes) != len(WEEKDAYS):
+            raise ValueError(f"daily_minutes needs {len(WEEKDAYS)} entries (Monday first), "
+                             f"got {len(self.daily_minutes)}")
+        invalid = [day for day in self.rest_days if not 0 <= day < len(WEEKDAYS)]
+        if invalid:
+            raise ValueError(f"rest_days must be day indexes 0-6 (0 = Monday), got {invalid}")
+    
+    def normalized(self) -> "ScheduleConstraints":
+        """Same constraints with preferences lowercased, de-duplicated and sorted"""
+        preferences = tuple(sorted({p.strip().lower() for p in self.preferences} - {""}))
+        return self if preferences == self.preferences else ScheduleConstraints(
+            self.daily_minutes, self.rest_days, self.min_strength_sessions,
+            self.min_balance_sessions, self.weekly_met_minutes, preferences)
+
+# Default constraints per age group, from the WHO 2020 key guidelines
+DEFAULT_SCHEDULE_CONSTRAINTS = {
+    "children_adolescents": ScheduleConstraints(
+        daily_minutes=(75,) * 5 + (90, 90), min_strength_sessions=3,
+        weekly_met_minutes=420 * 4.0),
+    "adults": ScheduleConstraints(
+        daily_minutes=(60,) * 7, rest_days=(6,), min_strength_sessions=2,
+        weekly_met_minutes=150 * 4.0),
+    "older_adults": ScheduleConstraints(
+        daily_minutes=(45,) * 7, min_strength_sessions=2, min_balance_sessions=3,
+        weekly_met_minutes=150 * 4.0)
+}
+
+def _parse_minutes(duration: str) -> Tuple[int, int]:
+    """'15-30 minutes' -> (15, 30); '30 minutes' -> (30, 30)"""
+    bounds = duration.split()[0].split("-")
+    return int(bounds[0]), int(bounds[-1])
+
+def _pick_days(remaining: List[int], minutes: int, taken: List[bool], spaced: bool) -> Optional[int]:
+    """Day with the most time left that fits minutes, preferring days not next to a taken day"""
+    best, best_key = None, None
+    for day, left in enumerate(remaining):
+        if left < minutes or taken[day]:
+            continue
+        adjacent = spaced and (taken[day - 1] or taken[(day + 1) % 7])
+        key = (not adjacent, left, -day)
+        if best_key is None or key > best_key:
+            best, best_key = day, key
+    return best
+
+@lru_cache(maxsize=4096)
+def _solve_schedule(candidates: Tuple[ScheduleCandidate, ...], constraints: ScheduleConstraints) -> tuple:
+    """Greedy placement; returns (sessions per day, aerobic MET-minutes, unmet constraint notes)
+    
+    Strength sessions go first on spaced days, then balance sessions, then
+    aerobic sessions on the day with the most time left until the weekly
+    MET-minute target is met. Only aerobic activities count toward the
+    target. Preferred activities win over others, then the least used one,
+    then the highest MET.
+    """
+    remaining = [0 if day in constraints.rest_days else limit
+                 for day, limit in enumerate(constraints.daily_minutes)]
+    days: List[List[tuple]] = [[] for _ in WEEKDAYS]
+    usage = {candidate.name: 0 for candidate in candidates}
+    preferred = {
+        candidate.name for candidate in candidates
+        if any(p in keyword for p in constraints.preferences for keyword in candidate.keywords)
+    }
+    
+    def ranked(pool):
+        return sorted(pool, key=lambda c: (c.name not in preferred, usage[c.name], -c.met_value))
+    
+    met_minutes = 0.0
+    
+    def place(day: int, candidate: ScheduleCandidate, minutes: int, kind: str):
+        nonlocal met_minutes
+        days[day].append((candidate.name, minutes, candidate.met_value, kind))
+        remaining[day] -= minutes
+        usage[candidate.name] += 1
+        if candidate.aerobic:
+            met_minutes += minutes * candidate.met_value
+    
+    unmet = []
+    for kind, required in (("strength", constraints.min_strength_sessions),
+                           ("balance", constraints.min_balance_sessions)):
+        pool = [c for c in candidates if getattr(c, kind)]
+        taken = [False] * 7
+        for _ in range(required):
+            for candidate in ranked(pool):
+                day = _pick_days(remaining, candidate.min_minutes, taken, spaced=kind == "strength")
+                if day is not None:
+                    place(day, candidate, candidate.min_minutes, kind)
+                    taken[day] = True
+                    break
+            else:
+                unmet.append(f"Only {sum(taken)} of {required} {kind} sessions fit")
+                break
+    
+    pool = [c for c in candidates if c.aerobic]
+    open_days = {day for day, left in enumerate(remaining) if left > 0}
+    while met_minutes < constraints.weekly_met_minutes and open_days:
+        day = max(open_days, key=lambda d: (remaining[d], -len(days[d]), -d))
+        on_day = {session[0] for session in days[day]}
+        for candidate in ranked(c for c in pool if c.name not in on_day):
+            if remaining[day] < candidate.min_minutes:
+                continue
+            needed = (constraints.weekly_met_minutes - met_minutes) / candidate.met_value
+            minutes = min(candidate.max_minutes, remaining[day],
+                          max(candidate.min_minutes, 5 * math.ceil(needed / 5)))
+            place(day, candidate, minutes, "aerobic")
+            break
+        else:
+            open_days.discard(day)
+    
+    if met_minutes < constraints.weekly_met_minutes:
+        unmet.append(f"Weekly MET-minutes {met_minutes:.0f} below target {constraints.weekly_met_minutes:.0f}")
+    return tuple(tuple(day) for day in days), met_minutes, tuple(unmet)
+
 class AgeSpecificRecommendations:
     
-    def __init__(self):
-        self.recommendations = self._create_age_specific_recommendations()
+    # Built on first use and shared by every instance; assign to override per instance
+    recommendations = shared_table("_create_age_specific_recommendations")
+    schedule_candidates = shared_table("_create_schedule_candidates")
+    intensity_ceilings = shared_table("_create_intensity_ceilings")
+    
+    @classmethod
+    def shared(cls) -> "AgeSpecificRecommendations":
+        """Process-wide instance whose tables and caches are built once"""
+        return shared_instance(cls)
     
     def _create_age_specific_recommendations(self) -> Dict:
         return {
@@ -198,56 +373,159 @@ class AgeSpecificRecommendations:
             }
         }
     
+    def _create_schedule_candidates(self) -> Dict[str, Tuple[ScheduleCandidate, ...]]:
+        """Numeric form of each group's recommended activities, plus the registry's catalog
+        
+        Catalog activities only take part when a preference selects them.
+        """
+        registry = get_registry()
+        candidates = {}
+        for group, recommendations in self.recommendations.items():
+            group_candidates = []
+            for activity in recommendations["recommended_activities"]:
+                source = ACTIVITY_MET_SOURCES[activity.name]
+                registered = registry.get(source) if isinstance(source, str) else None
+                min_minutes, max_minutes = _parse_minutes(activity.duration)
+                group_candidates.append(ScheduleCandidate(
+                    name=activity.name,
+                    met_value=registered.met_value if registered else source,
+                    min_minutes=min_minutes,
+                    max_minutes=max_minutes,
+                    aerobic="aerobic" in activity.type,
+                    strength="strengthening" in activity.type or "resistance" in activity.type,
+                    balance="balance" in activity.type,
+                    keywords=(activity.name.lower(),) + ((registered.id,) if registered else ())
+                ))
+            candidates[group] = tuple(group_candidates)
+        
+        candidates["catalog"] = tuple(
+            ScheduleCandidate(
+                name=activity.name,
+                met_value=activity.met_value,
+                min_minutes=20,
+                max_minutes=45,
+                aerobic=activity.id not in CATALOG_STRENGTH_IDS + CATALOG_BALANCE_IDS,
+                strength=activity.id in CATALOG_STRENGTH_IDS,
+                balance=activity.id in CATALOG_BALANCE_IDS,
+                keywords=(activity.id, activity.name)
+            )
+            for activity in registry.activities
+        )
+        return candidates
+    
+    def _create_intensity_ceilings(self) -> Dict[str, float]:
+        """Per age group, the MET value its schedule activities must stay below
+        
+        Taken from the most intense band among the group's recommended
+        activities, e.g. moderate (< 6.0 METs) for older adults.
+        """
+        return {
+            group: max(BAND_MET_CEILINGS[band]
+                       for activity in recommendations["recommended_activities"]
+                       for band in activity.intensity.split("-"))
+            for group, recommendations in self.recommendations.items()
+        }
+    
     def get_recommendations(self, age_group: str) -> Dict:
-        """Get specific recommendations for age group"""
-        return self.recommendations.get(age_group, {})
+        """Get specific recommendations for age group (a copy the caller may modify)"""
+        return table_copy(self.recommendations.get(age_group, {}))
+    
+    @instrumented("age_specific")
+    def create_weekly_schedule(self,
+                               age: int,
+                               preferences: List[str] = None,
+                               constraints: Optional[ScheduleConstraints] = None) -> Dict:
+        """Create a weekly exercise schedule with the constraint-based optimizer
+        
+        Without constraints the age group's DEFAULT_SCHEDULE_CONSTRAINTS apply;
+        preferences (activity names, registry IDs or parts of them) are merged in.
+        """
+        with stage("age_specific", "age_classification"):
+            group = self._age_group(age)
+            constraints = self._schedule_constraints(group, preferences, constraints)
+        with stage("age_specific", "schedule_solver"):
+            solution = self._solve(group, constraints)
+        with stage("age_specific", "formatting"):
+            return self._format_schedule(group, constraints, solution)
     
-    def create_weekly_schedule(self, age: int, preferences: List[str] = None) -> Dict:
-        """Create a sample weekly exercise schedule"""
+    @instrumented("age_specific")
+    def create_weekly_schedules_batch(self,
+                                      ages: Sequence[int],
+                                      preferences: Optional[Sequence[Optional[List[str]]]] = None,
+                                      constraints: Optional[Sequence[Optional[ScheduleConstraints]]] = None) -> Dict:
+        """Schedules for a whole cohort; each distinct (age group, constraints) is solved once
         
+        preferences and constraints are None or one entry per person. Returns
+        the distinct schedules and, per person, an index into them.
+        """
+        schedule_index: Dict[tuple, int] = {}
+        schedules = []
+        indexes = []
+        for position, age in enumerate(ages):
+            group = self._age_group(age)
+            key = (group, self._schedule_constraints(
+                group,
+                preferences[position] if preferences is not None else None,
+                constraints[position] if constraints is not None else None))
+            index = schedule_index.get(key)
+            if index is None:
+                index = schedule_index[key] = len(schedules)
+                schedules.append(self._format_schedule(group, key[1], self._solve(*key)))
+            indexes.append(index)
+        
+        return {"count": len(indexes), "schedules": schedules, "schedule_index": indexes}
+    
+    def _age_group(self, age: int) -> str:
         if age <= 17:
-            group = "children_adolescents"
+            return "children_adolescents"
         elif age <= 64:
-            group = "adults"
+            return "adults"
         else:
-            group = "older_adults"
-        
-        recommendations = self.get_recommendations(group)
-        
-        if group == "children_adolescents":
-            schedule = {
-                "Monday": "Active play (30 min) + Sports practice (30 min)",
-                "Tuesday": "Playground activities (30 min) + Free play (30 min)",
-                "Wednesday": "Dancing or movement (45 min) + Active games (15 min)",
-                "Thursday": "Sports or structured activity (45 min) + Walking (15 min)",
-                "Friday": "Active play (30 min) + Family activity (30 min)",
-                "Saturday": "Longer sports activity (60-90 min)",
-                "Sunday": "Family outdoor activity (60 min)"
-            }
-        elif group == "adults":
-            schedule = {
-                "Monday": "Resistance training (45 min)",
-                "Tuesday": "Brisk walking (30 min)",
-                "Wednesday": "Resistance training (45 min) + Stretching (15 min)",
-                "Thursday": "Cycling or swimming (45 min)",
-                "Friday": "Brisk walking (30 min) + Flexibility (15 min)",
-                "Saturday": "Longer aerobic activity (60 min)",
-                "Sunday": "Active recreation or rest"
-            }
-        else:  # older_adults
-            schedule = {
-                "Monday": "Walking (25 min) + Balance exercises (15 min)",
-                "Tuesday": "Chair exercises (30 min)",
-                "Wednesday": "Tai Chi or gentle movement (30 min)",
-                "Thursday": "Walking (25 min) + Strength exercises (20 min)",
-                "Friday": "Water aerobics (45 min)",
-                "Saturday": "Social activity with movement (30-45 min)",
-                "Sunday": "Gentle stretching and relaxation (20 min)"
-            }
-        
+            return "older_adults"
+    
+    def _schedule_constraints(self,
+                              group: str,
+                              preferences: Optional[List[str]],
+                              constraints: Optional[ScheduleConstraints]) -> ScheduleConstraints:
+        constraints = constraints or DEFAULT_SCHEDULE_CONSTRAINTS[group]
+        if preferences:
+            constraints = ScheduleConstraints(
+                constraints.daily_minutes, constraints.rest_days, constraints.min_strength_sessions,
+                constraints.min_balance_sessions, constraints.weekly_met_minutes,
+                constraints.preferences + tuple(preferences))
+        return constraints.normalized()
+    
+    def _solve(self, group: str, constraints: ScheduleConstraints) -> tuple:
+        candidates = self.schedule_candidates[group]
+        if constraints.preferences:
+            candidates += tuple(
+                candidate for candidate in self.schedule_candidates["catalog"]
+                if any(p in keyword for p in constraints.preferences for keyword in candidate.keywords)
+            )
+        # The age group's intensity ceiling is a hard limit, applied before preferences rank anything
+        ceiling = self.intensity_ceilings[group]
+        return _solve_schedule(tuple(c for c in candidates if c.met_value < ceiling), constraints)
+    
+    def _format_schedule(self, group: str, constraints: ScheduleConstraints, solution: tuple) -> Dict:
+        days, met_minutes, unmet = solution
+        recommendations = self.recommendations.get(group, {})
+        schedule = {
+            day_name: " + ".join(f"{name} ({minutes} min)" for name, minutes, _, _ in sessions) or "Rest"
+            for day_name, sessions in zip(WEEKDAYS, days)
+        }
         return {
             "age_group": recommendations.get("age_range", ""),
             "weekly_schedule": schedule,
+            "sessions": {
+                day_name: [
+                    {"activity": name, "minutes": minutes, "met_value": met, "kind": kind}
+                    for name, minutes, met, kind in sessions
+                ]
+                for day_name, sessions in zip(WEEKDAYS, days)
+            },
+            "weekly_met_minutes": round(met_minutes, 1),  # aerobic activities only
+            "weekly_met_minutes_target": constraints.weekly_met_minutes,
+            "unmet_constraints": list(unmet),
             "total_weekly_volume": self._calculate_weekly_volume(group),
             "progression_notes": self._get_progression_notes(group)
         }
@@ -298,6 +576,8 @@ def main():
         schedule = system.create_weekly_schedule(age)
         print(f"Age Group: {schedule['age_group']}")
         print(f"Weekly Volume: {schedule['total_weekly_volume']}")
+        print(f"MET-minutes: {schedule['weekly_met_minutes']:.0f} "
+              f"(target {schedule['weekly_met_minutes_target']:.0f})")
         
         print("\nWeekly Schedule:")
         for day, activity in schedule['weekly_schedule'].items():
@@ -306,6 +586,17 @@ def main():
         print("\nProgression Notes:")
         for note in schedule['progression_notes']:
             print(f"  • {note}")
+    
+    # Preferences never lift an activity above the age group's intensity ceiling
+    schedule = system.create_weekly_schedule(72, ["跑步", "running"])
+    assert all(session["met_value"] < system.intensity_ceilings["older_adults"]
+               for sessions in schedule["sessions"].values() for session in sessions)
+    
+    # Cohort mode: identical constraint sets are solved once
+    ages = [25, 40, 70, 33, 58, 81, 15] * 1000
+    preferences = [["swimming"], None, ["tai chi"], ["running"], None, None, ["dancing"]] * 1000
+    batch = system.create_weekly_schedules_batch(ages, preferences)
+    print(f"\nBatch: {batch['count']} people, {len(batch['schedules'])} distinct schedules")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+Benchmark Suite
+Steady-state throughput, latency percentiles and peak traced memory per call for the
+public engine methods, driven by fixed synthetic inputs; results are saved as
+JSON and can be compared against a saved baseline to flag regressions
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from age_specific_recommendations import AgeSpecificRecommendations
+from exercise_prescription_framework import ExercisePrescriptionSystem
+from fitt_vp_framework import FITTVPFramework
+from met_introduction import METEducationSystem
+from met_registry import get_registry
+from special_populations import SpecialPopulation, SpecialPopulationExercise
+
+DEFAULT_SEED = 2024
+DEFAULT_INPUTS = 64  # distinct synthetic inputs per benchmark, cycled through
+PERCENTILES = (50, 90, 99)
+# Metrics compare mode checks; True when a larger value is worse
+COMPARED_METRICS = {
+    "calls_per_second": False,
+    "p50_us": True,
+    "p99_us": True,
+    "peak_bytes_per_call": True
+}
+
+def _build_benchmarks(seed: int, count: int) -> Dict[str, Tuple[Callable, List[tuple]]]:
+    """name -> (bound method, fixed argument tuples); the same seed always gives the same inputs"""
+    rng = random.Random(seed)
+    prescriptions = ExercisePrescriptionSystem.shared()
+    fitt = FITTVPFramework.shared()
+    education = METEducationSystem.shared()
+    ages = AgeSpecificRecommendations.shared()
+    special = SpecialPopulationExercise.shared()
+    
+    goals = list(fitt.progression_strategies)
+    fitness_levels = ["beginner", "intermediate", "advanced"]
+    limitations = [[], [], ["knee pain"], ["heart condition"], ["back injury", "time constraint"]]
+    names = [activity.name for activity in get_registry().activities]
+    keywords = names + ["走", "游泳", "訓練", "yoga", "cycling", "不存在的活動"]
+    preferences = [None, ["游泳"], ["瑜珈", "太極拳"], ["跑步", "重量訓練"]]
+    conditions = [None] + list(special.chronic_condition_specifics)
+    
+    def fitt_args():
+        return (rng.choice(goals), rng.choice(fitness_levels), rng.choice([20, 30, 45, 60, 90]),
+                rng.randint(2, 6), None, rng.choice(limitations))
+    
+    def adapted_args():
+        population = rng.choice(list(SpecialPopulation))
+        condition = rng.choice(conditions) if population is SpecialPopulation.CHRONIC_DISEASE else None
+        return population, rng.randint(18, 85), condition, rng.choice(["sedentary", "active"])
+    
+    def weekly_activities():
+        return [{"activity": rng.choice(names), "duration_minutes": rng.choice([15, 20, 30, 45, 60]),
+                 "frequency_per_week": rng.randint(1, 5)} for _ in range(rng.randint(1, 5))]
+    
+    def met_range():
+        low = round(rng.uniform(1.0, 8.0), 1)
+        return low, round(low + rng.uniform(0.5, 4.0), 1)
+    
+    return {
+        "create_individualized_prescription": (
+            prescriptions.create_individualized_prescription,
+            [(rng.randint(6, 90), float(rng.randint(25, 120)), rng.choice(["healthy", "has_conditions"]),
+              rng.choice(fitness_levels)) for _ in range(count)]),
+        "FITTVPFramework.create_prescription": (
+            fitt.create_prescription, [fitt_args() for _ in range(count)]),
+        "create_periodized_plan": (
+            fitt.create_periodized_plan,
+            [(fitt.create_numeric_prescription(*fitt_args()), rng.choice([8, 12, 24])) for _ in range(count)]),
+        "search_activities": (
+            education.search_activities,
+            [(rng.choice(keywords), rng.random() < 0.5) for _ in range(count)]),
+        "get_activities_by_met_range": (
+            education.get_activities_by_met_range, [met_range() for _ in range(count)]),
+        "calculate_weekly_met_minutes": (
+            education.calculate_weekly_met_minutes, [(weekly_activities(),) for _ in range(count)]),
+        "create_weekly_schedule": (
+            ages.create_weekly_schedule,
+            [(rng.randint(3, 90), rng.choice(preferences)) for _ in range(count)]),
+        "create_adapted_prescription": (
+            special.create_adapted_prescription, [adapted_args() for _ in range(count)])
+    }
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percentile / 100))]
+
+def measure(method: Callable, inputs: List[tuple], min_seconds: float = 0.5,
+            min_calls: int = 200, traced_calls: int = 100) -> Dict[str, float]:
+    """Time calls cycling over inputs, then trace memory in a separate pass
+    
+    Latencies come from an untraced pass (one warm-up round over the inputs
+    first) so tracemalloc overhead never shows up in the timings.
+    peak_bytes_per_call is the mean peak of traced memory above the level
+    before each call, not the total bytes allocated during it.
+    """
+    for args in inputs:
+        method(*args)
+    
+    latencies = []
+    clock = time.perf_counter
+    started = clock()
+    calls = 0
+    while calls < min_calls or clock() - started < min_seconds:
+        args = inputs[calls % len(inputs)]
+        before = clock()
+        method(*args)
+        latencies.append(clock() - before)
+        calls += 1
+    elapsed = clock() - started
+    
+    # Peak traced memory above the starting point, per call
+    peaks = []
+    tracemalloc.start()
+    try:
+        for call in range(traced_calls):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            method(*inputs[call % len(inputs)])
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    
+    latencies.sort()
+    result = {"calls": calls, "calls_per_second": calls / elapsed}
+    result.update({f"p{p}_us": _percentile(latencies, p) * 1e6 for p in PERCENTILES})
+    result["peak_bytes_per_call"] = sum(peaks) / len(peaks)
+    return result
+
+def run_benchmarks(names: Optional[List[str]] = None,
+                   seed: int = DEFAULT_SEED,
+                   inputs: int = DEFAULT_INPUTS,
+                   min_seconds: float = 0.5) -> Dict:
+    """Benchmark the selected methods (default: all); returns the JSON-ready report"""
+    benchmarks = _build_benchmarks(seed, inputs)
+    unknown = set(names or ()) - set(benchmarks)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}; available: {', '.join(benchmarks)}")
+    
+    results = {}
+    for name, (method, arguments) in benchmarks.items():
+        if names and name not in names:
+            continue
+        results[name] = measure(method, arguments, min_seconds)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        },
+        "settings": {"seed": seed, "inputs": inputs, "min_seconds": min_seconds},
+        "results": results
+    }
+
+def compare(report: Dict, baseline: Dict, threshold: float = 0.10) -> List[Dict]:
+    """Changes beyond threshold (a fraction) against baseline, one entry per benchmark and metric"""
+    changes = []
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        for metric, larger_is_worse in COMPARED_METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change if larger_is_worse else -change
+            if abs(change) > threshold:
+                changes.append({"benchmark": name, "metric": metric, "baseline": old, "current": new,
+                                "change": change, "regression": worse > 0})
+    return changes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the public engine methods")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="benchmarks to run (default: all)")
+    parser.add_argument("--seconds", type=float, default=0.5, help="minimum timed seconds per benchmark")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON (e.g. to save a baseline)")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a saved JSON report")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative change that counts as a regression (default: 0.10)")
+    args = parser.parse_args()
+    
+    report = run_benchmarks(args.only, args.seed, min_seconds=args.seconds)
+    print(f"{'benchmark':<38}{'calls/s':>11}{'p50':>9}{'p90':>9}{'p99':>9}{'peak/call':>12}  (µs, bytes)")
+    for name, result in report["results"].items():
+        print(f"{name:<38}{result['calls_per_second']:>11,.0f}{result['p50_us']:>9.1f}"
+              f"{result['p90_us']:>9.1f}{result['p99_us']:>9.1f}{result['peak_bytes_per_call']:>12,.0f}")
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        changes = compare(report, baseline, args.threshold)
+        regressions = [change for change in changes if change["regression"]]
+        print(f"\nAgainst {args.compare} (threshold {args.threshold:.0%}):")
+        for change in changes:
+            print(f"  {'REGRESSION' if change['regression'] else 'improved  '} {change['benchmark']} "
+                  f"{change['metric']}: {change['baseline']:,.1f} -> {change['current']:,.1f} "
+                  f"({change['change']:+.0%})")
+        if not changes:
+            print("  no changes beyond threshold")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
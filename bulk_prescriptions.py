@@ -0,0 +1,234 @@
+"""
+Bulk Prescription CLI
+Streams an intake CSV (the fields collectFormData in script.js collects) through
+a process pool in chunks and writes one JSON line per row, in input order, with
+progress reporting and resumable output. With --static-refs, shared static
+sections are written once to <output>.static.json and rows hold {"$ref": id}
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from exercise_prescription_framework import ExercisePrescriptionSystem
+from fitt_vp_framework import FITTVPFramework
+from service import json_default
+from special_populations import ChronicCondition, SpecialPopulation, SpecialPopulationExercise
+from static_content import StaticContentRef, default_registry
+
+# Appended to the output path for the static sections that --static-refs rows reference
+STATIC_SECTIONS_SUFFIX = ".static.json"
+
+INTAKE_FIELDS = ["age", "gender", "height", "weight", "fitness_level",
+                 "exercise_habit", "health_status", "diseases", "limitations"]
+
+# Web form fitness level -> engine fitness level
+FITNESS_LEVELS = {
+    "poor": "beginner",
+    "fair": "beginner",
+    "good": "intermediate",
+    "excellent": "advanced"
+}
+
+# Web form exercise habit -> (minutes per session, days per week) available
+EXERCISE_HABIT_AVAILABILITY = {
+    "none": (30, 3),
+    "light": (30, 3),
+    "moderate": (45, 4),
+    "active": (60, 5),
+    "student_athlete": (90, 6)
+}
+
+# Web form disease checkbox -> chronic condition with adapted guidance
+DISEASE_CONDITIONS = {
+    "diabetes": ChronicCondition.DIABETES,
+    "hypertension": ChronicCondition.HYPERTENSION,
+    "heart_recovery": ChronicCondition.HEART_DISEASE,
+    "arthritis": ChronicCondition.ARTHRITIS,
+    "overweight": ChronicCondition.OBESITY,
+    "asthma": ChronicCondition.COPD
+}
+
+def _split_list(value: Optional[str]) -> List[str]:
+    """'a|b' -> ['a', 'b'] (spreadsheet cells hold the checkbox lists '|'-separated)"""
+    return [item.strip() for item in (value or "").split("|") if item.strip() and item.strip() != "none"]
+
+def prescribe_row(row: Dict[str, str], static_refs: bool = False) -> Dict:
+    """All prescriptions for one intake row"""
+    age = int(row["age"])
+    weight = float(row["weight"])
+    diseases = _split_list(row.get("diseases"))
+    limitations = _split_list(row.get("limitations"))
+    health_status = "healthy" if row.get("health_status", "healthy") == "healthy" else "has_conditions"
+    habit = row.get("exercise_habit") or "none"
+    fitness = "beginner" if habit == "none" else FITNESS_LEVELS.get(row.get("fitness_level"), "beginner")
+    time_available, frequency_available = EXERCISE_HABIT_AVAILABILITY.get(habit, (30, 3))
+    if "heart_recovery" in diseases:
+        limitations.append("heart condition")
+    
+    goal = row.get("goal") or ("weight_loss" if "overweight" in diseases else "general_health")
+    result = {
+        "individualized": ExercisePrescriptionSystem.shared().create_individualized_prescription(
+            age, weight, health_status, fitness, static_refs=static_refs),
+        "fitt_vp": FITTVPFramework.shared().create_prescription(
+            goal, fitness, int(row.get("time_available") or time_available),
+            int(row.get("frequency_available") or frequency_available), None, limitations)
+    }
+    
+    # Adapted guidance when the form reports a condition or no exercise habit
+    special = SpecialPopulationExercise.shared()
+    if health_status != "healthy":
+        conditions = [DISEASE_CONDITIONS[d] for d in diseases
+                      if d in DISEASE_CONDITIONS and DISEASE_CONDITIONS[d] in special.chronic_condition_specifics]
+        result["adapted"] = special.create_adapted_prescription(
+            SpecialPopulation.CHRONIC_DISEASE, age, None,
+            "sedentary" if habit == "none" else "active", conditions)
+    elif habit == "none":
+        result["adapted"] = special.create_adapted_prescription(SpecialPopulation.SEDENTARY, age)
+    return result
+
+def _json_default(value: Any) -> Any:
+    """service.json_default, with static content references serialized as {"$ref": id}"""
+    if isinstance(value, StaticContentRef):
+        return default_registry.json_default(value)
+    return json_default(value)
+
+def _process_chunk(task: Tuple[int, List[Dict[str, str]], bool]) -> Tuple[str, Dict[str, Any]]:
+    """Prescribe a chunk of rows in a worker; returns its JSONL text and, with static_refs,
+    the worker's registered static sections. Bad rows become error lines"""
+    start, rows, static_refs = task
+    lines = []
+    for offset, row in enumerate(rows):
+        try:
+            record = {"row": start + offset, **prescribe_row(row, static_refs)}
+        except (KeyError, TypeError, ValueError) as error:
+            record = {"row": start + offset, "error": f"{type(error).__name__}: {error}"}
+        lines.append(json.dumps(record, ensure_ascii=False, default=_json_default))
+    return "\n".join(lines) + "\n", default_registry.export() if static_refs else {}
+
+def _chunks(rows: Iterable[Dict[str, str]], start: int, size: int,
+            static_refs: bool) -> Iterator[Tuple[int, List[Dict[str, str]], bool]]:
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield start, chunk, static_refs
+        start += len(chunk)
+
+def completed_rows(output_path: str) -> int:
+    """Rows already written to output_path; drops a partial trailing line left by an interrupted run"""
+    if not os.path.exists(output_path):
+        return 0
+    with open(output_path, "rb+") as handle:
+        data = handle.read()
+        complete = data.rfind(b"\n") + 1
+        if complete != len(data):
+            handle.truncate(complete)
+        return data.count(b"\n", 0, complete)
+
+def _save_sections(path: str, sections: Dict[str, Any]):
+    """Replace the static sections file atomically (temp file + os.replace)"""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump(sections, handle, ensure_ascii=False)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+
+def run_bulk(input_path: str,
+             output_path: str,
+             workers: Optional[int] = None,
+             chunk_size: int = 256,
+             resume: bool = False,
+             static_refs: bool = False,
+             progress_every: float = 2.0) -> int:
+    """Prescribe every row of input_path into output_path (JSONL, input order); returns rows written
+    
+    With static_refs, the sections the rows reference are written to
+    output_path + STATIC_SECTIONS_SUFFIX (merged with it when resuming),
+    always before the rows that use them.
+    """
+    skip = completed_rows(output_path) if resume else 0
+    written = 0
+    started = last_report = time.perf_counter()
+    sections_path = output_path + STATIC_SECTIONS_SUFFIX
+    sections: Dict[str, Any] = {}
+    if static_refs and resume and os.path.exists(sections_path):
+        with open(sections_path, encoding="utf-8") as handle:
+            sections = json.load(handle)
+    
+    with open(input_path, newline="", encoding="utf-8") as source, \
+            open(output_path, "a" if resume else "w", encoding="utf-8") as output, \
+            Pool(processes=workers) as pool:
+        rows = itertools.islice(csv.DictReader(source), skip, None)
+        # imap keeps input order while workers run ahead on later chunks
+        for text, chunk_sections in pool.imap(_process_chunk, _chunks(rows, skip, chunk_size, static_refs)):
+            # Sections reach disk before the rows referencing them, so an interrupted run stays resolvable
+            if chunk_sections.keys() - sections.keys():
+                sections.update(chunk_sections)
+                _save_sections(sections_path, sections)
+            output.write(text)
+            output.flush()
+            written += text.count("\n")
+            
+            now = time.perf_counter()
+            if progress_every and now - last_report >= progress_every:
+                print(f"  {skip + written} rows done ({written / (now - started):,.0f} rows/s)", file=sys.stderr)
+                last_report = now
+    
+    if static_refs and not os.path.exists(sections_path):
+        _save_sections(sections_path, sections)
+    
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {written} rows to {output_path} in {elapsed:.1f}s"
+          f"{f' (resumed after row {skip})' if skip else ''}", file=sys.stderr)
+    return written
+
+def write_sample_intake(path: str, rows: int, seed: int = 0):
+    """Random intake CSV for trying the CLI out"""
+    rng = random.Random(seed)
+    diseases = list(DISEASE_CONDITIONS) + ["sarcopenia"]
+    limitations = ["time_constraint", "lack_motivation", "pain", "injury_history", "balance", "breathing"]
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=INTAKE_FIELDS)
+        writer.writeheader()
+        for _ in range(rows):
+            has_conditions = rng.random() < 0.3
+            writer.writerow({
+                "age": rng.randint(6, 90),
+                "gender": rng.choice(["male", "female"]),
+                "height": rng.randint(120, 195),
+                "weight": rng.randint(25, 120),
+                "fitness_level": rng.choice(list(FITNESS_LEVELS)),
+                "exercise_habit": rng.choice(list(EXERCISE_HABIT_AVAILABILITY)),
+                "health_status": "has_conditions" if has_conditions else "healthy",
+                "diseases": "|".join(rng.sample(diseases, rng.randint(1, 2))) if has_conditions else "",
+                "limitations": "|".join(rng.sample(limitations, rng.randint(0, 2)))
+            })
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk exercise prescriptions for an intake CSV")
+    parser.add_argument("input", help="intake CSV (columns: " + ", ".join(INTAKE_FIELDS) + ")")
+    parser.add_argument("output", help="JSONL output, one line per input row in order")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--resume", action="store_true", help="continue after the rows already in output")
+    parser.add_argument("--static-refs", action="store_true",
+                        help="emit shared static sections as {\"$ref\": id}, written once to OUTPUT"
+                             + STATIC_SECTIONS_SUFFIX)
+    parser.add_argument("--sample", type=int, metavar="ROWS", help="first write a random intake CSV to input")
+    args = parser.parse_args()
+    
+    if args.sample:
+        write_sample_intake(args.input, args.sample)
+    run_bulk(args.input, args.output, args.workers, args.chunk_size, args.resume, args.static_refs)
+
+if __name__ == "__main__":
+    main()
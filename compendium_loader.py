@@ -0,0 +1,294 @@
+"""
+Compendium of Physical Activities Loader
+Compiles a CSV/JSON activity source into a compact binary file (fixed-width
+records plus a string pool) and opens it with mmap, decoding METActivity
+records lazily on access
+"""
+
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Dict, Iterator, List, Union
+
+from met_catalog import database_signature
+from met_introduction import ActivityCategory, METActivity, METEducationSystem
+
+MAGIC = b"MTCP"
+FORMAT_VERSION = 1
+
+# magic, version, record count, string pool offset
+_HEADER = struct.Struct("<4sHxxII")
+# per category, in ActivityCategory declaration order: first record, record count
+_CATEGORY_RANGE = struct.Struct("<II")
+# met_value, category, then (offset, length) into the string pool for
+# code, name, intensity, description, benefits, considerations, variations
+_RECORD = struct.Struct("<dB7x14I")
+
+_CATEGORIES = list(ActivityCategory)
+_LIST_SEPARATOR = "\x1f"
+_PAIR_SEPARATOR = "\x1e"
+
+def _load_source(source_path: str) -> List[Dict]:
+    """Read compendium rows from CSV (lists '|'-separated, variations 'name=met|...') or JSON"""
+    if source_path.lower().endswith(".json"):
+        with open(source_path, encoding="utf-8") as handle:
+            return json.load(handle)
+    
+    rows = []
+    with open(source_path, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            variations = {}
+            for pair in filter(None, (row.get("variations") or "").split("|")):
+                variation_name, variation_met = pair.rsplit("=", 1)
+                variations[variation_name] = float(variation_met)
+            rows.append({
+                "code": row.get("code", ""),
+                "name": row["name"],
+                "category": row["category"],
+                "met_value": float(row["met_value"]),
+                "intensity": row.get("intensity", ""),
+                "description": row.get("description", ""),
+                "benefits": list(filter(None, (row.get("benefits") or "").split("|"))),
+                "considerations": list(filter(None, (row.get("considerations") or "").split("|"))),
+                "variations": variations
+            })
+    return rows
+
+def compile_compendium(source_path: str, output_path: str) -> int:
+    """Compile a CSV or JSON compendium source into the binary format; returns the record count"""
+    rows = _load_source(source_path)
+    category_order = {category: position for position, category in enumerate(_CATEGORIES)}
+    # Stable sort keeps source order within each category
+    rows.sort(key=lambda row: category_order[ActivityCategory(row["category"])])
+    
+    pool = bytearray()
+    pooled: Dict[str, tuple] = {}
+    
+    def intern(text: str) -> tuple:
+        ref = pooled.get(text)
+        if ref is None:
+            data = text.encode("utf-8")
+            ref = pooled[text] = (len(pool), len(data))
+            pool.extend(data)
+        return ref
+    
+    records = bytearray()
+    counts = [0] * len(_CATEGORIES)
+    for row in rows:
+        category = category_order[ActivityCategory(row["category"])]
+        counts[category] += 1
+        variations = _LIST_SEPARATOR.join(
+            f"{name}{_PAIR_SEPARATOR}{met!r}" for name, met in row.get("variations", {}).items())
+        refs = [
+            intern(str(row.get("code", ""))),
+            intern(row["name"]),
+            intern(row.get("intensity", "")),
+            intern(row.get("description", "")),
+            intern(_LIST_SEPARATOR.join(row.get("benefits", []))),
+            intern(_LIST_SEPARATOR.join(row.get("considerations", []))),
+            intern(variations)
+        ]
+        records.extend(_RECORD.pack(float(row["met_value"]), category,
+                                    *[value for ref in refs for value in ref]))
+    
+    ranges = bytearray()
+    start = 0
+    for count in counts:
+        ranges.extend(_CATEGORY_RANGE.pack(start, count))
+        start += count
+    
+    pool_offset = _HEADER.size + len(ranges) + len(records)
+    with open(output_path, "wb") as handle:
+        handle.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(rows), pool_offset))
+        handle.write(ranges)
+        handle.write(records)
+        handle.write(pool)
+    return len(rows)
+
+class _CategoryView(Sequence):
+    """Read-only list of one category's records, decoded on access"""
+    
+    def __init__(self, compendium: "MappedCompendium", start: int, count: int):
+        self._compendium = compendium
+        self._start = start
+        self._count = count
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("category record index out of range")
+        return self._compendium[self._start + index]
+
+class _MappedDatabase(dict):
+    """activities_database of a compendium; carries the compendium so search indexes can use its columns"""
+    
+    def __init__(self, groups: Dict[ActivityCategory, Sequence], columns: "MappedCompendium"):
+        super().__init__(groups)
+        self.columns = columns
+        # Indexes use the columns only while the groups are the mapped ones
+        self.signature = database_signature(self)
+
+class MappedCompendium:
+    """Memory-mapped compiled compendium
+    
+    Opening reads only the header and category table; records are decoded
+    into METActivity objects when accessed, and only a bounded number of
+    decoded records is kept. It also serves as the column view the search and
+    MET range indexes are built from: MET values and name, description and
+    variation strings are read per record index, so those indexes decode only
+    the records a query returns.
+    """
+    resident = False
+    
+    def __init__(self, path: str, decoded_cache_size: int = 256):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._count, self._pool_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} compiled compendium")
+        self._records_offset = _HEADER.size + _CATEGORY_RANGE.size * len(_CATEGORIES)
+        self._decode = lru_cache(maxsize=decoded_cache_size)(self._decode_record)
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def __getitem__(self, index: int) -> METActivity:
+        if not 0 <= index < self._count:
+            raise IndexError("compendium record index out of range")
+        return self._decode(index)
+    
+    def __iter__(self) -> Iterator[METActivity]:
+        return (self[index] for index in range(self._count))
+    
+    def met_value(self, index: int) -> float:
+        """MET value of one record without decoding its strings"""
+        return struct.unpack_from("<d", self._map, self._records_offset + index * _RECORD.size)[0]
+    
+    def record(self, index: int) -> METActivity:
+        return self[index]
+    
+    def variations(self, index: int) -> Dict[str, float]:
+        """Variation MET values of one record, without decoding its other strings"""
+        fields = self._fields(index)
+        return self._variations(self._string(fields[14], fields[15]))
+    
+    def texts(self, index: int) -> tuple:
+        """(name, description, variation names) of one record, lowercased"""
+        fields = self._fields(index)
+        return (self._string(fields[4], fields[5]).lower(), self._string(fields[8], fields[9]).lower(),
+                tuple(name.lower() for name in self._variations(self._string(fields[14], fields[15]))))
+    
+    def activities_database(self) -> Dict[ActivityCategory, Sequence]:
+        """Lazy equivalent of METEducationSystem.activities_database"""
+        groups = {}
+        for position, category in enumerate(_CATEGORIES):
+            start, count = _CATEGORY_RANGE.unpack_from(
+                self._map, _HEADER.size + position * _CATEGORY_RANGE.size)
+            if count:
+                groups[category] = _CategoryView(self, start, count)
+        return _MappedDatabase(groups, self)
+    
+    def close(self):
+        self._map.close()
+        self._file.close()
+    
+    def __enter__(self) -> "MappedCompendium":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _string(self, offset: int, length: int) -> str:
+        start = self._pool_offset + offset
+        return self._map[start:start + length].decode("utf-8")
+    
+    def _fields(self, index: int) -> tuple:
+        return _RECORD.unpack_from(self._map, self._records_offset + index * _RECORD.size)
+    
+    @staticmethod
+    def _variations(encoded: str) -> Dict[str, float]:
+        variation_values = {}
+        for pair in filter(None, encoded.split(_LIST_SEPARATOR)):
+            variation_name, variation_met = pair.split(_PAIR_SEPARATOR)
+            variation_values[variation_name] = float(variation_met)
+        return variation_values
+    
+    def _decode_record(self, index: int) -> METActivity:
+        fields = self._fields(index)
+        met_value, category = fields[0], fields[1]
+        _, name, intensity, description, benefits, considerations, variations = (
+            self._string(fields[i], fields[i + 1]) for i in range(2, 16, 2))
+        
+        return METActivity(
+            name, _CATEGORIES[category], met_value, intensity, description,
+            benefits.split(_LIST_SEPARATOR) if benefits else [],
+            considerations.split(_LIST_SEPARATOR) if considerations else [],
+            self._variations(variations)
+        )
+
+def load_met_education_system(compendium_path: str) -> METEducationSystem:
+    """METEducationSystem whose activities_database is backed by a compiled compendium
+    
+    Keyword search and MET range queries index the memory-mapped columns and
+    decode only their results. columnar_catalog and find_activity_combinations
+    still read every record once to build their tables.
+    """
+    system = METEducationSystem()
+    system.compendium = MappedCompendium(compendium_path)
+    system.activities_database = system.compendium.activities_database()
+    return system
+
+def export_catalog_source(system: METEducationSystem, json_path: str):
+    """Write a system's catalog as a JSON compendium source"""
+    rows = [
+        {
+            "code": f"{activity.category.value}-{position:03d}",
+            "name": activity.name,
+            "category": activity.category.value,
+            "met_value": activity.met_value,
+            "intensity": activity.intensity,
+            "description": activity.description,
+            "benefits": activity.benefits,
+            "considerations": activity.considerations,
+            "variations": activity.variations
+        }
+        for activities in system.activities_database.values()
+        for position, activity in enumerate(activities)
+    ]
+    with open(json_path, "w", encoding="utf-8") as handle:
+        json.dump(rows, handle, ensure_ascii=False, indent=2)
+
+def main():
+    """Compile a source file (python compendium_loader.py SOURCE OUTPUT) or demo the built-in catalog"""
+    if len(sys.argv) == 3:
+        count = compile_compendium(sys.argv[1], sys.argv[2])
+        print(f"Compiled {count} activities into {sys.argv[2]}")
+        return
+    
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "compendium.json")
+        binary_path = os.path.join(directory, "compendium.bin")
+        export_catalog_source(METEducationSystem(), source_path)
+        count = compile_compendium(source_path, binary_path)
+        print(f"Compiled {count} activities ({os.path.getsize(binary_path)} bytes)")
+        
+        system = load_met_education_system(binary_path)
+        for activity in system.get_activities_by_met_range(7.0, 9.0):
+            print(f"  {activity.name}: {activity.met_value} METs ({activity.category.value})")
+        system.compendium.close()
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,17 @@ Reference: PMC7719906
 """
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from enum import Enum
 
+from instrumentation import instrumented, record_lookup, stage
+from met_catalog import ColumnarMETCatalog, database_signature
+from met_registry import get_registry
+from numpy_support import encode_labels, require_numpy
+from prescription_rules import PrescriptionRule, RuleTable, default_rule_table, profile_tag
+from shared_tables import shared_instance, shared_table, table_copy
+from static_content import StaticContentRef, default_registry
+
 class AgeGroup(Enum):
     CHILDREN_ADOLESCENTS = "5-17 years"
     ADULTS = "18-64 years"
@@ -44,14 +52,32 @@ class ExercisePrescription:
     progression: str  # How to advance
     met_guidelines: Dict[str, str]  # MET-based intensity guidelines
 
+# Inclusive upper age bound of each AgeGroup, in AgeGroup declaration order
+AGE_GROUP_UPPER_BOUNDS = (17, 64)
+
 class ExercisePrescriptionSystem:
     
+    # Built on first use and shared by every instance; assign to override per instance
+    prescriptions = shared_table("_initialize_prescriptions")
+    met_database = shared_table("_initialize_met_database")
+    prescription_rules = shared_table("_initialize_prescription_rules")
+    
     def __init__(self):
-        self.prescriptions = self._initialize_prescriptions()
-        self.met_database = self._initialize_met_database()
+        self._static_refs: Dict[tuple, StaticContentRef] = {}
+        self._columnar_met_catalog = None
+        self._columnar_signature = None
+    
+    @classmethod
+    def shared(cls) -> "ExercisePrescriptionSystem":
+        """Process-wide instance whose tables and caches are built once"""
+        return shared_instance(cls)
+    
+    def _initialize_prescription_rules(self) -> RuleTable:
+        """Modification and safety rules, compiled once per process"""
+        return default_rule_table()
     
     def _initialize_met_database(self) -> Dict[ActivityIntensity, List[METActivityData]]:
-        """Initialize MET database for different activity intensities
+        """Initialize MET database for different activity intensities from the shared registry
         
         MET Definition:
         - 1 MET = Energy expenditure at rest (約3.5 ml O2/kg/min)
@@ -59,46 +85,24 @@ class ExercisePrescriptionSystem:
         - Moderate intensity: 3.0-5.9 METs  
         - Vigorous intensity: ≥6.0 METs
         """
+        view = get_registry().prescription_view
         return {
-            ActivityIntensity.LIGHT: [
-                METActivityData("緩慢走路", 2.0, ActivityIntensity.LIGHT, 
-                              ["漫步", "輕鬆散步", "購物走路"]),
-                METActivityData("輕度家務", 2.5, ActivityIntensity.LIGHT,
-                              ["洗碗", "整理房間", "烹飪"]),
-                METActivityData("伸展運動", 2.3, ActivityIntensity.LIGHT,
-                              ["瑜伽伸展", "太極", "簡單拉筋"]),
-                METActivityData("辦公室工作", 1.8, ActivityIntensity.LIGHT,
-                              ["打字", "閱讀", "會議"])
-            ],
-            ActivityIntensity.MODERATE: [
-                METActivityData("快走", 3.5, ActivityIntensity.MODERATE,
-                              ["健走", "快速步行", "爬樓梯"]),
-                METActivityData("騎自行車(休閒)", 4.0, ActivityIntensity.MODERATE,
-                              ["平地騎車", "休閒單車", "通勤騎車"]),
-                METActivityData("游泳(輕鬆)", 4.5, ActivityIntensity.MODERATE,
-                              ["蛙式慢游", "水中走路", "水中有氧"]),
-                METActivityData("舞蹈", 4.8, ActivityIntensity.MODERATE,
-                              ["社交舞", "有氧舞蹈", "廣場舞"]),
-                METActivityData("網球(雙打)", 5.0, ActivityIntensity.MODERATE,
-                              ["雙打網球", "羽毛球雙打", "桌球"])
-            ],
-            ActivityIntensity.VIGOROUS: [
-                METActivityData("跑步", 8.0, ActivityIntensity.VIGOROUS,
-                              ["慢跑", "中速跑步", "間歇跑"]),
-                METActivityData("騎自行車(快速)", 8.5, ActivityIntensity.VIGOROUS,
-                              ["競速騎車", "山地車", "高強度騎車"]),
-                METActivityData("游泳(快速)", 10.0, ActivityIntensity.VIGOROUS,
-                              ["自由式", "蝶式", "競技游泳"]),
-                METActivityData("籃球", 6.5, ActivityIntensity.VIGOROUS,
-                              ["全場籃球", "激烈對戰", "比賽"]),
-                METActivityData("重量訓練", 6.0, ActivityIntensity.VIGOROUS,
-                              ["高強度重訓", "CrossFit", "功能性訓練"])
+            intensity: [
+                METActivityData(activity.name, activity.met_value, intensity, list(activity.examples))
+                for activity in view[intensity.value]
             ]
+            for intensity in ActivityIntensity
         }
     
     def get_met_activities_by_intensity(self, intensity: ActivityIntensity) -> List[METActivityData]:
-        """根據強度等級獲取MET活動清單"""
-        return self.met_database.get(intensity, [])
+        """根據強度等級獲取MET活動清單（呼叫者專用的複本）"""
+        return table_copy(self._met_activities(intensity))
+    
+    def _met_activities(self, intensity: ActivityIntensity) -> List[METActivityData]:
+        """Shared met_database list for intensity; never handed to callers"""
+        activities = self.met_database.get(intensity)
+        record_lookup("met_database", activities is not None)
+        return activities or []
     
     def calculate_calorie_expenditure(self, body_weight_kg: float, met_value: float, 
                                     duration_minutes: int) -> float:
@@ -109,6 +113,54 @@ class ExercisePrescriptionSystem:
         hours = duration_minutes / 60
         return met_value * body_weight_kg * hours
     
+    def calculate_calorie_expenditure_matrix(self, body_weights_kg, durations_minutes,
+                                             met_values=None, float32: bool = False):
+        """Array-aware calculate_calorie_expenditure over people × activities × durations
+        
+        Returns an array of shape (len(body_weights_kg), len(met_values),
+        len(durations_minutes)). When met_values is omitted, every activity in
+        met_database is used in get_met_activity_names() order. float32=True
+        halves the memory of the result.
+        """
+        np = require_numpy()
+        
+        dtype = np.float32 if float32 else np.float64
+        if met_values is None:
+            met_values = [activity.met_value for activity in self._iter_met_activities()]
+        weights = np.asarray(body_weights_kg, dtype=dtype).reshape(-1, 1, 1)
+        mets = np.asarray(met_values, dtype=dtype).reshape(1, -1, 1)
+        hours = np.asarray(durations_minutes, dtype=dtype).reshape(1, 1, -1) / dtype(60)
+        
+        # Multiply the two small operands first so only one full-size array is allocated
+        result = np.empty((weights.shape[0], mets.shape[1], hours.shape[2]), dtype=dtype)
+        np.multiply(weights, mets * hours, out=result)
+        return result
+    
+    def get_met_activity_names(self) -> List[str]:
+        """Activity names of met_database, in the order used by the calorie matrix"""
+        return [activity.activity for activity in self._iter_met_activities()]
+    
+    @property
+    def columnar_met_catalog(self) -> ColumnarMETCatalog:
+        """NumPy columnar view of met_database (category = the intensity group it is filed under)
+        
+        Rebuilt when met_database or one of its lists is replaced or resized.
+        """
+        signature = database_signature(self.met_database)
+        if self._columnar_met_catalog is None or signature != self._columnar_signature:
+            self._columnar_met_catalog = ColumnarMETCatalog.from_grouped(
+                self.met_database,
+                name=lambda activity: activity.activity,
+                met_value=lambda activity: activity.met_value,
+                intensity=lambda activity: activity.intensity_category
+            )
+            self._columnar_signature = signature
+        return self._columnar_met_catalog
+    
+    def _iter_met_activities(self):
+        for activities in self.met_database.values():
+            yield from activities
+    
     def get_met_guidelines_explanation(self) -> Dict[str, str]:
         """提供MET指導原則的詳細說明"""
         return {
@@ -184,8 +236,8 @@ class ExercisePrescriptionSystem:
         }
     
     def get_prescription(self, age_group: AgeGroup) -> ExercisePrescription:
-        """Get exercise prescription for specific age group"""
-        return self.prescriptions[age_group]
+        """Get exercise prescription for specific age group (a copy the caller may modify)"""
+        return table_copy(self.prescriptions[age_group])
     
     def get_special_population_guidelines(self) -> Dict[str, str]:
         """Special population exercise guidelines"""
@@ -207,92 +259,196 @@ class ExercisePrescriptionSystem:
             )
         }
     
+    @instrumented("exercise_prescription")
     def create_individualized_prescription(self, 
                                         age: int, 
                                         body_weight_kg: float,
                                         health_status: str = "healthy",
-                                        fitness_level: str = "beginner") -> Dict:
-        """Create personalized exercise prescription with MET integration"""
+                                        fitness_level: str = "beginner",
+                                        static_refs: bool = False) -> Dict:
+        """Create personalized exercise prescription with MET integration
+        
+        With static_refs=True, the MET explanation and the base prescription's
+        met_guidelines are returned as shared StaticContentRef objects instead of
+        fresh copies; resolve them with resolve_static_content().
+        """
         
-        if age <= 17:
-            age_group = AgeGroup.CHILDREN_ADOLESCENTS
-        elif age <= 64:
-            age_group = AgeGroup.ADULTS
-        else:
-            age_group = AgeGroup.OLDER_ADULTS
+        with stage("exercise_prescription", "age_classification"):
+            if age <= 17:
+                age_group = AgeGroup.CHILDREN_ADOLESCENTS
+            elif age <= 64:
+                age_group = AgeGroup.ADULTS
+            else:
+                age_group = AgeGroup.OLDER_ADULTS
+            
+            base_prescription = self.prescriptions[age_group]
         
-        base_prescription = self.get_prescription(age_group)
-        met_explanation = self.get_met_guidelines_explanation()
+        with stage("exercise_prescription", "met_explanation"):
+            if static_refs:
+                met_explanation = self._get_static_ref("met_詳細說明")
+            else:
+                met_explanation = self.get_met_guidelines_explanation()
         
         # Get MET activities for appropriate intensity
-        intensity_activities = self.get_met_activities_by_intensity(base_prescription.intensity)
+        with stage("exercise_prescription", "met_lookup"):
+            intensity_activities = self._met_activities(base_prescription.intensity)
         
         # Calculate sample calorie expenditures
-        sample_calories = {}
-        for activity in intensity_activities[:3]:  # Show top 3 activities
-            calories_30min = self.calculate_calorie_expenditure(
-                body_weight_kg, activity.met_value, 30
-            )
-            sample_calories[activity.activity] = {
-                "met_value": activity.met_value,
-                "calories_30min": round(calories_30min, 1),
-                "examples": activity.examples
-            }
+        with stage("exercise_prescription", "calorie_computation"):
+            sample_calories = {}
+            for activity in intensity_activities[:3]:  # Show top 3 activities
+                calories_30min = self.calculate_calorie_expenditure(
+                    body_weight_kg, activity.met_value, 30
+                )
+                sample_calories[activity.activity] = {
+                    "met_value": activity.met_value,
+                    "calories_30min": round(calories_30min, 1),
+                    "examples": list(activity.examples)
+                }
+        
+        with stage("exercise_prescription", "formatting"):
+            formatted_base = self._format_base_prescription(base_prescription)
+            if static_refs:
+                formatted_base["met_guidelines"] = self._get_static_ref(
+                    "met_guidelines", age_group, base_prescription.met_guidelines)
+        
+        with stage("exercise_prescription", "modification_safety_rules"):
+            modifications = self._get_modifications(health_status, fitness_level)
+            safety_considerations = self._get_safety_considerations(age_group, health_status)
         
         prescription = {
             "age_group": age_group.value,
-            "base_prescription": {
-                "frequency": base_prescription.frequency,
-                "intensity": base_prescription.intensity.value,
-                "time": base_prescription.time,
-                "type": [t.value for t in base_prescription.type],
-                "volume": base_prescription.volume,
-                "progression": base_prescription.progression,
-                "met_guidelines": base_prescription.met_guidelines
-            },
+            "base_prescription": formatted_base,
             "met_詳細說明": met_explanation,
             "推薦活動與MET值": sample_calories,
-            "modifications": self._get_modifications(health_status, fitness_level),
-            "safety_considerations": self._get_safety_considerations(age_group, health_status)
+            "modifications": modifications,
+            "safety_considerations": safety_considerations
         }
         
         return prescription
     
-    def _get_modifications(self, health_status: str, fitness_level: str) -> List[str]:
-        """Get prescription modifications based on individual factors"""
-        modifications = []
+    @instrumented("exercise_prescription")
+    def create_individualized_prescriptions_batch(self,
+                                                  ages,
+                                                  body_weights_kg,
+                                                  health_statuses="healthy",
+                                                  fitness_levels="beginner") -> Dict:
+        """Columnar variant of create_individualized_prescription for whole cohorts
+        
+        Accepts lists or NumPy arrays (scalars broadcast). Age groups and sample
+        calories are computed in one vectorized pass; per-person text sections
+        are returned as integer codes into tables that are emitted once.
+        """
+        np = require_numpy()
+        
+        ages, weights = np.broadcast_arrays(np.atleast_1d(ages),
+                                            np.atleast_1d(np.asarray(body_weights_kg, dtype=np.float64)))
+        count = ages.shape[0]
+        health_codes, health_table = encode_labels(health_statuses, count)
+        fitness_codes, fitness_table = encode_labels(fitness_levels, count)
         
-        if fitness_level == "beginner":
-            modifications.append("Start with lower end of time recommendations")
-            modifications.append("Progress gradually over 4-6 weeks")
-            modifications.append("Focus on enjoyable activities to build habit")
+        age_groups = list(AgeGroup)
+        age_codes = np.searchsorted(AGE_GROUP_UPPER_BOUNDS, ages, side="left").astype(np.int8)
         
-        if health_status != "healthy":
-            modifications.append("Consult healthcare provider before starting")
-            modifications.append("Consider supervised exercise initially")
-            modifications.append("Monitor symptoms during activity")
+        # Top-3 activities per age group, padded so every group indexes the same columns
+        recommended = {}
+        met_table = np.zeros((len(age_groups), 3))
+        for code, age_group in enumerate(age_groups):
+            activities = self._met_activities(self.prescriptions[age_group].intensity)[:3]
+            recommended[age_group.value] = [
+                {"activity": a.activity, "met_value": a.met_value, "examples": list(a.examples)}
+                for a in activities
+            ]
+            met_table[code, :len(activities)] = [a.met_value for a in activities]
+        
+        calories_30min = np.round(met_table[age_codes] * weights[:, None] * (30 / 60), 1)
+        
+        # Modifications depend on (fitness level, health status), safety on (age group, health status);
+        # each distinct pair is matched once, health status as free text too
+        statuses = len(health_table)
+        modification_keys, modification_codes = np.unique(
+            fitness_codes.astype(np.int32) * statuses + health_codes, return_inverse=True)
+        modification_codes = modification_codes.astype(np.int32)
+        modification_table = [
+            self._get_modifications(health_table[key % statuses], fitness_table[key // statuses])
+            for key in modification_keys.tolist()
+        ]
+        safety_keys, safety_codes = np.unique(
+            age_codes.astype(np.int32) * statuses + health_codes, return_inverse=True)
+        safety_codes = safety_codes.astype(np.int32)
+        safety_table = [
+            self._get_safety_considerations(age_groups[key // statuses], health_table[key % statuses])
+            for key in safety_keys.tolist()
+        ]
         
-        return modifications
+        return {
+            "count": count,
+            "age_group_labels": [g.value for g in age_groups],
+            "age_group_code": age_codes,
+            "base_prescriptions": {
+                g.value: self._format_base_prescription(self.prescriptions[g])
+                for g in age_groups
+            },
+            "met_詳細說明": self.get_met_guidelines_explanation(),
+            "推薦活動與MET值": recommended,
+            "calories_30min": calories_30min,
+            "modification_code": modification_codes,
+            "modification_table": modification_table,
+            "safety_code": safety_codes,
+            "safety_table": safety_table
+        }
+    
+    def _format_base_prescription(self, base_prescription: ExercisePrescription) -> Dict:
+        """Render an ExercisePrescription as the plain dict used in results"""
+        return {
+            "frequency": base_prescription.frequency,
+            "intensity": base_prescription.intensity.value,
+            "time": base_prescription.time,
+            "type": [t.value for t in base_prescription.type],
+            "volume": base_prescription.volume,
+            "progression": base_prescription.progression,
+            "met_guidelines": dict(base_prescription.met_guidelines)
+        }
+    
+    def resolve_static_content(self, prescription: Dict) -> Dict:
+        """Expand every static content reference in a prescription back to full content"""
+        return default_registry.resolve_all(prescription)
+    
+    def _get_static_ref(self, section: str, age_group: Optional[AgeGroup] = None,
+                        content: Optional[Dict] = None) -> StaticContentRef:
+        """Register a static section once per instance and reuse the shared reference"""
+        key = (section, age_group)
+        ref = self._static_refs.get(key)
+        if ref is None:
+            if content is None:
+                content = self.get_met_guidelines_explanation()
+            ref = self._static_refs[key] = default_registry.register(section, content)
+        return ref
+    
+    def _get_modifications(self, health_status: str, fitness_level: str) -> List[str]:
+        """Get prescription modifications based on individual factors"""
+        return [modification
+                for rule in self._matched_rules(profile_tag("fitness", fitness_level), health_status)
+                for modification in rule.modifications]
     
     def _get_safety_considerations(self, age_group: AgeGroup, health_status: str) -> List[str]:
         """Get safety considerations for prescription"""
-        safety = ["Warm up before and cool down after exercise"]
-        
-        if age_group == AgeGroup.OLDER_ADULTS:
-            safety.extend([
-                "Include fall prevention exercises",
-                "Start slowly and progress gradually",
-                "Consider balance training priority"
-            ])
-        
-        if health_status != "healthy":
-            safety.extend([
-                "Medical clearance recommended",
-                "Monitor for adverse symptoms",
-                "Have emergency plan in place"
-            ])
+        return ["Warm up before and cool down after exercise"] + [
+            consideration
+            for rule in self._matched_rules(profile_tag("age_group", age_group.name.lower()), health_status)
+            for consideration in rule.safety
+        ]
+    
+    def _matched_rules(self, profile_text: str, health_status: str) -> Tuple[PrescriptionRule, ...]:
+        """Profile rules first, then the keyword rules a non-healthy status adds as free text
         
-        return safety
+        Keeps the profile items (older adults, health conditions, ...) ahead of
+        additions such as the knee rule for '膝關節炎'.
+        """
+        if health_status == "healthy":
+            return self.prescription_rules.match(profile_text)
+        profile = self.prescription_rules.match_any([profile_text, profile_tag("health", "conditions")])
+        return profile + tuple(rule for rule in self.prescription_rules.match(health_status) if rule not in profile)
 
 def main():
     """Example usage of exercise prescription system with MET integration"""
@@ -4,10 +4,19 @@ F - Frequency, I - Intensity, T - Time, T - Type, V - Volume, P - Progression
 Based on ACSM guidelines and WHO 2020 recommendations
 """
 
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Union
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, Union
 from enum import Enum
 import json
+import threading
+import time
+
+from instrumentation import instrumented, stage
+from numpy_support import encode_labels, require_numpy
+from prescription_rules import RuleTable, default_rule_table
+from shared_tables import shared_instance, shared_table
 
 class ExerciseType(Enum):
     AEROBIC = "aerobic"
@@ -36,12 +45,146 @@ class FITTVPPrescription:
     modifications: List[str]
     monitoring: List[str]
 
+@dataclass(frozen=True)
+class ImmutableFITTVPPrescription:
+    """Read-only FITTVPPrescription, as returned by the memoized create_prescription"""
+    frequency: str
+    intensity: Union[str, Mapping[str, str]]
+    time: str
+    type: Tuple[str, ...]
+    volume: str
+    progression: str
+    rationale: str
+    modifications: Tuple[str, ...]
+    monitoring: Tuple[str, ...]
+    
+    @classmethod
+    def from_prescription(cls, prescription: FITTVPPrescription) -> "ImmutableFITTVPPrescription":
+        intensity = prescription.intensity
+        return cls(
+            frequency=prescription.frequency,
+            intensity=MappingProxyType(dict(intensity)) if isinstance(intensity, dict) else intensity,
+            time=prescription.time,
+            type=tuple(prescription.type),
+            volume=prescription.volume,
+            progression=prescription.progression,
+            rationale=prescription.rationale,
+            modifications=tuple(prescription.modifications),
+            monitoring=tuple(prescription.monitoring)
+        )
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int  # dropped to stay within max_size
+    expirations: int  # dropped because their TTL had passed
+    size: int
+    max_size: int
+    
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+class PrescriptionCache:
+    """Thread-safe bounded LRU cache with optional TTL and hit/miss/eviction counters"""
+    
+    def __init__(self,
+                 max_size: int = 1024,
+                 ttl_seconds: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+    
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Cached value for key, calling factory() (outside the lock) on a miss"""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or now < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+        
+        value = factory()
+        expires_at = None if self.ttl_seconds is None else now + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+    
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, self.expirations,
+                              len(self._entries), self.max_size)
+    
+    def clear(self):
+        """Drop every entry; counters are kept"""
+        with self._lock:
+            self._entries.clear()
+
+@dataclass(frozen=True)
+class NumericFITTVPPrescription:
+    """FITT-VP prescription as plain numbers; FITTVPFramework.format_prescription derives the string form"""
+    goal: str
+    current_fitness: str
+    days_per_week: int
+    minutes_per_session: int
+    weekly_minutes: int  # days_per_week × minutes_per_session
+    intensity: IntensityLevel
+    hr_percent_min: int  # aerobic intensity, % HRmax
+    hr_percent_max: int
+    one_rm_percent_min: int  # resistance intensity, % 1RM
+    one_rm_percent_max: int
+    types: Tuple[str, ...]
+    modifications: Tuple[str, ...]
+    monitor_heart_rate: bool
+
+# Per fitness level: intensity, max days/week, max minutes/session (None = as available);
+# any other level is treated as advanced
+FITNESS_LEVEL_LIMITS = {
+    "beginner": (IntensityLevel.LIGHT, 3, 30),
+    "intermediate": (IntensityLevel.MODERATE, 5, 45)
+}
+ADVANCED_LIMITS = (IntensityLevel.VIGOROUS, None, None)
+
+BASE_MONITORING = (
+    "Track RPE (Rate of Perceived Exertion) each session",
+    "Monitor weekly volume progression",
+    "Assess recovery between sessions",
+    "Record functional improvements"
+)
+
 class FITTVPFramework:
     
-    def __init__(self):
-        self.intensity_guidelines = self._create_intensity_guidelines()
-        self.exercise_types = self._create_exercise_type_definitions()
-        self.progression_strategies = self._create_progression_strategies()
+    # Built on first use and shared by every instance; assign to override per instance
+    intensity_guidelines = shared_table("_create_intensity_guidelines")
+    exercise_types = shared_table("_create_exercise_type_definitions")
+    progression_strategies = shared_table("_create_progression_strategies")
+    prescription_rules = shared_table("_create_prescription_rules")
+    
+    # Opt-in memoization of create_prescription, see enable_prescription_cache
+    _prescription_cache: Optional[PrescriptionCache] = None
+    
+    @classmethod
+    def shared(cls) -> "FITTVPFramework":
+        """Process-wide instance whose tables and caches are built once"""
+        return shared_instance(cls)
     
     def _create_intensity_guidelines(self) -> Dict:
         """Define intensity guidelines using multiple scales"""
@@ -49,18 +192,21 @@ class FITTVPFramework:
             "aerobic": {
                 IntensityLevel.LIGHT: {
                     "hr_percentage": "40-54% HRmax",
+                    "hr_percentage_range": (40, 54),
                     "rpe_scale": "2-3 (6-20 scale) or 1-2 (0-10 scale)",
                     "talk_test": "Can sing while exercising",
                     "examples": ["Slow walking", "Light household tasks"]
                 },
                 IntensityLevel.MODERATE: {
                     "hr_percentage": "55-69% HRmax",
+                    "hr_percentage_range": (55, 69),
                     "rpe_scale": "4-6 (6-20 scale) or 3-4 (0-10 scale)",
                     "talk_test": "Can talk but not sing",
                     "examples": ["Brisk walking", "Water aerobics", "Ballroom dancing"]
                 },
                 IntensityLevel.VIGOROUS: {
                     "hr_percentage": "70-85% HRmax",
+                    "hr_percentage_range": (70, 85),
                     "rpe_scale": "7-8 (6-20 scale) or 5-6 (0-10 scale)",
                     "talk_test": "Can only speak few words without pausing",
                     "examples": ["Jogging/running", "Swimming laps", "Basketball"]
@@ -69,18 +215,21 @@ class FITTVPFramework:
             "resistance": {
                 IntensityLevel.LIGHT: {
                     "percentage_1rm": "40-50% 1RM",
+                    "percentage_1rm_range": (40, 50),
                     "repetitions": "15-20 reps",
                     "rpe_scale": "2-3 (6-20 scale)",
                     "examples": ["Bodyweight exercises", "Light weights"]
                 },
                 IntensityLevel.MODERATE: {
                     "percentage_1rm": "60-70% 1RM",
+                    "percentage_1rm_range": (60, 70),
                     "repetitions": "8-12 reps",
                     "rpe_scale": "4-6 (6-20 scale)",
                     "examples": ["Moderate weight training", "Resistance bands"]
                 },
                 IntensityLevel.VIGOROUS: {
                     "percentage_1rm": "75-85% 1RM",
+                    "percentage_1rm_range": (75, 85),
                     "repetitions": "6-8 reps",
                     "rpe_scale": "7-8 (6-20 scale)",
                     "examples": ["Heavy weight training", "Power lifting"]
@@ -159,40 +308,67 @@ class FITTVPFramework:
         }
     
     def _create_progression_strategies(self) -> Dict:
-        """Define progression strategies for different goals"""
+        """Define progression strategies for different goals
+        
+        Numeric keys drive the periodization engine: weekly_rate_range is the
+        weekly volume increase as fractions, deload_every_weeks makes every Nth
+        week a deload at deload_volume_factor of the volume, and progress_first
+        says whether sessions ("frequency") or minutes ("time") grow first.
+        """
         return {
             "general_health": {
                 "principle": "Gradual increase in volume before intensity",
                 "progression_rate": "5-10% increase per week",
                 "sequence": ["Frequency → Time → Intensity → Type complexity"],
-                "timeline": "Progress over 4-6 weeks per level"
+                "timeline": "Progress over 4-6 weeks per level",
+                "weekly_rate_range": (0.05, 0.10),
+                "deload_every_weeks": None,
+                "progress_first": "frequency"
             },
             "weight_loss": {
                 "principle": "Emphasize caloric expenditure and sustainability",
                 "progression_rate": "10-15% volume increase per week",
                 "sequence": ["Time → Frequency → Intensity"],
-                "timeline": "Focus on consistency over 12+ weeks"
+                "timeline": "Focus on consistency over 12+ weeks",
+                "weekly_rate_range": (0.10, 0.15),
+                "deload_every_weeks": None,
+                "progress_first": "time"
             },
             "strength_building": {
                 "principle": "Progressive overload with adequate recovery",
                 "progression_rate": "2.5-5% load increase when completing target reps",
                 "sequence": ["Reps → Weight → Sets → Exercise complexity"],
-                "timeline": "2-4 week cycles with deload weeks"
+                "timeline": "2-4 week cycles with deload weeks",
+                "weekly_rate_range": (0.025, 0.05),
+                "deload_every_weeks": 4,
+                "progress_first": "frequency",
+                "deload_volume_factor": 0.6
             },
             "endurance": {
                 "principle": "Build aerobic base before intensity work",
                 "progression_rate": "10% time/distance increase per week",
                 "sequence": ["Time → Frequency → Intensity → Sport-specific"],
-                "timeline": "Base building 8-12 weeks, then intensity phases"
+                "timeline": "Base building 8-12 weeks, then intensity phases",
+                "weekly_rate_range": (0.10, 0.10),
+                "deload_every_weeks": None,
+                "progress_first": "time"
             },
             "rehabilitation": {
                 "principle": "Pain-free range of motion before strengthening",
                 "progression_rate": "Conservative 5% increases",
                 "sequence": ["Range of motion → Strength → Functional movements"],
-                "timeline": "Individual based on healing and response"
+                "timeline": "Individual based on healing and response",
+                "weekly_rate_range": (0.05, 0.05),
+                "deload_every_weeks": None,
+                "progress_first": "frequency"
             }
         }
     
+    def _create_prescription_rules(self) -> RuleTable:
+        """Keyword rules for limitations, compiled once per process"""
+        return default_rule_table()
+    
+    @instrumented("fitt_vp")
     def create_prescription(self,
                           goal: str,
                           current_fitness: str,
@@ -201,38 +377,201 @@ class FITTVPFramework:
                           exercise_preferences: List[str] = None,
                           limitations: List[str] = None) -> FITTVPPrescription:
         """Create comprehensive FITT-VP prescription"""
+        cache = self._prescription_cache
+        if cache is not None:
+            key = self._prescription_cache_key(goal, current_fitness, time_available,
+                                               frequency_available, limitations)
+            cached = cache.get_or_create(key, lambda: ImmutableFITTVPPrescription.from_prescription(
+                self.format_prescription(self.create_numeric_prescription(*key))))
+            # The canonical entry is shared; only the fields echoing this request's wording are rebuilt
+            rationale = self._rationale(goal, current_fitness)
+            modifications = self._limitation_modifications(limitations)
+            if rationale == cached.rationale and modifications == cached.modifications:
+                return cached
+            return replace(cached, rationale=rationale, modifications=modifications)
         
-        # Determine primary exercise types based on goal
-        if goal.lower() in ["weight_loss", "cardiovascular_health"]:
-            primary_types = ["aerobic", "resistance"]
-            aerobic_emphasis = 70
-        elif goal.lower() in ["strength", "muscle_building"]:
-            primary_types = ["resistance", "aerobic"]
-            aerobic_emphasis = 30
-        elif goal.lower() in ["general_health", "maintenance"]:
-            primary_types = ["aerobic", "resistance", "flexibility"]
-            aerobic_emphasis = 50
-        else:
-            primary_types = ["aerobic", "resistance"]
-            aerobic_emphasis = 60
+        numeric = self.create_numeric_prescription(goal, current_fitness, time_available,
+                                                   frequency_available, exercise_preferences, limitations)
+        with stage("fitt_vp", "formatting"):
+            return self.format_prescription(numeric)
+    
+    def enable_prescription_cache(self,
+                                  max_size: int = 1024,
+                                  ttl_seconds: Optional[float] = None) -> PrescriptionCache:
+        """Memoize create_prescription on this instance
         
-        # Adjust based on current fitness level
-        if current_fitness.lower() == "beginner":
-            intensity_level = IntensityLevel.LIGHT
-            frequency = f"{min(frequency_available, 3)} days/week"
-            time = f"{min(time_available, 30)} minutes"
-        elif current_fitness.lower() == "intermediate":
-            intensity_level = IntensityLevel.MODERATE
-            frequency = f"{min(frequency_available, 5)} days/week"
-            time = f"{min(time_available, 45)} minutes"
-        else:  # advanced
-            intensity_level = IntensityLevel.VIGOROUS
-            frequency = f"{frequency_available} days/week"
-            time = f"{time_available} minutes"
+        Requests are keyed canonically: goal and fitness level lowercased,
+        limitations stripped, lowercased, de-duplicated and sorted, and
+        exercise_preferences ignored since they do not affect the result.
+        Results are ImmutableFITTVPPrescription shared between callers; the
+        rationale and modifications, which echo the request's own wording and
+        limitation order, are rebuilt per call, so results equal the uncached ones.
+        """
+        self._prescription_cache = PrescriptionCache(max_size, ttl_seconds)
+        return self._prescription_cache
+    
+    def disable_prescription_cache(self):
+        self._prescription_cache = None
+    
+    def prescription_cache_stats(self) -> Optional[CacheStats]:
+        """Counters of the memoization cache, or None when it is not enabled"""
+        cache = self._prescription_cache
+        return cache.stats() if cache is not None else None
+    
+    @staticmethod
+    def _prescription_cache_key(goal: str,
+                                current_fitness: str,
+                                time_available: int,
+                                frequency_available: int,
+                                limitations: Optional[List[str]]) -> tuple:
+        """(goal, fitness, time, frequency, preferences, limitations) in create_numeric_prescription order"""
+        normalized = tuple(sorted({limitation.strip().lower() for limitation in limitations or ()} - {""}))
+        return (goal.lower(), current_fitness.lower(), time_available, frequency_available, None, normalized)
+    
+    def create_numeric_prescription(self,
+                                    goal: str,
+                                    current_fitness: str,
+                                    time_available: int,  # minutes per session
+                                    frequency_available: int,  # days per week
+                                    exercise_preferences: List[str] = None,
+                                    limitations: List[str] = None) -> NumericFITTVPPrescription:
+        """Create a FITT-VP prescription as numbers, without any string formatting"""
+        with stage("fitt_vp", "intensity_lookup"):
+            intensity_level, max_days, max_minutes = FITNESS_LEVEL_LIMITS.get(
+                current_fitness.lower(), ADVANCED_LIMITS)
+            days = frequency_available if max_days is None else min(frequency_available, max_days)
+            minutes = time_available if max_minutes is None else min(time_available, max_minutes)
+            
+            hr_min, hr_max = self.intensity_guidelines["aerobic"][intensity_level]["hr_percentage_range"]
+            one_rm_min, one_rm_max = self.intensity_guidelines["resistance"][intensity_level]["percentage_1rm_range"]
         
-        # Create intensity prescription
-        aerobic_intensity = self.intensity_guidelines["aerobic"][intensity_level]
-        resistance_intensity = self.intensity_guidelines["resistance"][intensity_level]
+        with stage("fitt_vp", "modification_safety_rules"):
+            modifications = self._limitation_modifications(limitations)
+            monitor_heart_rate = self._needs_heart_rate_monitoring(limitations)
+        
+        return NumericFITTVPPrescription(
+            goal=goal,
+            current_fitness=current_fitness,
+            days_per_week=days,
+            minutes_per_session=minutes,
+            weekly_minutes=days * minutes,
+            intensity=intensity_level,
+            hr_percent_min=hr_min,
+            hr_percent_max=hr_max,
+            one_rm_percent_min=one_rm_min,
+            one_rm_percent_max=one_rm_max,
+            types=self._goal_exercise_types(goal),
+            modifications=modifications,
+            monitor_heart_rate=monitor_heart_rate
+        )
+    
+    @instrumented("fitt_vp")
+    def create_prescription_batch(self,
+                                  goals,
+                                  current_fitness,
+                                  time_available,
+                                  frequency_available,
+                                  limitations: Optional[Sequence[Optional[List[str]]]] = None) -> Dict:
+        """Columnar variant of create_numeric_prescription for many prescriptions at once
+        
+        goals and current_fitness take a sequence or one string; time and
+        frequency take a sequence, NumPy array or one int; limitations is None
+        or one entry per prescription. Numbers come back as NumPy columns and
+        labels as integer codes into tables emitted once.
+        """
+        np = require_numpy()
+        
+        columns = (goals, current_fitness, time_available, frequency_available, limitations)
+        count = max((len(column) for column in columns
+                     if column is not None and not isinstance(column, (str, int))), default=1)
+        
+        goal_codes, goal_table = encode_labels(goals, count)
+        fitness_codes, fitness_table = encode_labels(current_fitness, count)
+        
+        # Per-fitness-level lookups, gathered by code
+        levels = list(IntensityLevel)
+        no_cap = np.iinfo(np.int32).max
+        limits = [FITNESS_LEVEL_LIMITS.get(level.lower(), ADVANCED_LIMITS) for level in fitness_table]
+        intensity_by_fitness = np.array([levels.index(level) for level, _, _ in limits], dtype=np.int8)
+        max_days = np.array([no_cap if cap is None else cap for _, cap, _ in limits], dtype=np.int32)
+        max_minutes = np.array([no_cap if cap is None else cap for _, _, cap in limits], dtype=np.int32)
+        
+        days = np.minimum(np.broadcast_to(np.asarray(frequency_available, dtype=np.int32), (count,)),
+                          max_days[fitness_codes])
+        minutes = np.minimum(np.broadcast_to(np.asarray(time_available, dtype=np.int32), (count,)),
+                             max_minutes[fitness_codes])
+        intensity_codes = intensity_by_fitness[fitness_codes]
+        
+        bounds = np.zeros((len(levels), 4), dtype=np.int16)
+        for level, _, _ in limits:
+            bounds[levels.index(level)] = (
+                self.intensity_guidelines["aerobic"][level]["hr_percentage_range"] +
+                self.intensity_guidelines["resistance"][level]["percentage_1rm_range"])
+        intensity_bounds = bounds[intensity_codes]
+        
+        # Limitations only matter through their (modifications, heart rate) outcome
+        modification_codes = np.zeros(count, dtype=np.int16)
+        modification_table = [()]
+        monitor_heart_rate = np.zeros(count, dtype=bool)
+        if limitations is not None:
+            outcome_codes: Dict[tuple, int] = {}
+            heart_rate_by_code = [False]
+            for row, person_limitations in enumerate(limitations):
+                if not person_limitations:
+                    continue
+                key = tuple(person_limitations)
+                code = outcome_codes.get(key)
+                if code is None:
+                    code = outcome_codes[key] = len(modification_table)
+                    modification_table.append(self._limitation_modifications(key))
+                    heart_rate_by_code.append(self._needs_heart_rate_monitoring(key))
+                modification_codes[row] = code
+            monitor_heart_rate = np.array(heart_rate_by_code)[modification_codes]
+        
+        return {
+            "count": count,
+            "goal_code": goal_codes,
+            "goal_table": goal_table,
+            "type_table": [self._goal_exercise_types(goal) for goal in goal_table],
+            "fitness_code": fitness_codes,
+            "fitness_table": fitness_table,
+            "days_per_week": days,
+            "minutes_per_session": minutes,
+            "weekly_minutes": days * minutes,
+            "intensity_code": intensity_codes,
+            "intensity_table": tuple(levels),
+            "hr_percent_min": intensity_bounds[:, 0],
+            "hr_percent_max": intensity_bounds[:, 1],
+            "one_rm_percent_min": intensity_bounds[:, 2],
+            "one_rm_percent_max": intensity_bounds[:, 3],
+            "modification_code": modification_codes,
+            "modification_table": modification_table,
+            "monitor_heart_rate": monitor_heart_rate
+        }
+    
+    def batch_prescription(self, batch: Dict, index: int) -> NumericFITTVPPrescription:
+        """Row `index` of a create_prescription_batch result as a NumericFITTVPPrescription"""
+        goal_code = int(batch["goal_code"][index])
+        return NumericFITTVPPrescription(
+            goal=batch["goal_table"][goal_code],
+            current_fitness=batch["fitness_table"][int(batch["fitness_code"][index])],
+            days_per_week=int(batch["days_per_week"][index]),
+            minutes_per_session=int(batch["minutes_per_session"][index]),
+            weekly_minutes=int(batch["weekly_minutes"][index]),
+            intensity=batch["intensity_table"][int(batch["intensity_code"][index])],
+            hr_percent_min=int(batch["hr_percent_min"][index]),
+            hr_percent_max=int(batch["hr_percent_max"][index]),
+            one_rm_percent_min=int(batch["one_rm_percent_min"][index]),
+            one_rm_percent_max=int(batch["one_rm_percent_max"][index]),
+            types=batch["type_table"][goal_code],
+            modifications=batch["modification_table"][int(batch["modification_code"][index])],
+            monitor_heart_rate=bool(batch["monitor_heart_rate"][index])
+        )
+    
+    def format_prescription(self, prescription: NumericFITTVPPrescription) -> FITTVPPrescription:
+        """Derive the display (string) form of a numeric prescription"""
+        aerobic_intensity = self.intensity_guidelines["aerobic"][prescription.intensity]
+        resistance_intensity = self.intensity_guidelines["resistance"][prescription.intensity]
         
         intensity_prescription = {
             "aerobic": f"{aerobic_intensity['hr_percentage']} or RPE {aerobic_intensity['rpe_scale']}",
@@ -240,53 +579,63 @@ class FITTVPFramework:
             "talk_test": aerobic_intensity['talk_test']
         }
         
-        # Calculate volume
-        sessions_per_week = int(frequency.split()[0])
-        minutes_per_session = int(time.split()[0])
-        total_weekly_volume = sessions_per_week * minutes_per_session
-        
         # Get progression strategy
-        progression_strategy = self.progression_strategies.get(goal.lower(), 
+        progression_strategy = self.progression_strategies.get(prescription.goal.lower(), 
                                                              self.progression_strategies["general_health"])
         
-        # Create modifications based on limitations
-        modifications = []
-        if limitations:
-            for limitation in limitations:
-                if "knee" in limitation.lower():
-                    modifications.append("Use low-impact aerobic activities")
-                if "back" in limitation.lower():
-                    modifications.append("Avoid overhead movements initially")
-                if "time" in limitation.lower():
-                    modifications.append("Consider high-intensity interval training")
-        
-        # Monitoring recommendations
-        monitoring = [
-            "Track RPE (Rate of Perceived Exertion) each session",
-            "Monitor weekly volume progression",
-            "Assess recovery between sessions",
-            "Record functional improvements"
-        ]
-        
-        if "heart" in str(limitations).lower():
+        monitoring = list(BASE_MONITORING)
+        if prescription.monitor_heart_rate:
             monitoring.append("Monitor heart rate during exercise")
         
         return FITTVPPrescription(
-            frequency=frequency,
+            frequency=f"{prescription.days_per_week} days/week",
             intensity=intensity_prescription,
-            time=time,
-            type=primary_types,
-            volume=f"{total_weekly_volume} minutes/week",
+            time=f"{prescription.minutes_per_session} minutes",
+            type=list(prescription.types),
+            volume=f"{prescription.weekly_minutes} minutes/week",
             progression=f"{progression_strategy['principle']} - {progression_strategy['progression_rate']}",
-            rationale=f"Designed for {goal} considering {current_fitness} fitness level",
-            modifications=modifications,
+            rationale=self._rationale(prescription.goal, prescription.current_fitness),
+            modifications=list(prescription.modifications),
             monitoring=monitoring
         )
     
+    @staticmethod
+    def _rationale(goal: str, current_fitness: str) -> str:
+        return f"Designed for {goal} considering {current_fitness} fitness level"
+    
+    def _goal_exercise_types(self, goal: str) -> Tuple[str, ...]:
+        """Determine primary exercise types based on goal"""
+        if goal.lower() in ["weight_loss", "cardiovascular_health"]:
+            return ("aerobic", "resistance")
+        elif goal.lower() in ["strength", "muscle_building"]:
+            return ("resistance", "aerobic")
+        elif goal.lower() in ["general_health", "maintenance"]:
+            return ("aerobic", "resistance", "flexibility")
+        else:
+            return ("aerobic", "resistance")
+    
+    def _limitation_modifications(self, limitations: Optional[Sequence[str]]) -> Tuple[str, ...]:
+        """Create modifications based on limitations (keyword rules, English or Chinese)"""
+        matched = self.prescription_rules.match_each(limitations or ())
+        return tuple(modification for rule in matched for modification in rule.modifications)
+    
+    def _needs_heart_rate_monitoring(self, limitations: Optional[Sequence[str]]) -> bool:
+        return any(rule.monitor_heart_rate for rule in self.prescription_rules.match_each(limitations or ()))
+    
+    @instrumented("fitt_vp")
     def create_periodized_plan(self, 
-                              base_prescription: FITTVPPrescription,
+                              base_prescription: Union[FITTVPPrescription, NumericFITTVPPrescription],
                               duration_weeks: int = 12) -> Dict:
-        """Create periodized training plan"""
+        """Create periodized training plan
+        
+        A NumericFITTVPPrescription also gets "weekly_targets" from the
+        periodization engine, and is returned in its string form as base_prescription.
+        """
+        weekly_targets = None
+        if isinstance(base_prescription, NumericFITTVPPrescription):
+            from periodization import PeriodizationEngine  # imports this module
+            weekly_targets = PeriodizationEngine(self).plan_cohort([base_prescription], duration_weeks).row(0)
+            base_prescription = self.format_prescription(base_prescription)
         
         phases = {
             "Phase 1 (Weeks 1-4): Foundation": {
@@ -313,7 +662,7 @@ class FITTVPFramework:
                 "key_goals": ["Maintenance", "New challenges", "Lifestyle integration"]
             }
         
-        return {
+        plan = {
             "base_prescription": base_prescription,
             "total_duration": f"{duration_weeks} weeks",
             "phases": phases,
@@ -325,6 +674,9 @@ class FITTVPFramework:
                 "Goal-specific outcomes"
             ]
         }
+        if weekly_targets is not None:
+            plan["weekly_targets"] = weekly_targets
+        return plan
 
 def main():
     """Demonstrate FITT-VP framework usage"""
@@ -383,6 +735,35 @@ def main():
             print(f"  {phase}:")
             print(f"    Focus: {details['focus']}")
             print(f"    Goals: {', '.join(details['key_goals'])}")
+    
+    # Numeric batch path: no string formatting until a row is displayed
+    batch = framework.create_prescription_batch(
+        [example["goal"] for example in examples],
+        [example["current_fitness"] for example in examples],
+        [example["time_available"] for example in examples],
+        [example["frequency_available"] for example in examples],
+        [example["limitations"] for example in examples]
+    )
+    print(f"\nBATCH weekly minutes: {batch['weekly_minutes'].tolist()}")
+    print(f"Row 1 derived volume: {framework.format_prescription(framework.batch_prescription(batch, 1)).volume}")
+    
+    # Memoized path for repetitive traffic
+    # Cached results must equal uncached ones, including casing and limitation order
+    requests = examples + [
+        dict(examples[0], goal="Weight_Loss", limitations=["high blood pressure", "Knee pain", "knee pain"]),
+        dict(examples[0], exercise_preferences=["cycling"], limitations=[" KNEE PAIN", "high blood pressure"])
+    ]
+    uncached = [framework.create_prescription(**request) for request in requests]
+    framework.enable_prescription_cache(max_size=256, ttl_seconds=600)
+    for _ in range(2):
+        for example, expected in zip(requests, uncached):
+            assert framework.create_prescription(**example) == ImmutableFITTVPPrescription.from_prescription(expected)
+    for _ in range(100):
+        for example in examples:
+            framework.create_prescription(**example)
+    stats = framework.prescription_cache_stats()
+    print(f"Cache: {stats.hits} hits, {stats.misses} misses, {stats.evictions} evictions "
+          f"(hit rate {stats.hit_rate:.0%})")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
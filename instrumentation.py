@@ -0,0 +1,251 @@
+"""
+Engine Instrumentation
+Optional metrics for the engines' hot paths: call counters and timings for the
+main builders, per-stage timers and catalog lookup hit counts, reported to a
+pluggable sink. The default sink is disabled, so instrumented code pays one
+attribute check per call; PrometheusExporter renders an InMemorySink in the
+Prometheus text format to a file or an HTTP endpoint
+"""
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Upper bounds (seconds) of the timing histogram buckets
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class MetricsSink:
+    """Receives metrics from instrumented code; subclasses override increment and observe"""
+    enabled = True
+    
+    def increment(self, name: str, labels: Labels = (), value: float = 1):
+        """Add value to a counter"""
+    
+    def observe(self, name: str, seconds: float, labels: Labels = ()):
+        """Record one timing"""
+
+class NullSink(MetricsSink):
+    """Default sink: instrumentation checks enabled and skips all work"""
+    enabled = False
+
+class InMemorySink(MetricsSink):
+    """Thread-safe counters and timing histograms, aggregated in this process"""
+    
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [count, sum, per-bucket counts (last one is +Inf)]
+        self.timers: Dict[Tuple[str, Labels], list] = {}
+    
+    def increment(self, name: str, labels: Labels = (), value: float = 1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+    
+    def observe(self, name: str, seconds: float, labels: Labels = ()):
+        key = (name, labels)
+        bucket = bisect_left(self.buckets, seconds)
+        with self._lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                timer = self.timers[key] = [0, 0.0, [0] * (len(self.buckets) + 1)]
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2][bucket] += 1
+    
+    def snapshot(self) -> Tuple[Dict, Dict]:
+        """Consistent copies of (counters, timers)"""
+        with self._lock:
+            return dict(self.counters), {key: [t[0], t[1], list(t[2])] for key, t in self.timers.items()}
+    
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.timers.clear()
+
+_sink: MetricsSink = NullSink()
+
+def get_sink() -> MetricsSink:
+    return _sink
+
+def set_sink(sink: Optional[MetricsSink]) -> MetricsSink:
+    """Install sink for the whole process (None restores the disabled default); returns the previous one"""
+    global _sink
+    previous, _sink = _sink, sink or NullSink()
+    return previous
+
+def enable_metrics(buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> InMemorySink:
+    """Install and return a fresh InMemorySink"""
+    sink = InMemorySink(buckets)
+    set_sink(sink)
+    return sink
+
+class _StageTimer:
+    __slots__ = ("sink", "labels", "started")
+    
+    def __init__(self, sink: MetricsSink, labels: Labels):
+        self.sink = sink
+        self.labels = labels
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.sink.observe("stage_seconds", time.perf_counter() - self.started, self.labels)
+        return False
+
+class _NullStage:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+def stage(engine: str, name: str):
+    """Context manager timing one stage of a builder, e.g. with stage("fitt_vp", "modification_rules"):"""
+    sink = _sink
+    if not sink.enabled:
+        return _NULL_STAGE
+    return _StageTimer(sink, (("engine", engine), ("stage", name)))
+
+def record_lookup(catalog: str, hit: bool):
+    """Count one catalog lookup as a hit or a miss"""
+    sink = _sink
+    if sink.enabled:
+        sink.increment("catalog_lookups_total", (("catalog", catalog), ("result", "hit" if hit else "miss")))
+
+def instrumented(engine: str) -> Callable:
+    """Decorator counting and timing calls of an engine method"""
+    def decorate(method: Callable) -> Callable:
+        labels = (("engine", engine), ("method", method.__name__))
+        
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            sink = _sink
+            if not sink.enabled:
+                return method(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                sink.increment("calls_total", labels)
+                sink.observe("call_seconds", time.perf_counter() - started, labels)
+        return wrapper
+    return decorate
+
+_HELP = {
+    "calls_total": "Calls of instrumented engine methods",
+    "call_seconds": "Duration of instrumented engine method calls",
+    "stage_seconds": "Duration of builder stages",
+    "catalog_lookups_total": "Catalog lookups by result"
+}
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class PrometheusExporter:
+    """Renders an InMemorySink in the Prometheus text exposition format"""
+    
+    def __init__(self, sink: InMemorySink, namespace: str = "exercise_prescription"):
+        self.sink = sink
+        self.namespace = namespace
+    
+    def render(self) -> str:
+        counters, timers = self.sink.snapshot()
+        lines = []
+        
+        for metric in sorted({name for name, _ in counters}):
+            full_name = f"{self.namespace}_{metric}"
+            lines.append(f"# HELP {full_name} {_HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {full_name} counter")
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+        
+        bounds = [repr(bound) for bound in self.sink.buckets] + ["+Inf"]
+        for metric in sorted({name for name, _ in timers}):
+            full_name = f"{self.namespace}_{metric}"
+            lines.append(f"# HELP {full_name} {_HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {full_name} histogram")
+            for (name, labels), (count, total, buckets) in sorted(timers.items()):
+                if name != metric:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(bounds, buckets):
+                    cumulative += bucket_count
+                    lines.append(f"{full_name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {total!r}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {count}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def write(self, path: str):
+        """Write the metrics to path atomically (e.g. for the node exporter's textfile collector)"""
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(self.render())
+        os.replace(temporary, path)
+    
+    def serve(self, host: str = "127.0.0.1", port: int = 9464) -> ThreadingHTTPServer:
+        """Serve GET /metrics from a daemon thread; call shutdown() on the returned server to stop"""
+        exporter = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+        return server
+
+def main():
+    """Instrument a few engine calls and print the Prometheus text output"""
+    from exercise_prescription_framework import ExercisePrescriptionSystem
+    from fitt_vp_framework import FITTVPFramework
+    from met_introduction import METEducationSystem
+    # The engines import this module by name, not as __main__
+    from instrumentation import PrometheusExporter, enable_metrics
+    
+    sink = enable_metrics()
+    for age in (12, 35, 70):
+        ExercisePrescriptionSystem.shared().create_individualized_prescription(age, 60.0)
+    FITTVPFramework.shared().create_prescription("weight_loss", "beginner", 45, 4, None, ["knee pain"])
+    METEducationSystem.shared().calculate_weekly_met_minutes([
+        {"activity": "跑步", "duration_minutes": 30, "frequency_per_week": 3},
+        {"activity": "不存在的活動", "duration_minutes": 30, "frequency_per_week": 3}
+    ])
+    print(PrometheusExporter(sink).render(), end="")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Columnar MET Catalog
+Array-backed view of the MET activity catalogs: MET values as a float array,
+category and intensity as small-integer codes, names as an interned string table
+"""
+
+import sys
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from numpy_support import require_numpy
+
+def database_signature(database: Dict[Any, Sequence]) -> tuple:
+    """Cheap structural fingerprint of a {group: [activities]} catalog
+    
+    Changes when the dict or any group list is replaced, or a group is
+    resized; costs O(number of groups), not O(number of activities).
+    """
+    return (id(database),) + tuple(
+        (group, id(activities), len(activities))
+        for group, activities in database.items()
+    )
+
+def _encode(values: List[Any]) -> Tuple[Any, tuple]:
+    """Map values to codes into a table of distinct values (first-seen order)
+    
+    The code dtype is the smallest unsigned type holding every code (uint8 up
+    to 256 distinct values), so large compendium catalogs never overflow it.
+    """
+    np = require_numpy()
+    table: Dict[Any, int] = {}
+    codes = [table.setdefault(value, len(table)) for value in values]
+    return np.array(codes, dtype=np.min_scalar_type(max(len(table) - 1, 0))), tuple(table)
+
+class ColumnarMETCatalog:
+    """NumPy-backed columnar view of a MET activity catalog
+    
+    Queries return boolean masks that combine with & and |; select() turns a
+    mask back into the original activity objects in catalog order.
+    """
+    
+    def __init__(self,
+                 records: Sequence[Any],
+                 names: Sequence[str],
+                 met_values: Sequence[float],
+                 categories: Sequence[Any],
+                 intensities: Sequence[Any]):
+        np = require_numpy()
+        
+        self.records = list(records)
+        count = len(self.records)
+        
+        name_table: Dict[str, int] = {}
+        self.name_ids = np.fromiter(
+            (name_table.setdefault(sys.intern(name), len(name_table)) for name in names),
+            dtype=np.int32, count=count)
+        self.name_table: Tuple[str, ...] = tuple(name_table)
+        
+        self.met_values = np.asarray(met_values, dtype=np.float32)
+        self.category_codes, self.category_labels = _encode(list(categories))
+        self.intensity_codes, self.intensity_labels = _encode(list(intensities))
+    
+    @classmethod
+    def from_grouped(cls,
+                     database: Dict[Any, Sequence[Any]],
+                     name: Callable[[Any], str],
+                     met_value: Callable[[Any], float],
+                     intensity: Callable[[Any], Any]) -> "ColumnarMETCatalog":
+        """Build from a {category: [activities]} catalog such as activities_database or met_database"""
+        categories = [group for group, activities in database.items() for _ in activities]
+        records = [activity for activities in database.values() for activity in activities]
+        return cls(records,
+                   [name(record) for record in records],
+                   [met_value(record) for record in records],
+                   categories,
+                   [intensity(record) for record in records])
+    
+    def __len__(self) -> int:
+        return len(self.records)
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the numeric columns"""
+        return (self.met_values.nbytes + self.category_codes.nbytes +
+                self.intensity_codes.nbytes + self.name_ids.nbytes)
+    
+    def names(self) -> List[str]:
+        return [self.name_table[name_id] for name_id in self.name_ids]
+    
+    def mask_met_range(self, min_met: float, max_met: float):
+        """min_met <= MET <= max_met (bounds compared at the column's float32 precision)"""
+        np = require_numpy()
+        return ((self.met_values >= np.float32(min_met)) &
+                (self.met_values <= np.float32(max_met)))
+    
+    def mask_category(self, *categories: Any):
+        return self._mask_labels(self.category_codes, self.category_labels, categories)
+    
+    def mask_intensity(self, *intensities: Any):
+        return self._mask_labels(self.intensity_codes, self.intensity_labels, intensities)
+    
+    def select(self, mask) -> List[Any]:
+        """Activity objects where mask is True, in catalog order"""
+        return [self.records[i] for i in require_numpy().flatnonzero(mask)]
+    
+    @staticmethod
+    def _mask_labels(codes, labels: tuple, wanted: Iterable[Any]):
+        wanted_codes = [labels.index(label) for label in wanted if label in labels]
+        return require_numpy().isin(codes, wanted_codes)
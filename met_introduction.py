@@ -3,11 +3,22 @@ MET (代謝當量) 完整介紹與活動資料庫
 Metabolic Equivalent of Task - Comprehensive Introduction and Activity Database
 """
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 from enum import Enum
+from bisect import bisect_left, bisect_right
 import json
 
+from activity_combinations import ActivityCombinationSolver, ActivityPlan
+from instrumentation import instrumented, record_lookup
+from met_catalog import ColumnarMETCatalog, database_signature
+from met_registry import get_registry
+from shared_tables import shared_instance, shared_table, table_copy
+
+# Preference sets whose combination tables find_activity_combinations keeps (least recently used dropped)
+COMBINATION_SOLVER_CACHE_SIZE = 64
+
 class ActivityCategory(Enum):
     HOUSEHOLD = "household"  # 家務活動
     TRANSPORTATION = "transportation"  # 交通相關
@@ -28,12 +39,167 @@ class METActivity:
     considerations: List[str]  # 注意事項
     variations: Dict[str, float]  # 變化形式及其MET值
 
+@dataclass(frozen=True)
+class METRangeHit:
+    """MET範圍查詢結果 - 活動本身或其某個變化形式"""
+    activity: METActivity  # 所屬活動
+    variation: Optional[str]  # 變化形式名稱，None 表示活動本身
+    met_value: float  # 此項目的MET值
+
+class _ActivityColumns:
+    """Per-position view of an in-memory activity list, the form the indexes are built from
+    
+    A compiled compendium (compendium_loader.MappedCompendium) offers the same
+    methods over its memory map, so its indexes never hold every record decoded.
+    """
+    resident = True  # records are already objects; indexes may keep references to them
+    
+    def __init__(self, activities: List[METActivity]):
+        self.activities = activities
+        self._texts = [(activity.name.lower(), activity.description.lower(),
+                        tuple(v.lower() for v in activity.variations))
+                       for activity in activities]
+    
+    def __len__(self) -> int:
+        return len(self.activities)
+    
+    def record(self, position: int) -> METActivity:
+        return self.activities[position]
+    
+    def met_value(self, position: int) -> float:
+        return self.activities[position].met_value
+    
+    def variations(self, position: int) -> Dict[str, float]:
+        return self.activities[position].variations
+    
+    def texts(self, position: int) -> tuple:
+        """(name, description, variation names), lowercased"""
+        return self._texts[position]
+
+class _METRangeIndex:
+    """Sorted MET values for bisect range queries over activities and their variations
+    
+    Over resident columns the hit objects are prebuilt; otherwise only positions
+    are kept and the records in range are fetched per query.
+    """
+    
+    def __init__(self, columns):
+        self._columns = columns
+        count = len(columns)
+        # sorted() is stable, so equal MET values keep catalog order like the old scan
+        met_values = [columns.met_value(position) for position in range(count)]
+        self._parent_positions = sorted(range(count), key=met_values.__getitem__)
+        self._parent_mets = [met_values[position] for position in self._parent_positions]
+        
+        hits = [(met_values[position], position, None) for position in range(count)]
+        hits.extend((met_value, position, name)
+                    for position in range(count)
+                    for name, met_value in columns.variations(position).items())
+        hits.sort(key=lambda hit: hit[0])
+        self._hit_mets = [hit[0] for hit in hits]
+        self._hit_refs = [(position, name) for _, position, name in hits]
+        
+        self._parents = self._parent_hits = self._hits = None
+        if columns.resident:
+            self._parents = [columns.record(position) for position in self._parent_positions]
+            self._parent_hits = self._to_hits([(position, None) for position in self._parent_positions],
+                                              self._parent_mets)
+            self._hits = self._to_hits(self._hit_refs, self._hit_mets)
+    
+    def _to_hits(self, refs: List[tuple], met_values: List[float]) -> List[METRangeHit]:
+        record = self._columns.record
+        return [METRangeHit(record(position), name, met_value)
+                for (position, name), met_value in zip(refs, met_values)]
+    
+    def activities_in_range(self, min_met: float, max_met: float) -> List[METActivity]:
+        low = bisect_left(self._parent_mets, min_met)
+        high = bisect_right(self._parent_mets, max_met)
+        if self._parents is not None:
+            return self._parents[low:high]
+        return [self._columns.record(position) for position in self._parent_positions[low:high]]
+    
+    def hits_in_range(self, min_met: float, max_met: float,
+                      include_variations: bool = True) -> List[METRangeHit]:
+        if not include_variations:
+            low = bisect_left(self._parent_mets, min_met)
+            high = bisect_right(self._parent_mets, max_met)
+            if self._parent_hits is not None:
+                return self._parent_hits[low:high]
+            return self._to_hits([(position, None) for position in self._parent_positions[low:high]],
+                                 self._parent_mets[low:high])
+        low = bisect_left(self._hit_mets, min_met)
+        high = bisect_right(self._hit_mets, max_met)
+        if self._hits is not None:
+            return self._hits[low:high]
+        return self._to_hits(self._hit_refs[low:high], self._hit_mets[low:high])
+
+def _character_grams(text: str) -> set:
+    """Unigrams and bigrams of text (CJK and Latin characters alike)"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+class _ActivityTextIndex:
+    """Inverted character n-gram index over activity names, descriptions and variations
+    
+    Postings only narrow the candidates; every candidate is verified with the
+    same substring test as a full scan, so results are identical to it.
+    """
+    
+    def __init__(self, columns):
+        self._columns = columns
+        self._postings: Dict[str, set] = {}
+        self._variation_postings: Dict[str, set] = {}
+        
+        for position in range(len(columns)):
+            name, description, variation_names = columns.texts(position)
+            for gram in _character_grams(name) | _character_grams(description):
+                self._postings.setdefault(gram, set()).add(position)
+            for variation_name in variation_names:
+                for gram in _character_grams(variation_name):
+                    self._variation_postings.setdefault(gram, set()).add(position)
+    
+    def search(self, keyword: str, include_variations: bool = False) -> List[METActivity]:
+        keyword_lower = keyword.lower()
+        columns = self._columns
+        if not keyword_lower:
+            return [columns.record(position) for position in range(len(columns))]
+        
+        candidates = self._candidates(self._postings, keyword_lower)
+        if include_variations:
+            candidates |= self._candidates(self._variation_postings, keyword_lower)
+        
+        matching_activities = []
+        for position in sorted(candidates):
+            name, description, variation_names = columns.texts(position)
+            if (keyword_lower in name or keyword_lower in description or
+                    (include_variations and any(keyword_lower in v for v in variation_names))):
+                matching_activities.append(columns.record(position))
+        return matching_activities
+    
+    @staticmethod
+    def _candidates(postings: Dict[str, set], keyword_lower: str) -> set:
+        if len(keyword_lower) == 1:
+            return set(postings.get(keyword_lower, ()))
+        grams = {keyword_lower[i:i + 2] for i in range(len(keyword_lower) - 1)}
+        sets = sorted((postings.get(gram, set()) for gram in grams), key=len)
+        return set(sets[0]).intersection(*sets[1:])
+
 class METEducationSystem:
     """MET教育系統 - 提供完整的MET知識與活動資料"""
     
+    # Built on first use and shared by every instance; assign to override per instance
+    activities_database = shared_table("_initialize_comprehensive_database")
+    met_education = shared_table("_initialize_met_education")
+    
     def __init__(self):
-        self.activities_database = self._initialize_comprehensive_database()
-        self.met_education = self._initialize_met_education()
+        self._indexes = None
+        self._indexed_signature = None
+    
+    @classmethod
+    def shared(cls) -> "METEducationSystem":
+        """Process-wide instance whose tables and caches are built once"""
+        return shared_instance(cls)
     
     def _initialize_met_education(self) -> Dict:
         """初始化MET教育內容"""
@@ -97,183 +263,122 @@ class METEducationSystem:
         }
     
     def _initialize_comprehensive_database(self) -> Dict[ActivityCategory, List[METActivity]]:
-        """建立全面的MET活動資料庫"""
+        """建立全面的MET活動資料庫（資料來自共用的 met_registry）"""
         return {
-            ActivityCategory.HOUSEHOLD: [
-                METActivity(
-                    "輕度家務", ActivityCategory.HOUSEHOLD, 2.5, "輕度",
-                    "一般室內清潔和整理工作",
-                    ["增加日常活動量", "改善功能性體能", "減少久坐時間"],
-                    ["注意正確姿勢", "避免過度彎腰", "適時休息"],
-                    {"洗碗": 2.3, "摺衣服": 2.0, "整理床鋪": 2.8, "輕度烹飪": 2.5}
-                ),
-                METActivity(
-                    "中度家務", ActivityCategory.HOUSEHOLD, 3.5, "中度",
-                    "需要較多體力的家務工作",
-                    ["全身肌力訓練", "心肺功能改善", "實用性體能"],
-                    ["使用適當工具", "分段進行", "保護腰部"],
-                    {"吸塵": 3.3, "拖地": 3.5, "搬運物品": 4.0, "園藝工作": 4.0}
-                ),
-                METActivity(
-                    "重度家務", ActivityCategory.HOUSEHOLD, 5.0, "中高度",
-                    "需要大量體力的家務活動",
-                    ["肌力大幅提升", "心肺耐力訓練", "功能性動作"],
-                    ["充分熱身", "正確搬運技巧", "避免過度負荷"],
-                    {"搬家": 6.0, "粉刷房屋": 4.5, "修繕工作": 5.5, "重型清潔": 4.8}
-                )
-            ],
-            
-            ActivityCategory.TRANSPORTATION: [
-                METActivity(
-                    "步行", ActivityCategory.TRANSPORTATION, 3.0, "輕中度",
-                    "以步行作為交通方式",
-                    ["改善心血管健康", "增強下肢肌力", "環保便利"],
-                    ["選擇安全路線", "穿著合適鞋子", "注意交通安全"],
-                    {"慢走(2.5km/h)": 2.3, "一般步行(4km/h)": 3.0, "快走(5.5km/h)": 4.3, "競走": 6.5}
-                ),
-                METActivity(
-                    "騎自行車", ActivityCategory.TRANSPORTATION, 6.0, "中高度",
-                    "騎自行車通勤或休閒",
-                    ["心肺耐力提升", "下肢肌力強化", "關節友善運動"],
-                    ["配戴安全帽", "檢查車況", "遵守交通規則"],
-                    {"休閒騎車": 4.0, "通勤騎車": 6.0, "山地騎車": 8.5, "競速騎車": 12.0}
-                ),
-                METActivity(
-                    "爬樓梯", ActivityCategory.TRANSPORTATION, 8.0, "高強度",
-                    "使用樓梯代替電梯",
-                    ["下肢爆發力", "心肺功能強化", "日常可行性高"],
-                    ["扶住扶手", "控制速度", "注意膝關節"],
-                    {"慢速爬樓": 4.0, "一般速度": 8.0, "快速爬樓": 15.0}
-                )
-            ],
-            
-            ActivityCategory.SPORTS: [
-                METActivity(
-                    "籃球", ActivityCategory.SPORTS, 8.0, "高強度",
-                    "全場籃球比賽或練習",
-                    ["全身協調性", "心肺耐力", "團隊合作", "反應速度"],
-                    ["充分熱身", "保護關節", "適當休息", "注意碰撞"],
-                    {"投籃練習": 4.5, "半場籃球": 6.0, "全場比賽": 8.0, "激烈對抗": 10.0}
-                ),
-                METActivity(
-                    "游泳", ActivityCategory.SPORTS, 8.0, "中高強度",
-                    "各種泳式的游泳活動",
-                    ["全身肌力", "心肺功能", "關節友善", "身體柔軟度"],
-                    ["注意水溫", "循序漸進", "學習正確技巧", "安全第一"],
-                    {"漂浮踢水": 2.5, "慢速蛙式": 4.5, "自由式": 8.0, "蝶式": 13.5}
-                ),
-                METActivity(
-                    "跑步", ActivityCategory.SPORTS, 9.0, "高強度",
-                    "各種速度的跑步運動",
-                    ["心肺耐力", "下肢肌力", "骨密度", "精神健康"],
-                    ["適當鞋具", "漸進增量", "注意路面", "預防運動傷害"],
-                    {"慢跑(6km/h)": 6.0, "中速跑(8km/h)": 8.3, "快跑(10km/h)": 9.8, "衝刺": 15.0}
-                ),
-                METActivity(
-                    "網球", ActivityCategory.SPORTS, 7.0, "中高強度",
-                    "網球比賽和練習",
-                    ["手眼協調", "反應時間", "心肺功能", "全身肌力"],
-                    ["正確握拍", "場地安全", "適當裝備", "預防網球肘"],
-                    {"雙打": 5.0, "單打": 7.0, "競技比賽": 8.0}
-                )
-            ],
-            
-            ActivityCategory.RECREATION: [
-                METActivity(
-                    "舞蹈", ActivityCategory.RECREATION, 4.8, "中度",
-                    "各種形式的舞蹈活動",
-                    ["心肺功能", "協調性", "柔軟度", "情緒健康"],
-                    ["適當服裝", "安全場地", "循序漸進", "注意平衡"],
-                    {"社交舞": 3.0, "有氧舞蹈": 6.0, "芭蕾": 5.0, "街舞": 7.0}
-                ),
-                METActivity(
-                    "太極拳", ActivityCategory.RECREATION, 3.0, "輕中度",
-                    "傳統中國武術養生運動",
-                    ["平衡能力", "柔軟度", "精神放鬆", "關節活動度"],
-                    ["學習正確動作", "專注呼吸", "穩定場地", "避免強迫動作"],
-                    {"24式太極": 3.0, "42式太極": 3.5, "太極劍": 4.0}
-                ),
-                METActivity(
-                    "瑜珈", ActivityCategory.RECREATION, 2.5, "輕度",
-                    "身心靈平衡的伸展運動",
-                    ["柔軟度", "核心肌力", "壓力舒緩", "身體覺察"],
-                    ["適當墊子", "不強迫動作", "配合呼吸", "避免比較"],
-                    {"哈達瑜珈": 2.5, "流動瑜珈": 3.5, "熱瑜珈": 5.0, "力量瑜珈": 4.0}
-                )
-            ],
-            
-            ActivityCategory.CONDITIONING: [
-                METActivity(
-                    "重量訓練", ActivityCategory.CONDITIONING, 6.0, "中高強度",
-                    "使用器械或自重的肌力訓練",
-                    ["肌肉量增加", "骨密度提升", "代謝率改善", "功能性體能"],
-                    ["正確技巧", "適當重量", "充分休息", "漸進負荷"],
-                    {"輕重量": 3.0, "中重量": 6.0, "大重量": 8.0, "CrossFit": 12.0}
-                ),
-                METActivity(
-                    "有氧運動", ActivityCategory.CONDITIONING, 7.0, "中高強度",
-                    "持續性的心肺訓練",
-                    ["心肺耐力", "脂肪燃燒", "血液循環", "耐力提升"],
-                    ["適當強度", "充分水分", "監測心率", "循序漸進"],
-                    {"低強度": 3.5, "中強度": 7.0, "高強度": 11.0, "間歇訓練": 12.5}
-                ),
-                METActivity(
-                    "伸展運動", ActivityCategory.CONDITIONING, 2.3, "輕度",
-                    "靜態和動態伸展活動",
-                    ["柔軟度改善", "肌肉放鬆", "關節活動度", "運動恢復"],
-                    ["溫和進行", "避免彈震", "持續呼吸", "不過度伸展"],
-                    {"靜態伸展": 2.3, "動態伸展": 3.8, "PNF伸展": 4.0}
-                )
-            ],
-            
-            ActivityCategory.OCCUPATIONAL: [
-                METActivity(
-                    "辦公室工作", ActivityCategory.OCCUPATIONAL, 1.8, "極輕度",
-                    "坐姿辦公和電腦工作",
-                    ["維持基本代謝", "精神工作"],
-                    ["定時起身", "正確坐姿", "眼部休息", "活動筋骨"],
-                    {"打字": 1.8, "會議": 1.8, "站立辦公": 2.3}
-                ),
+            ActivityCategory(category): [
                 METActivity(
-                    "體力勞動", ActivityCategory.OCCUPATIONAL, 5.5, "中高度",
-                    "需要體力的職業工作",
-                    ["職業體能", "實用肌力", "心肺耐力"],
-                    ["職業安全", "適當工具", "正確動作", "定期休息"],
-                    {"建築工作": 5.5, "搬運工作": 7.0, "農業工作": 4.5, "清潔工作": 3.5}
+                    activity.name, ActivityCategory(category), activity.met_value,
+                    activity.intensity_label, activity.description,
+                    list(activity.benefits), list(activity.considerations), dict(activity.variations)
                 )
+                for activity in activities
             ]
+            for category, activities in get_registry().education_view.items()
         }
     
     def get_met_introduction(self) -> Dict:
         """獲取MET完整介紹"""
-        return self.met_education
+        return table_copy(self.met_education)
     
     def get_activities_by_category(self, category: ActivityCategory) -> List[METActivity]:
-        """依類別獲取活動列表"""
-        return self.activities_database.get(category, [])
+        """依類別獲取活動列表（呼叫者專用的複本）"""
+        return table_copy(list(self.activities_database.get(category, [])))
     
+    @instrumented("met_education")
     def get_activities_by_met_range(self, min_met: float, max_met: float) -> List[METActivity]:
         """依MET範圍搜尋活動"""
-        matching_activities = []
-        for category_activities in self.activities_database.values():
-            for activity in category_activities:
-                if min_met <= activity.met_value <= max_met:
-                    matching_activities.append(activity)
-        return sorted(matching_activities, key=lambda x: x.met_value)
-    
-    def search_activities(self, keyword: str) -> List[METActivity]:
-        """關鍵字搜尋活動"""
-        matching_activities = []
-        keyword_lower = keyword.lower()
+        activities = self._get_indexes()["met_range"].activities_in_range(min_met, max_met)
+        record_lookup("met_range", bool(activities))
+        return activities
+    
+    def get_met_range_hits(self, min_met: float, max_met: float,
+                           include_variations: bool = True) -> List[METRangeHit]:
+        """依MET範圍搜尋活動與變化形式（如 慢速爬樓 4.0、衝刺 15.0），依MET值排序"""
+        return self._get_indexes()["met_range"].hits_in_range(min_met, max_met, include_variations)
+    
+    @instrumented("met_education")
+    def search_activities(self, keyword: str, include_variations: bool = False) -> List[METActivity]:
+        """關鍵字搜尋活動
         
-        for category_activities in self.activities_database.values():
-            for activity in category_activities:
-                if (keyword_lower in activity.name.lower() or 
-                    keyword_lower in activity.description.lower()):
-                    matching_activities.append(activity)
+        比對活動名稱與描述（不分大小寫）；include_variations=True 時一併比對變化形式名稱
+        """
+        activities = self._get_indexes()["text"].search(keyword, include_variations)
+        record_lookup("activity_search", bool(activities))
+        return activities
+    
+    def invalidate_indexes(self):
+        """Force the search indexes to rebuild on next use
         
-        return matching_activities
+        Replacing activities_database or adding/removing activities is detected
+        automatically; call this after editing fields of an existing activity.
+        """
+        self._indexes = None
     
+    @property
+    def columnar_catalog(self) -> ColumnarMETCatalog:
+        """NumPy columnar view of activities_database for mask-based range/category/intensity queries"""
+        indexes = self._get_indexes()
+        if "columnar" not in indexes:
+            indexes["columnar"] = ColumnarMETCatalog.from_grouped(
+                self.activities_database,
+                name=lambda activity: activity.name,
+                met_value=lambda activity: activity.met_value,
+                intensity=lambda activity: activity.intensity
+            )
+        return indexes["columnar"]
+    
+    @instrumented("met_education")
+    def find_activity_combinations(self,
+                                   target_met_minutes: float,
+                                   weekly_time_budget: int = 300,
+                                   intensity_mix: Optional[Dict[str, float]] = None,
+                                   preferences: Optional[List[str]] = None,
+                                   top_k: int = 3) -> List[ActivityPlan]:
+        """搜尋達到目標MET-分鐘的活動組合（含變化形式），總時間最少者優先
+        
+        intensity_mix: 各強度（light/moderate/vigorous）需提供的目標比例，None 表示不限；
+        preferences: 偏好的活動或變化形式名稱，優先由其組成。
+        全資料庫的 DP 表只建立一次；各偏好集合只另建偏好子集的表，
+        最近使用的 COMBINATION_SOLVER_CACHE_SIZE 組保留在快取中。資料庫變更時自動重建。
+        """
+        indexes = self._get_indexes()
+        if "combinations" not in indexes:
+            indexes["combinations"] = ActivityCombinationSolver(
+                [activity
+                 for category_activities in self.activities_database.values()
+                 for activity in category_activities])
+            indexes["preferred_combinations"] = OrderedDict()
+        
+        solver = indexes["combinations"]
+        key = tuple(sorted({p.strip().lower() for p in preferences or ()} - {""}))
+        if key:
+            solvers = indexes["preferred_combinations"]
+            if key in solvers:
+                solvers.move_to_end(key)
+                solver = solvers[key]
+            else:
+                solver = solvers[key] = solver.with_preferences(key)
+                if len(solvers) > COMBINATION_SOLVER_CACHE_SIZE:
+                    solvers.popitem(last=False)
+        return solver.solve(target_met_minutes, weekly_time_budget, intensity_mix, top_k)
+    
+    def _get_indexes(self) -> Dict:
+        signature = database_signature(self.activities_database)
+        if self._indexes is None or signature != self._indexed_signature:
+            # A compiled compendium indexes straight from its memory map while unmodified
+            columns = getattr(self.activities_database, "columns", None)
+            if columns is None or getattr(self.activities_database, "signature", None) != signature:
+                columns = _ActivityColumns([activity
+                                            for category_activities in self.activities_database.values()
+                                            for activity in category_activities])
+            self._indexes = {
+                "text": _ActivityTextIndex(columns),
+                "met_range": _METRangeIndex(columns)
+            }
+            self._indexed_signature = signature
+        return self._indexes
+    
+    @instrumented("met_education")
     def calculate_weekly_met_minutes(self, activities: List[Dict]) -> Dict:
         """計算每週MET-分鐘
         activities格式: [{"activity": "快走", "duration_minutes": 30, "frequency_per_week": 5}]
@@ -303,37 +408,46 @@ class METEducationSystem:
             "breakdown": breakdown
         }
     
-    def get_activity_recommendations(self, target_met_minutes: int = 500) -> Dict:
-        """根據目標MET-分鐘提供活動建議"""
+    @instrumented("met_education")
+    def get_activity_recommendations(self,
+                                     target_met_minutes: int = 500,
+                                     weekly_time_budget: int = 300,
+                                     preferences: Optional[List[str]] = None) -> Dict:
+        """根據目標MET-分鐘提供活動建議（由活動資料庫搜尋最省時的組合）"""
         recommendations = {
             "target": f"{target_met_minutes} MET-分鐘/週",
             "strategies": []
         }
         
-        # 策略1: 中度活動為主
-        moderate_met = 4.0  # 平均中度活動MET值
-        minutes_needed = target_met_minutes / moderate_met
-        recommendations["strategies"].append({
-            "strategy": "中度活動為主",
-            "description": f"每週進行{minutes_needed:.0f}分鐘中度活動(如快走、騎車)",
-            "example": f"每天快走{minutes_needed/7:.0f}分鐘，或每週5天各{minutes_needed/5:.0f}分鐘"
-        })
-        
-        # 策略2: 高強度活動
-        vigorous_met = 8.0  # 平均高強度活動MET值
-        minutes_needed = target_met_minutes / vigorous_met
-        recommendations["strategies"].append({
-            "strategy": "高強度活動",
-            "description": f"每週進行{minutes_needed:.0f}分鐘高強度活動(如跑步、游泳)",
-            "example": f"每週3次，每次{minutes_needed/3:.0f}分鐘高強度運動"
-        })
-        
-        # 策略3: 混合活動
-        recommendations["strategies"].append({
-            "strategy": "混合活動",
-            "description": "結合中度和高強度活動",
-            "example": "每週3次中度活動(30分鐘) + 2次高強度活動(20分鐘)"
-        })
+        strategies = [
+            ("中度活動為主", "中度活動", {"moderate": 1.0}),
+            ("高強度活動", "高強度活動", {"vigorous": 1.0}),
+            ("混合活動", "中度與高強度活動各半", {"moderate": 0.5, "vigorous": 0.5})
+        ]
+        for name, label, mix in strategies:
+            plans = self.find_activity_combinations(
+                target_met_minutes, weekly_time_budget, mix, preferences, top_k=1)
+            if not plans:
+                recommendations["strategies"].append({
+                    "strategy": name,
+                    "description": f"每週{weekly_time_budget}分鐘內無法以{label}達到目標",
+                    "example": "請增加每週可用時間或調整強度組合",
+                    "activities": []
+                })
+                continue
+            
+            plan = plans[0]
+            recommendations["strategies"].append({
+                "strategy": name,
+                "description": f"每週進行{plan.total_minutes}分鐘{label}，共{plan.met_minutes:.0f} MET-分鐘",
+                "example": " + ".join(f"{item.label} {item.minutes}分鐘 ({item.met_value} METs)"
+                                      for item in plan.items),
+                "activities": [
+                    {"activity": item.activity, "variation": item.variation,
+                     "met_value": item.met_value, "minutes": item.minutes}
+                    for item in plan.items
+                ]
+            })
         
         return recommendations
 
@@ -0,0 +1,227 @@
+"""
+Unified MET Activity Registry
+Single source of MET activity data with stable activity IDs, shared by the
+Python engines and emitted as a minified JSON asset for the web front end
+"""
+
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from shared_tables import shared_instance
+
+REGISTRY_VERSION = 1
+
+def intensity_band(met_value: float) -> str:
+    """Intensity band (METs): light < 3.0 <= moderate < 6.0 <= vigorous"""
+    if met_value < 3.0:
+        return "light"
+    if met_value < 6.0:
+        return "moderate"
+    return "vigorous"
+
+@dataclass(frozen=True)
+class RegisteredActivity:
+    """One activity in the registry"""
+    id: str  # Stable activity ID
+    name: str  # 活動名稱
+    met_value: float  # MET值
+    examples: Tuple[str, ...] = ()  # 具體例子（處方與網頁顯示）
+    category: Optional[str] = None  # ActivityCategory value (教育資料庫)
+    intensity_label: str = ""  # 強度等級描述
+    description: str = ""  # 活動描述
+    benefits: Tuple[str, ...] = ()  # 健康效益
+    considerations: Tuple[str, ...] = ()  # 注意事項
+    variations: Dict[str, float] = field(default_factory=dict)  # 變化形式及其MET值
+    
+    @property
+    def band(self) -> str:
+        return intensity_band(self.met_value)
+
+def _initialize_activities() -> List[RegisteredActivity]:
+    A = RegisteredActivity
+    return [
+        # Light
+        A("slow_walking", "緩慢走路", 2.0, ("漫步", "輕鬆散步", "購物走路")),
+        A("light_housework", "輕度家務", 2.5, ("洗碗", "整理房間", "烹飪"),
+          "household", "輕度", "一般室內清潔和整理工作",
+          ("增加日常活動量", "改善功能性體能", "減少久坐時間"),
+          ("注意正確姿勢", "避免過度彎腰", "適時休息"),
+          {"洗碗": 2.3, "摺衣服": 2.0, "整理床鋪": 2.8, "輕度烹飪": 2.5}),
+        A("stretching", "伸展運動", 2.3, ("瑜伽伸展", "太極", "簡單拉筋"),
+          "conditioning", "輕度", "靜態和動態伸展活動",
+          ("柔軟度改善", "肌肉放鬆", "關節活動度", "運動恢復"),
+          ("溫和進行", "避免彈震", "持續呼吸", "不過度伸展"),
+          {"靜態伸展": 2.3, "動態伸展": 3.8, "PNF伸展": 4.0}),
+        A("office_work", "辦公室工作", 1.8, ("打字", "閱讀", "會議"),
+          "occupational", "極輕度", "坐姿辦公和電腦工作",
+          ("維持基本代謝", "精神工作"),
+          ("定時起身", "正確坐姿", "眼部休息", "活動筋骨"),
+          {"打字": 1.8, "會議": 1.8, "站立辦公": 2.3}),
+        A("yoga", "瑜珈", 2.5, (),
+          "recreation", "輕度", "身心靈平衡的伸展運動",
+          ("柔軟度", "核心肌力", "壓力舒緩", "身體覺察"),
+          ("適當墊子", "不強迫動作", "配合呼吸", "避免比較"),
+          {"哈達瑜珈": 2.5, "流動瑜珈": 3.5, "熱瑜珈": 5.0, "力量瑜珈": 4.0}),
+        
+        # Moderate
+        A("brisk_walking", "快走", 3.5, ("健走", "快速步行", "爬樓梯")),
+        A("leisure_cycling", "騎自行車(休閒)", 4.0, ("平地騎車", "休閒單車", "通勤騎車")),
+        A("easy_swimming", "游泳(輕鬆)", 4.5, ("蛙式慢游", "水中走路", "水中有氧")),
+        A("dancing", "舞蹈", 4.8, ("社交舞", "有氧舞蹈", "廣場舞"),
+          "recreation", "中度", "各種形式的舞蹈活動",
+          ("心肺功能", "協調性", "柔軟度", "情緒健康"),
+          ("適當服裝", "安全場地", "循序漸進", "注意平衡"),
+          {"社交舞": 3.0, "有氧舞蹈": 6.0, "芭蕾": 5.0, "街舞": 7.0}),
+        A("doubles_tennis", "網球(雙打)", 5.0, ("雙打網球", "羽毛球雙打", "桌球")),
+        A("moderate_housework", "中度家務", 3.5, (),
+          "household", "中度", "需要較多體力的家務工作",
+          ("全身肌力訓練", "心肺功能改善", "實用性體能"),
+          ("使用適當工具", "分段進行", "保護腰部"),
+          {"吸塵": 3.3, "拖地": 3.5, "搬運物品": 4.0, "園藝工作": 4.0}),
+        A("heavy_housework", "重度家務", 5.0, (),
+          "household", "中高度", "需要大量體力的家務活動",
+          ("肌力大幅提升", "心肺耐力訓練", "功能性動作"),
+          ("充分熱身", "正確搬運技巧", "避免過度負荷"),
+          {"搬家": 6.0, "粉刷房屋": 4.5, "修繕工作": 5.5, "重型清潔": 4.8}),
+        A("walking", "步行", 3.0, (),
+          "transportation", "輕中度", "以步行作為交通方式",
+          ("改善心血管健康", "增強下肢肌力", "環保便利"),
+          ("選擇安全路線", "穿著合適鞋子", "注意交通安全"),
+          {"慢走(2.5km/h)": 2.3, "一般步行(4km/h)": 3.0, "快走(5.5km/h)": 4.3, "競走": 6.5}),
+        A("tai_chi", "太極拳", 3.0, (),
+          "recreation", "輕中度", "傳統中國武術養生運動",
+          ("平衡能力", "柔軟度", "精神放鬆", "關節活動度"),
+          ("學習正確動作", "專注呼吸", "穩定場地", "避免強迫動作"),
+          {"24式太極": 3.0, "42式太極": 3.5, "太極劍": 4.0}),
+        A("manual_labor", "體力勞動", 5.5, (),
+          "occupational", "中高度", "需要體力的職業工作",
+          ("職業體能", "實用肌力", "心肺耐力"),
+          ("職業安全", "適當工具", "正確動作", "定期休息"),
+          {"建築工作": 5.5, "搬運工作": 7.0, "農業工作": 4.5, "清潔工作": 3.5}),
+        
+        # Vigorous
+        A("running", "跑步", 8.0, ("慢跑", "中速跑步", "間歇跑"),
+          "sports", "高強度", "各種速度的跑步運動",
+          ("心肺耐力", "下肢肌力", "骨密度", "精神健康"),
+          ("適當鞋具", "漸進增量", "注意路面", "預防運動傷害"),
+          {"慢跑(6km/h)": 6.0, "中速跑(8km/h)": 8.3, "快跑(10km/h)": 9.8, "衝刺": 15.0}),
+        A("fast_cycling", "騎自行車(快速)", 8.5, ("競速騎車", "山地車", "高強度騎車")),
+        A("fast_swimming", "游泳(快速)", 10.0, ("自由式", "蝶式", "競技游泳")),
+        A("basketball", "籃球", 6.5, ("全場籃球", "激烈對戰", "比賽"),
+          "sports", "高強度", "全場籃球比賽或練習",
+          ("全身協調性", "心肺耐力", "團隊合作", "反應速度"),
+          ("充分熱身", "保護關節", "適當休息", "注意碰撞"),
+          {"投籃練習": 4.5, "半場籃球": 6.0, "全場比賽": 8.0, "激烈對抗": 10.0}),
+        A("weight_training", "重量訓練", 6.0, ("高強度重訓", "CrossFit", "功能性訓練"),
+          "conditioning", "中高強度", "使用器械或自重的肌力訓練",
+          ("肌肉量增加", "骨密度提升", "代謝率改善", "功能性體能"),
+          ("正確技巧", "適當重量", "充分休息", "漸進負荷"),
+          {"輕重量": 3.0, "中重量": 6.0, "大重量": 8.0, "CrossFit": 12.0}),
+        A("cycling", "騎自行車", 6.0, (),
+          "transportation", "中高度", "騎自行車通勤或休閒",
+          ("心肺耐力提升", "下肢肌力強化", "關節友善運動"),
+          ("配戴安全帽", "檢查車況", "遵守交通規則"),
+          {"休閒騎車": 4.0, "通勤騎車": 6.0, "山地騎車": 8.5, "競速騎車": 12.0}),
+        A("stair_climbing", "爬樓梯", 8.0, (),
+          "transportation", "高強度", "使用樓梯代替電梯",
+          ("下肢爆發力", "心肺功能強化", "日常可行性高"),
+          ("扶住扶手", "控制速度", "注意膝關節"),
+          {"慢速爬樓": 4.0, "一般速度": 8.0, "快速爬樓": 15.0}),
+        A("swimming", "游泳", 8.0, (),
+          "sports", "中高強度", "各種泳式的游泳活動",
+          ("全身肌力", "心肺功能", "關節友善", "身體柔軟度"),
+          ("注意水溫", "循序漸進", "學習正確技巧", "安全第一"),
+          {"漂浮踢水": 2.5, "慢速蛙式": 4.5, "自由式": 8.0, "蝶式": 13.5}),
+        A("tennis", "網球", 7.0, (),
+          "sports", "中高強度", "網球比賽和練習",
+          ("手眼協調", "反應時間", "心肺功能", "全身肌力"),
+          ("正確握拍", "場地安全", "適當裝備", "預防網球肘"),
+          {"雙打": 5.0, "單打": 7.0, "競技比賽": 8.0}),
+        A("aerobic_exercise", "有氧運動", 7.0, (),
+          "conditioning", "中高強度", "持續性的心肺訓練",
+          ("心肺耐力", "脂肪燃燒", "血液循環", "耐力提升"),
+          ("適當強度", "充分水分", "監測心率", "循序漸進"),
+          {"低強度": 3.5, "中強度": 7.0, "高強度": 11.0, "間歇訓練": 12.5})
+    ]
+
+# Which activities each catalog shows, in display order
+PRESCRIPTION_VIEW = {
+    "light": ("slow_walking", "light_housework", "stretching", "office_work"),
+    "moderate": ("brisk_walking", "leisure_cycling", "easy_swimming", "dancing", "doubles_tennis"),
+    "vigorous": ("running", "fast_cycling", "fast_swimming", "basketball", "weight_training")
+}
+
+EDUCATION_VIEW = {
+    "household": ("light_housework", "moderate_housework", "heavy_housework"),
+    "transportation": ("walking", "cycling", "stair_climbing"),
+    "sports": ("basketball", "swimming", "running", "tennis"),
+    "recreation": ("dancing", "tai_chi", "yoga"),
+    "conditioning": ("weight_training", "aerobic_exercise", "stretching"),
+    "occupational": ("office_work", "manual_labor")
+}
+
+class METRegistry:
+    """All registered activities plus the lookup indexes every engine shares"""
+    
+    def __init__(self):
+        self.activities = _initialize_activities()
+        self.by_id: Dict[str, RegisteredActivity] = {}
+        self.by_name: Dict[str, RegisteredActivity] = {}
+        for activity in self.activities:
+            if activity.id in self.by_id or activity.name in self.by_name:
+                raise ValueError(f"Duplicate registry entry: {activity.id} / {activity.name}")
+            self.by_id[activity.id] = activity
+            self.by_name[activity.name] = activity
+        
+        self.prescription_view = self._resolve_view(PRESCRIPTION_VIEW)
+        self.education_view = self._resolve_view(EDUCATION_VIEW)
+    
+    @classmethod
+    def shared(cls) -> "METRegistry":
+        """Process-wide registry"""
+        return shared_instance(cls)
+    
+    def get(self, activity_id: str) -> RegisteredActivity:
+        return self.by_id[activity_id]
+    
+    def find_by_name(self, name: str) -> Optional[RegisteredActivity]:
+        return self.by_name.get(name)
+    
+    def to_web_asset(self) -> Dict:
+        """MET_ACTIVITIES structure used by script.js, keyed by intensity band"""
+        return {
+            band: [
+                {"id": activity.id, "name": activity.name, "met": activity.met_value,
+                 "examples": list(activity.examples)}
+                for activity in activities
+            ]
+            for band, activities in self.prescription_view.items()
+        }
+    
+    def write_web_asset(self, path: str):
+        """Write the minified JSON asset that script.js loads"""
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_web_asset(), handle, ensure_ascii=False, separators=(",", ":"))
+            handle.write("\n")
+    
+    def _resolve_view(self, view: Dict[str, Tuple[str, ...]]) -> Dict[str, List[RegisteredActivity]]:
+        return {group: [self.by_id[activity_id] for activity_id in ids] for group, ids in view.items()}
+
+def get_registry() -> METRegistry:
+    return METRegistry.shared()
+
+WEB_ASSET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "met_activities.json")
+
+def main():
+    """Regenerate the web asset (python met_registry.py [OUTPUT])"""
+    output = sys.argv[1] if len(sys.argv) > 1 else WEB_ASSET_PATH
+    registry = get_registry()
+    registry.write_web_asset(output)
+    print(f"Wrote {len(registry.activities)} registry activities "
+          f"({sum(len(v) for v in registry.prescription_view.values())} in web asset) to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Optional NumPy Support
+NumPy is imported on first use, so importing the engines stays fast and works
+without it; only the array and batch APIs require it
+"""
+
+_numpy = None
+
+def require_numpy():
+    """Return the numpy module, importing it on first call"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("NumPy is required for the array and batch APIs") from None
+        _numpy = numpy
+    return _numpy
+
+def encode_labels(values, count: int):
+    """(int16 codes, tuple of distinct labels) for a label column; a plain string broadcasts"""
+    np = require_numpy()
+    if isinstance(values, str):
+        return np.zeros(count, dtype=np.int16), (values,)
+    if isinstance(values, np.ndarray):
+        table, codes = np.unique(values, return_inverse=True)
+        return codes.astype(np.int16), tuple(str(value) for value in table)
+    table = {}
+    codes = np.fromiter((table.setdefault(value, len(table)) for value in values),
+                        dtype=np.int16, count=count)
+    return codes, tuple(table)
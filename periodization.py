@@ -0,0 +1,232 @@
+"""
+Periodization Engine
+Week-by-week numeric targets (sessions, minutes per session, intensity band and
+MET-minutes) derived from numeric FITT-VP prescriptions and the
+progression_strategies rates, for a whole cohort at once or lazily week by week
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from fitt_vp_framework import FITTVPFramework, IntensityLevel, NumericFITTVPPrescription
+from met_registry import get_registry
+from numpy_support import require_numpy
+
+_LEVELS = tuple(IntensityLevel)
+# Progression raises intensity at most to this band
+_TOP_CODE = _LEVELS.index(IntensityLevel.VIGOROUS)
+
+@dataclass
+class CohortPlan:
+    """Per-week targets for a cohort; every array is shaped (people, weeks)"""
+    sessions: Any  # int16 sessions per week
+    minutes: Any  # int16 minutes per session
+    intensity_code: Any  # int8 index into intensity_table
+    met_minutes: Any  # float32 MET-minutes per week
+    deload: Any  # bool, True in deload weeks
+    intensity_table: Tuple[IntensityLevel, ...] = _LEVELS
+    
+    @property
+    def people(self) -> int:
+        return self.sessions.shape[0]
+    
+    @property
+    def weeks(self) -> int:
+        return self.sessions.shape[1]
+    
+    def row(self, person: int) -> Dict[str, List]:
+        """One person's plan as plain lists, week 1 first"""
+        return {
+            "sessions": self.sessions[person].tolist(),
+            "minutes": self.minutes[person].tolist(),
+            "intensity": [self.intensity_table[code].value for code in self.intensity_code[person]],
+            "met_minutes": [round(value, 1) for value in self.met_minutes[person].tolist()],
+            "deload": self.deload[person].tolist()
+        }
+
+@dataclass
+class WeekTargets:
+    """One week's targets for every person in the cohort; arrays are shaped (people,)"""
+    week: int  # 1-based
+    sessions: Any
+    minutes: Any
+    intensity_code: Any
+    met_minutes: Any
+    deload: Any
+
+class PeriodizationEngine:
+    """Turns base prescriptions into weekly targets
+    
+    Weekly volume (sessions × minutes) grows by the goal's weekly rate,
+    compounding over non-deload weeks, until it reaches the session and
+    minute caps; sessions or minutes grow first as the strategy's
+    progress_first says. Once volume is capped, intensity rises one band.
+    Deload weeks scale volume by deload_volume_factor and do not advance
+    progression.
+    """
+    
+    def __init__(self, framework: Optional[FITTVPFramework] = None):
+        self.framework = framework or FITTVPFramework.shared()
+        self.band_met_values = self._create_band_met_values()
+    
+    def _create_band_met_values(self):
+        """Representative MET per IntensityLevel: median of the registry's activities in that band"""
+        np = require_numpy()
+        view = get_registry().prescription_view
+        medians = {band: float(np.median([a.met_value for a in activities]))
+                   for band, activities in view.items()}
+        very_vigorous = max(a.met_value for a in view["vigorous"])
+        return np.array([medians.get(level.value, very_vigorous) for level in _LEVELS], dtype=np.float32)
+    
+    def plan_cohort(self,
+                    cohort: Union[Dict, Sequence[NumericFITTVPPrescription]],
+                    weeks: int,
+                    max_sessions_per_week=7,
+                    max_minutes_per_session=90,
+                    aggressiveness: float = 0.5) -> CohortPlan:
+        """Targets for every week of every prescription at once
+        
+        cohort is a create_prescription_batch result or a sequence of
+        NumericFITTVPPrescription. Caps take a scalar or one value per person;
+        aggressiveness picks the rate within each weekly_rate_range (0 = low end).
+        """
+        np = require_numpy()
+        params = self._cohort_parameters(cohort, max_sessions_per_week,
+                                         max_minutes_per_session, aggressiveness)
+        targets = self._week_targets(params, np.arange(weeks)[None, :])
+        return CohortPlan(*targets)
+    
+    def iter_weeks(self,
+                   cohort: Union[Dict, Sequence[NumericFITTVPPrescription]],
+                   weeks: Optional[int] = None,
+                   max_sessions_per_week=7,
+                   max_minutes_per_session=90,
+                   aggressiveness: float = 0.5) -> Iterator[WeekTargets]:
+        """Lazily yield one week at a time (forever when weeks is None); memory stays O(people)"""
+        params = self._cohort_parameters(cohort, max_sessions_per_week,
+                                         max_minutes_per_session, aggressiveness)
+        week = 0
+        while weeks is None or week < weeks:
+            yield WeekTargets(week + 1, *self._week_targets(params, week))
+            week += 1
+    
+    def _cohort_parameters(self, cohort, max_sessions, max_minutes, aggressiveness: float) -> Dict:
+        """Per-person columns (shape (people, 1)) that the weekly formula needs"""
+        np = require_numpy()
+        if not isinstance(cohort, dict):
+            cohort = self._prescription_columns(cohort)
+        
+        # Strategy values per goal, gathered by goal code
+        strategies = self.framework.progression_strategies
+        rates, deload_every, deload_factor, time_first = [], [], [], []
+        for goal in cohort["goal_table"]:
+            strategy = strategies.get(goal.lower(), strategies["general_health"])
+            low, high = strategy["weekly_rate_range"]
+            rates.append(low + (high - low) * aggressiveness)
+            deload_every.append(strategy["deload_every_weeks"] or 0)
+            deload_factor.append(strategy.get("deload_volume_factor", 1.0))
+            time_first.append(strategy["progress_first"] == "time")
+        goal_codes = np.asarray(cohort["goal_code"])
+        count = goal_codes.shape[0]
+        
+        def column(values, dtype):
+            return np.broadcast_to(np.asarray(values, dtype=dtype), (count,)).reshape(-1, 1)
+        
+        days = column(cohort["days_per_week"], np.int32)
+        minutes = column(cohort["minutes_per_session"], np.int32)
+        return {
+            "days": days,
+            "minutes": minutes,
+            "volume": (days * minutes).astype(np.float64),
+            "intensity": column(cohort["intensity_code"], np.int8),
+            "rate": column(np.array(rates)[goal_codes], np.float64),
+            "deload_every": column(np.array(deload_every)[goal_codes], np.int32),
+            "deload_factor": column(np.array(deload_factor)[goal_codes], np.float64),
+            "time_first": column(np.array(time_first)[goal_codes], bool),
+            "max_sessions": column(max_sessions, np.int32),
+            "max_minutes": column(max_minutes, np.int32)
+        }
+    
+    def _prescription_columns(self, prescriptions: Sequence[NumericFITTVPPrescription]) -> Dict:
+        """The create_prescription_batch columns plan_cohort reads, built from prescription objects"""
+        np = require_numpy()
+        goal_table: Dict[str, int] = {}
+        return {
+            "goal_code": np.array([goal_table.setdefault(p.goal, len(goal_table)) for p in prescriptions],
+                                  dtype=np.int16),
+            "goal_table": tuple(goal_table),
+            "days_per_week": np.array([p.days_per_week for p in prescriptions], dtype=np.int32),
+            "minutes_per_session": np.array([p.minutes_per_session for p in prescriptions], dtype=np.int32),
+            "intensity_code": np.array([_LEVELS.index(p.intensity) for p in prescriptions], dtype=np.int8)
+        }
+    
+    def _week_targets(self, p: Dict, week) -> tuple:
+        """Targets for 0-based week(s): an int gives (people,) arrays, a (1, weeks) array gives (people, weeks)"""
+        np = require_numpy()
+        week = np.asarray(week)
+        
+        has_deload = p["deload_every"] > 0
+        cycle = np.where(has_deload, p["deload_every"], 1)
+        deload = has_deload & ((week + 1) % cycle == 0)
+        # Deload weeks before this one do not count as progression steps
+        steps = week - np.where(has_deload, week // cycle, 0)
+        
+        cap = p["max_sessions"] * p["max_minutes"]
+        volume = p["volume"] * (1.0 + p["rate"]) ** steps
+        capped = volume >= cap
+        volume = np.where(deload, np.minimum(volume, cap) * p["deload_factor"], np.minimum(volume, cap))
+        
+        # Frequency first: as many base-length sessions as the volume fills, so sessions never
+        # run short of the base length until max_sessions (deloads drop sessions instead);
+        # time first: lengthen sessions first
+        by_frequency = np.clip(np.floor(volume / np.maximum(p["minutes"], 1)), 1, p["max_sessions"])
+        session_length = np.clip(np.ceil(volume / np.maximum(p["days"], 1)), p["minutes"], p["max_minutes"])
+        by_time = np.clip(np.ceil(volume / np.maximum(session_length, 1)), p["days"], p["max_sessions"])
+        sessions = np.where(volume > 0, np.where(p["time_first"], by_time, by_frequency), 0)
+        shortest = np.where(p["time_first"] | (sessions >= p["max_sessions"]), 1, p["minutes"])
+        minutes = np.where(sessions > 0,
+                           np.clip(np.rint(volume / np.maximum(sessions, 1)), shortest, p["max_minutes"]), 0)
+        
+        intensity = np.minimum(p["intensity"] + (capped & ~deload), np.maximum(p["intensity"], _TOP_CODE))
+        met_minutes = sessions * minutes * self.band_met_values[intensity]
+        
+        squeeze = week.ndim == 0
+        result = (sessions.astype(np.int16), minutes.astype(np.int16), intensity.astype(np.int8),
+                  met_minutes.astype(np.float32), np.broadcast_to(deload, sessions.shape))
+        return tuple(column[:, 0] for column in result) if squeeze else result
+
+def main():
+    """Plan a small cohort and stream a multi-year plan"""
+    framework = FITTVPFramework()
+    batch = framework.create_prescription_batch(
+        ["weight_loss", "strength_building", "general_health", "endurance"],
+        ["beginner", "intermediate", "beginner", "advanced"],
+        [45, 60, 30, 50],
+        [4, 3, 5, 4]
+    )
+    engine = PeriodizationEngine(framework)
+    
+    plan = engine.plan_cohort(batch, weeks=12)
+    for person in range(plan.people):
+        row = plan.row(person)
+        goal = batch["goal_table"][batch["goal_code"][person]]
+        print(f"\n{goal}:")
+        for week in (0, 3, 4, 8, 11):
+            print(f"  Week {week + 1:>2}: {row['sessions'][week]} x {row['minutes'][week]} min, "
+                  f"{row['intensity'][week]}, {row['met_minutes'][week]:.0f} MET-min"
+                  f"{' (deload)' if row['deload'][week] else ''}")
+    
+    # Frequency-first plans add sessions without shortening them below the base length
+    strategies = framework.progression_strategies
+    long_plan = engine.plan_cohort(batch, weeks=156)
+    for person in range(long_plan.people):
+        goal = batch["goal_table"][batch["goal_code"][person]]
+        if strategies.get(goal, strategies["general_health"])["progress_first"] == "frequency":
+            assert (long_plan.minutes[person] >= batch["minutes_per_session"][person]).all(), goal
+    
+    # Three years for the cohort, one week in memory at a time
+    total = sum(float(week.met_minutes.sum()) for week in engine.iter_weeks(batch, weeks=156))
+    print(f"\n3-year cohort total: {total:,.0f} MET-minutes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Prescription Rules
+Declarative keyword rules for free-text limitations and health status, plus the
+profile rules (fitness level, age group, health status) behind prescription
+modifications and safety considerations, compiled into one Aho–Corasick
+automaton so that each text is scanned once for every keyword of every rule
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+@dataclass(frozen=True)
+class PrescriptionRule:
+    name: str
+    keywords: Tuple[str, ...]  # matched case-insensitively anywhere in the text
+    modifications: Tuple[str, ...] = ()
+    safety: Tuple[str, ...] = ()
+    monitor_heart_rate: bool = False
+
+def profile_tag(field: str, value: str) -> str:
+    """Text the profile rules match for a structured field, e.g. [fitness:beginner]"""
+    return f"[{field}:{value}]"
+
+# Order matters: matched rules contribute their outputs in table order
+PRESCRIPTION_RULES: Tuple[PrescriptionRule, ...] = (
+    PrescriptionRule(
+        name="knee",
+        keywords=("knee", "patella", "meniscus", "膝", "半月板", "髕骨"),
+        modifications=("Use low-impact aerobic activities",)
+    ),
+    PrescriptionRule(
+        name="back",
+        keywords=("back", "spine", "spinal", "lumbar", "sciatica", "背", "腰", "脊", "椎間盤", "坐骨神經"),
+        modifications=("Avoid overhead movements initially",)
+    ),
+    PrescriptionRule(
+        name="time",
+        keywords=("time", "busy", "schedule", "時間", "忙", "沒空", "沒時間"),
+        modifications=("Consider high-intensity interval training",)
+    ),
+    PrescriptionRule(
+        name="heart",
+        keywords=("heart", "cardiac", "coronary", "arrhythmia", "chest pain", "palpitation",
+                  "心臟", "心血管", "冠心病", "心律不整", "心悸", "胸痛"),
+        safety=("Monitor heart rate during exercise",),
+        monitor_heart_rate=True
+    ),
+    PrescriptionRule(
+        name="beginner",
+        keywords=(profile_tag("fitness", "beginner"),),
+        modifications=(
+            "Start with lower end of time recommendations",
+            "Progress gradually over 4-6 weeks",
+            "Focus on enjoyable activities to build habit"
+        )
+    ),
+    PrescriptionRule(
+        name="older_adults",
+        keywords=(profile_tag("age_group", "older_adults"),),
+        safety=(
+            "Include fall prevention exercises",
+            "Start slowly and progress gradually",
+            "Consider balance training priority"
+        )
+    ),
+    PrescriptionRule(
+        name="health_conditions",
+        keywords=(profile_tag("health", "conditions"),),
+        modifications=(
+            "Consult healthcare provider before starting",
+            "Consider supervised exercise initially",
+            "Monitor symptoms during activity"
+        ),
+        safety=(
+            "Medical clearance recommended",
+            "Monitor for adverse symptoms",
+            "Have emergency plan in place"
+        )
+    )
+)
+
+class KeywordAutomaton:
+    """Aho–Corasick automaton: every keyword found in a text in one left-to-right pass"""
+    
+    def __init__(self, keywords: Dict[str, Iterable[int]]):
+        """keywords maps each (lowercased) keyword to the ids it reports"""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[frozenset] = [frozenset()]
+        for keyword, ids in keywords.items():
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = self._goto[state][char] = len(self._goto)
+                    self._goto.append({})
+                    self._outputs.append(frozenset())
+                state = next_state
+            self._outputs[state] |= frozenset(ids)
+        
+        # Failure links, breadth first; each state also reports its failure state's outputs
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] |= self._outputs[self._fail[next_state]]
+    
+    def find(self, text: str) -> frozenset:
+        """Ids of every keyword occurring in text"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return frozenset(found)
+
+class RuleTable:
+    """A compiled set of PrescriptionRule; match results are memoized per distinct text"""
+    
+    def __init__(self, rules: Sequence[PrescriptionRule] = PRESCRIPTION_RULES, memo_size: int = 4096):
+        self.rules = tuple(rules)
+        keywords: Dict[str, set] = {}
+        for index, rule in enumerate(self.rules):
+            for keyword in rule.keywords:
+                keywords.setdefault(keyword.lower(), set()).add(index)
+        self._automaton = KeywordAutomaton(keywords)
+        self._memo: Dict[str, Tuple[int, ...]] = {}
+        self._memo_size = memo_size
+    
+    def with_rules(self, rules: Iterable[PrescriptionRule]) -> "RuleTable":
+        """New table with rules appended (e.g. site-specific keywords)"""
+        return RuleTable(self.rules + tuple(rules), self._memo_size)
+    
+    def _indexes(self, text: str) -> Tuple[int, ...]:
+        indexes = self._memo.get(text)
+        if indexes is None:
+            indexes = tuple(sorted(self._automaton.find(text.lower())))
+            if len(self._memo) >= self._memo_size:
+                self._memo.clear()
+            self._memo[text] = indexes
+        return indexes
+    
+    def match(self, text: str) -> Tuple[PrescriptionRule, ...]:
+        """Rules with a keyword in text, in table order"""
+        return tuple(self.rules[index] for index in self._indexes(text))
+    
+    def match_each(self, texts: Iterable[str]) -> Tuple[PrescriptionRule, ...]:
+        """Matches of every text in turn; a rule repeats when several texts match it"""
+        return tuple(self.rules[index] for text in texts for index in self._indexes(text))
+    
+    def match_any(self, texts: Iterable[str]) -> Tuple[PrescriptionRule, ...]:
+        """Rules matching at least one of the texts, once each, in table order"""
+        indexes = set()
+        for text in texts:
+            indexes.update(self._indexes(text))
+        return tuple(self.rules[index] for index in sorted(indexes))
+
+@lru_cache(maxsize=None)
+def default_rule_table() -> RuleTable:
+    """Process-wide compiled PRESCRIPTION_RULES"""
+    return RuleTable(PRESCRIPTION_RULES)
+
+def main():
+    """Match a few English and Chinese limitations"""
+    table = default_rule_table()
+    for text in ["Knee pain", "下背痛、工作很忙", "Heart condition; lower back", "膝關節炎與心悸", "none"]:
+        matched = table.match(text)
+        print(f"{text}: {[rule.name for rule in matched] or '-'}")
+        for rule in matched:
+            for line in rule.modifications + rule.safety:
+                print(f"  - {line}")
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,16 @@
-// MET 活動資料庫
-const MET_ACTIVITIES = {
-    light: [
-        { name: '緩慢走路', met: 2.0, examples: ['漫步', '輕鬆散步', '購物走路'] },
-        { name: '輕度家務', met: 2.5, examples: ['洗碗', '整理房間', '烹飪'] },
-        { name: '伸展運動', met: 2.3, examples: ['瑜伽伸展', '太極', '簡單拉筋'] },
-        { name: '辦公室工作', met: 1.8, examples: ['打字', '閱讀', '會議'] }
-    ],
-    moderate: [
-        { name: '快走', met: 3.5, examples: ['健走', '快速步行', '爬樓梯'] },
-        { name: '騎自行車(休閒)', met: 4.0, examples: ['平地騎車', '休閒單車', '通勤騎車'] },
-        { name: '游泳(輕鬆)', met: 4.5, examples: ['蛙式慢游', '水中走路', '水中有氧'] },
-        { name: '舞蹈', met: 4.8, examples: ['社交舞', '有氧舞蹈', '廣場舞'] },
-        { name: '網球(雙打)', met: 5.0, examples: ['雙打網球', '羽毛球雙打', '桌球'] }
-    ],
-    vigorous: [
-        { name: '跑步', met: 8.0, examples: ['慢跑', '中速跑步', '間歇跑'] },
-        { name: '騎自行車(快速)', met: 8.5, examples: ['競速騎車', '山地車', '高強度騎車'] },
-        { name: '游泳(快速)', met: 10.0, examples: ['自由式', '蝶式', '競技游泳'] },
-        { name: '籃球', met: 6.5, examples: ['全場籃球', '激烈對戰', '比賽'] },
-        { name: '重量訓練', met: 6.0, examples: ['高強度重訓', 'CrossFit', '功能性訓練'] }
-    ]
-};
+// MET 活動資料庫：由 met_registry.py 產生的 met_activities.json 載入（與 Python 引擎共用同一份資料）
+// 表單送出前會等待 metActivitiesReady；載入失敗時 MET_ACTIVITIES 維持 null，結果頁顯示錯誤訊息
+let MET_ACTIVITIES = null;
+
+const metActivitiesReady = fetch('met_activities.json')
+    .then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        return response.json();
+    })
+    .then(data => { MET_ACTIVITIES = data; })
+    .catch(error => console.error('載入 MET 活動資料失敗:', error));
 
 // 計算熱量消耗
 function calculateCalories(metValue, weightKg, durationMinutes) {
@@ -44,6 +34,15 @@ function getMETActivitiesHtml(prescription) {
         intensity = 'vigorous';
     }
     
+    if (!MET_ACTIVITIES) {
+        return `
+        <div class="bg-red-50 border border-red-200 rounded-lg p-4 mb-4 text-sm text-red-700">
+            無法載入 MET 活動資料（met_activities.json），因此未列出推薦活動。
+            請透過網頁伺服器開啟本頁（例如執行 <code>python -m http.server</code>），而非直接開啟檔案。
+        </div>
+    `;
+    }
+    
     const activities = MET_ACTIVITIES[intensity].slice(0, 3); // 取前3個活動
     
     const activitiesHtml = activities.map(activity => {
@@ -196,15 +195,22 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // 表單提交處理
     const form = document.getElementById('healthForm');
-    form.addEventListener('submit', function(e) {
+    form.addEventListener('submit', async function(e) {
         e.preventDefault();
         
-        if (validateForm()) {
-            generatePrescription();
-            showPage('resultPage');
-        } else {
+        if (!validateForm()) {
             showFormError();
+            return;
         }
+        
+        // MET 活動資料尚未載入完成時先停用送出按鈕並等待
+        const submitButton = form.querySelector('[type="submit"]');
+        if (submitButton) submitButton.disabled = true;
+        await metActivitiesReady;
+        if (submitButton) submitButton.disabled = false;
+        
+        generatePrescription();
+        showPage('resultPage');
     });
 });
 
@@ -0,0 +1,458 @@
+"""
+Prescription Serialization
+Dedicated encoders for the prescription and guideline dataclasses that read
+fields directly instead of deep-copying through dataclasses.asdict: compact
+JSON with precomputed enum strings, and a msgpack-compatible binary format in
+which each record is an extension value tagged with a stable schema ID.
+Matching decoders rebuild the dataclasses, enums included
+"""
+
+import collections.abc
+import dataclasses
+import json
+import struct
+import time
+import typing
+from enum import Enum
+from json.encoder import encode_basestring
+from operator import attrgetter
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Tuple, Type
+
+from age_specific_recommendations import ExerciseActivity
+from exercise_prescription_framework import ExercisePrescription
+from fitt_vp_framework import FITTVPPrescription, ImmutableFITTVPPrescription
+from met_introduction import METActivity
+from special_populations import SpecialPopulationGuideline
+
+# Stable schema IDs used by the binary format; append only, never renumber
+SCHEMA_IDS: Dict[int, type] = {
+    1: ExercisePrescription,
+    2: FITTVPPrescription,
+    3: ImmutableFITTVPPrescription,
+    4: SpecialPopulationGuideline,
+    5: METActivity,
+    6: ExerciseActivity
+}
+
+RECORD_EXT_TYPE = 1  # msgpack extension type of a schema-tagged record
+BINARY_CONTENT_TYPE = "application/msgpack"
+STRING_CACHE_SIZE = 4096  # encoded forms of repeated strings (table texts, enum values)
+
+_DOUBLE = struct.Struct(">d")
+_UINT16 = struct.Struct(">H")
+_UINT32 = struct.Struct(">I")
+
+# ---------------------------------------------------------------- JSON
+
+_json_strings: Dict[str, str] = {}
+
+def _json_str(value: str) -> str:
+    encoded = _json_strings.get(value)
+    if encoded is None:
+        encoded = encode_basestring(value)
+        if len(_json_strings) < STRING_CACHE_SIZE:
+            _json_strings[value] = encoded
+    return encoded
+
+def _json_float(value: float) -> str:
+    # Same spelling as json.dumps
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "Infinity" if value > 0 else "-Infinity"
+    return float.__repr__(value)
+
+def _json_value(value: Any) -> str:
+    """Any field value: str, number, bool, None, enum, list/tuple or str-keyed mapping"""
+    cls = value.__class__
+    if cls is str:
+        return _json_str(value)
+    if cls is list or cls is tuple:
+        return "[" + ",".join([_json_value(item) for item in value]) + "]"
+    if cls is bool:
+        return "true" if value else "false"
+    if cls is int:
+        return int.__repr__(value)
+    if cls is float:
+        return _json_float(value)
+    if value is None:
+        return "null"
+    if cls is dict:
+        return "{" + ",".join([f"{_json_str(str(key))}:{_json_value(item)}" for key, item in value.items()]) + "}"
+    record = _SCHEMAS_BY_CLASS.get(cls)
+    if record is not None:
+        return record.to_json(value)
+    if isinstance(value, Enum):
+        return _json_value(value.value)
+    if isinstance(value, collections.abc.Mapping):
+        return "{" + ",".join([f"{_json_str(str(key))}:{_json_value(item)}" for key, item in value.items()]) + "}"
+    if isinstance(value, str):
+        return _json_str(str(value))
+    if isinstance(value, (list, tuple)):
+        return _json_value(list(value))
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        return _json_float(value)
+    raise TypeError(f"Object of type {cls.__name__} is not serializable")
+
+# ---------------------------------------------------------------- msgpack
+
+_packed_strings: Dict[str, bytes] = {}
+
+def _packed_str(value: str) -> bytes:
+    packed = _packed_strings.get(value)
+    if packed is None:
+        data = value.encode("utf-8")
+        size = len(data)
+        if size < 32:
+            packed = bytes((0xa0 | size,)) + data
+        elif size < 0x100:
+            packed = bytes((0xd9, size)) + data
+        elif size < 0x10000:
+            packed = b"\xda" + _UINT16.pack(size) + data
+        else:
+            packed = b"\xdb" + _UINT32.pack(size) + data
+        if len(_packed_strings) < STRING_CACHE_SIZE:
+            _packed_strings[value] = packed
+    return packed
+
+def _pack_int(value: int, out: bytearray):
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value & 0xff)
+    elif value >= 0:
+        for marker, fmt, limit in ((0xcc, ">B", 0x100), (0xcd, ">H", 0x10000),
+                                   (0xce, ">I", 0x100000000), (0xcf, ">Q", 0x10000000000000000)):
+            if value < limit:
+                out.append(marker)
+                out += struct.pack(fmt, value)
+                return
+        raise OverflowError("int too large for msgpack")
+    else:
+        for marker, fmt, limit in ((0xd0, ">b", 0x80), (0xd1, ">h", 0x8000),
+                                   (0xd2, ">i", 0x80000000), (0xd3, ">q", 0x8000000000000000)):
+            if value >= -limit:
+                out.append(marker)
+                out += struct.pack(fmt, value)
+                return
+        raise OverflowError("int too large for msgpack")
+
+def _pack_container_header(size: int, fix: int, marker16: int, out: bytearray):
+    if size < 16:
+        out.append(fix | size)
+    elif size < 0x10000:
+        out.append(marker16)
+        out += _UINT16.pack(size)
+    else:
+        out.append(marker16 + 1)
+        out += _UINT32.pack(size)
+
+def _pack(value: Any, out: bytearray):
+    cls = value.__class__
+    if cls is str:
+        out += _packed_str(value)
+    elif cls is list or cls is tuple:
+        _pack_container_header(len(value), 0x90, 0xdc, out)
+        for item in value:
+            _pack(item, out)
+    elif cls is bool:
+        out.append(0xc3 if value else 0xc2)
+    elif cls is int:
+        _pack_int(value, out)
+    elif cls is float:
+        out.append(0xcb)
+        out += _DOUBLE.pack(value)
+    elif value is None:
+        out.append(0xc0)
+    elif cls in _SCHEMAS_BY_CLASS:
+        _SCHEMAS_BY_CLASS[cls].pack(value, out)
+    elif isinstance(value, Enum):
+        _pack(value.value, out)
+    elif isinstance(value, collections.abc.Mapping):
+        _pack_container_header(len(value), 0x80, 0xde, out)
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    elif isinstance(value, str):
+        out += _packed_str(str(value))
+    elif isinstance(value, (list, tuple)):
+        _pack(list(value), out)
+    elif isinstance(value, int):
+        _pack_int(int(value), out)
+    elif isinstance(value, float):
+        _pack(float(value), out)
+    else:
+        raise TypeError(f"Object of type {cls.__name__} is not serializable")
+
+def _unpack(data: bytes, position: int) -> Tuple[Any, int]:
+    """(value, position after it) for the msgpack value at position"""
+    marker = data[position]
+    position += 1
+    if marker < 0x80:
+        return marker, position
+    if marker >= 0xe0:
+        return marker - 0x100, position
+    if 0xa0 <= marker <= 0xbf:
+        end = position + (marker & 0x1f)
+        return data[position:end].decode("utf-8"), end
+    if 0x90 <= marker <= 0x9f:
+        return _unpack_array(data, position, marker & 0x0f)
+    if 0x80 <= marker <= 0x8f:
+        return _unpack_map(data, position, marker & 0x0f)
+    if marker == 0xc0:
+        return None, position
+    if marker == 0xc2:
+        return False, position
+    if marker == 0xc3:
+        return True, position
+    if marker == 0xcb:
+        return _DOUBLE.unpack_from(data, position)[0], position + 8
+    if marker == 0xca:
+        return struct.unpack_from(">f", data, position)[0], position + 4
+    if marker in _FIXED_INTS:
+        fmt, size = _FIXED_INTS[marker]
+        return struct.unpack_from(fmt, data, position)[0], position + size
+    if marker in (0xd9, 0xda, 0xdb, 0xc4, 0xc5, 0xc6):
+        length_size = 1 << ((marker - 0xd9) if marker >= 0xd9 else (marker - 0xc4))
+        size = int.from_bytes(data[position:position + length_size], "big")
+        start = position + length_size
+        raw = data[start:start + size]
+        return (raw.decode("utf-8") if marker >= 0xd9 else bytes(raw)), start + size
+    if marker in (0xdc, 0xdd):
+        length_size = 2 if marker == 0xdc else 4
+        return _unpack_array(data, position + length_size, int.from_bytes(data[position:position + length_size], "big"))
+    if marker in (0xde, 0xdf):
+        length_size = 2 if marker == 0xde else 4
+        return _unpack_map(data, position + length_size, int.from_bytes(data[position:position + length_size], "big"))
+    if marker in (0xc7, 0xc8, 0xc9):
+        length_size = 1 << (marker - 0xc7)
+        size = int.from_bytes(data[position:position + length_size], "big")
+        ext_type = data[position + length_size]
+        start = position + length_size + 1
+        return _unpack_ext(ext_type, data, start, start + size), start + size
+    if marker in _FIXEXT_SIZES:
+        start = position + 1
+        end = start + _FIXEXT_SIZES[marker]
+        return _unpack_ext(data[position], data, start, end), end
+    raise ValueError(f"Unsupported msgpack marker 0x{marker:02x} at byte {position - 1}")
+
+_FIXED_INTS = {
+    0xcc: (">B", 1), 0xcd: (">H", 2), 0xce: (">I", 4), 0xcf: (">Q", 8),
+    0xd0: (">b", 1), 0xd1: (">h", 2), 0xd2: (">i", 4), 0xd3: (">q", 8)
+}
+_FIXEXT_SIZES = {0xd4: 1, 0xd5: 2, 0xd6: 4, 0xd7: 8, 0xd8: 16}
+
+def _unpack_array(data: bytes, position: int, size: int) -> Tuple[list, int]:
+    items = []
+    for _ in range(size):
+        item, position = _unpack(data, position)
+        items.append(item)
+    return items, position
+
+def _unpack_map(data: bytes, position: int, size: int) -> Tuple[dict, int]:
+    mapping = {}
+    for _ in range(size):
+        key, position = _unpack(data, position)
+        mapping[key], position = _unpack(data, position)
+    return mapping, position
+
+def _unpack_ext(ext_type: int, data: bytes, start: int, end: int) -> Any:
+    if ext_type != RECORD_EXT_TYPE:
+        raise ValueError(f"Unknown msgpack extension type {ext_type}")
+    schema_id, position = _unpack(data, start)
+    schema = _SCHEMAS_BY_ID.get(schema_id)
+    if schema is None:
+        raise ValueError(f"Unknown schema ID {schema_id}")
+    values, position = _unpack(data, position)
+    if position != end or not isinstance(values, list):
+        raise ValueError(f"Malformed record of schema {schema_id}")
+    return schema.build(values)
+
+# ---------------------------------------------------------------- schemas
+
+def _field_decoder(annotation: Any) -> Callable[[Any], Any]:
+    """Plain decoded value -> field value, from the field's type annotation"""
+    origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        members = {member.value: member for member in annotation}
+        return members.__getitem__
+    if origin is list and args and isinstance(args[0], type) and issubclass(args[0], Enum):
+        members = {member.value: member for member in args[0]}
+        return lambda values: [members[value] for value in values]
+    if origin is tuple:
+        return tuple
+    if origin is typing.Union and any(typing.get_origin(arg) is collections.abc.Mapping for arg in args):
+        return lambda value: MappingProxyType(value) if isinstance(value, dict) else value
+    return lambda value: value
+
+def _field_json_encoder(annotation: Any) -> Callable[[Any], str]:
+    """Field value -> JSON text; enum fields use their precomputed member strings"""
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        strings = {member: encode_basestring(member.value) for member in annotation}
+        return strings.__getitem__
+    origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+    if origin is list and args and isinstance(args[0], type) and issubclass(args[0], Enum):
+        strings = {member: encode_basestring(member.value) for member in args[0]}
+        return lambda values: "[" + ",".join([strings[value] for value in values]) + "]"
+    return _json_value
+
+class RecordSchema:
+    """Encoder and decoder of one dataclass, its fields read in declaration order"""
+    
+    def __init__(self, schema_id: int, cls: type):
+        self.schema_id = schema_id
+        self.cls = cls
+        hints = typing.get_type_hints(cls)
+        self.fields = tuple(field.name for field in dataclasses.fields(cls))
+        self._values = attrgetter(*self.fields)
+        self._json_encoders = [(("{" if index == 0 else ",") + encode_basestring(name) + ":",
+                                _field_json_encoder(hints[name]))
+                               for index, name in enumerate(self.fields)]
+        self._decoders = [_field_decoder(hints[name]) for name in self.fields]
+        self._packed_id = bytes(_packed_id(schema_id))
+    
+    def to_json(self, record: Any) -> str:
+        return "".join([prefix + encode(value) for (prefix, encode), value
+                        in zip(self._json_encoders, self._values(record))]) + "}"
+    
+    def pack(self, record: Any, out: bytearray):
+        payload = bytearray(self._packed_id)
+        _pack_container_header(len(self.fields), 0x90, 0xdc, payload)
+        for value in self._values(record):
+            _pack(value, payload)
+        size = len(payload)
+        if size < 0x100:
+            out += bytes((0xc7, size, RECORD_EXT_TYPE))
+        elif size < 0x10000:
+            out.append(0xc8)
+            out += _UINT16.pack(size)
+            out.append(RECORD_EXT_TYPE)
+        else:
+            out.append(0xc9)
+            out += _UINT32.pack(size)
+            out.append(RECORD_EXT_TYPE)
+        out += payload
+    
+    def build(self, values: List[Any]) -> Any:
+        if len(values) != len(self.fields):
+            raise ValueError(f"{self.cls.__name__} expects {len(self.fields)} fields, got {len(values)}")
+        return self.cls(*[decode(value) for decode, value in zip(self._decoders, values)])
+    
+    def from_dict(self, data: Dict[str, Any]) -> Any:
+        return self.build([data[name] for name in self.fields])
+
+def _packed_id(schema_id: int) -> bytearray:
+    out = bytearray()
+    _pack_int(schema_id, out)
+    return out
+
+_SCHEMAS_BY_ID: Dict[int, RecordSchema] = {schema_id: RecordSchema(schema_id, cls) for schema_id, cls in SCHEMA_IDS.items()}
+_SCHEMAS_BY_CLASS: Dict[type, RecordSchema] = {schema.cls: schema for schema in _SCHEMAS_BY_ID.values()}
+
+def schema_for(cls: type) -> RecordSchema:
+    try:
+        return _SCHEMAS_BY_CLASS[cls]
+    except KeyError:
+        raise TypeError(f"No serialization schema for {cls.__name__}") from None
+
+# ---------------------------------------------------------------- public API
+
+def to_json(value: Any) -> str:
+    """Compact JSON (same text as json.dumps(asdict(...), ensure_ascii=False, separators=(",", ":")))
+    
+    value is a registered dataclass or any list, tuple or mapping of them and plain values.
+    """
+    return _json_value(value)
+
+def from_json(cls: Type, text: str) -> Any:
+    """Rebuild cls from to_json output; a JSON array gives a list of cls"""
+    data = json.loads(text)
+    schema = schema_for(cls)
+    if isinstance(data, list):
+        return [schema.from_dict(item) for item in data]
+    return schema.from_dict(data)
+
+def to_binary(value: Any) -> bytes:
+    """msgpack bytes; registered dataclasses become RECORD_EXT_TYPE extensions: schema ID, then the field array"""
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+def from_binary(data: bytes) -> Any:
+    """Decode to_binary output; records come back as their dataclasses"""
+    value, position = _unpack(data, 0)
+    if position != len(data):
+        raise ValueError(f"{len(data) - position} trailing bytes after msgpack value")
+    return value
+
+def _asdict_json(value: Any) -> str:
+    """The path the dedicated encoders replace"""
+    def default(item):
+        return item.value if isinstance(item, Enum) else dict(item)
+    try:
+        data = dataclasses.asdict(value)
+    except TypeError:
+        # asdict cannot deep-copy MappingProxyType (ImmutableFITTVPPrescription.intensity)
+        data = {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=default)
+
+def sample_records() -> List[Any]:
+    """One or more of every registered dataclass, straight from the engines"""
+    from age_specific_recommendations import AgeSpecificRecommendations
+    from exercise_prescription_framework import ExercisePrescriptionSystem
+    from fitt_vp_framework import FITTVPFramework
+    from met_introduction import METEducationSystem
+    from special_populations import SpecialPopulationExercise
+    
+    fitt = FITTVPFramework.shared()
+    numeric = fitt.create_numeric_prescription("weight_loss", "beginner", 45, 4, None, ["knee pain"])
+    records: List[Any] = list(ExercisePrescriptionSystem.shared().prescriptions.values())
+    records.append(fitt.format_prescription(numeric))
+    records.append(ImmutableFITTVPPrescription.from_prescription(fitt.format_prescription(numeric)))
+    records.extend(SpecialPopulationExercise.shared().guidelines.values())
+    records.extend(activity for activities in METEducationSystem.shared().activities_database.values()
+                   for activity in activities)
+    records.extend(activity for group in AgeSpecificRecommendations.shared().recommendations.values()
+                   for activity in group["recommended_activities"])
+    return records
+
+def _throughput(function: Callable, records: List[Any], min_seconds: float = 0.3) -> float:
+    """Records per second over repeated passes"""
+    clock = time.perf_counter
+    started = clock()
+    count = 0
+    while clock() - started < min_seconds:
+        for record in records:
+            function(record)
+        count += len(records)
+    return count / (clock() - started)
+
+def main():
+    """Compare throughput and size of both formats with asdict + json.dumps (round trips: test_serialization.py)"""
+    records = sample_records()
+    by_class: Dict[str, List[Any]] = {}
+    for record in records:
+        by_class.setdefault(type(record).__name__, []).append(record)
+    print(f"{len(records)} records ({', '.join(f'{name} x{len(items)}' for name, items in by_class.items())})")
+    
+    print(f"\n{'record':<30}{'asdict+json':>13}{'to_json':>11}{'to_binary':>11}{'from_json':>11}{'from_binary':>13}"
+          f"{'json B':>8}{'bin B':>7}  (records/s)")
+    for name, items in by_class.items():
+        cls = type(items[0])
+        texts = {id(item): to_json(item) for item in items}
+        blobs = {id(item): to_binary(item) for item in items}
+        baseline = _throughput(_asdict_json, items)
+        fast_json = _throughput(to_json, items)
+        binary = _throughput(to_binary, items)
+        json_decode = _throughput(lambda item: from_json(cls, texts[id(item)]), items)
+        binary_decode = _throughput(lambda item: from_binary(blobs[id(item)]), items)
+        json_size = sum(len(text.encode("utf-8")) for text in texts.values()) // len(items)
+        binary_size = sum(len(blob) for blob in blobs.values()) // len(items)
+        print(f"{name:<30}{baseline:>13,.0f}{fast_json:>11,.0f}{binary:>11,.0f}{json_decode:>11,.0f}{binary_decode:>13,.0f}"
+              f"{json_size:>8}{binary_size:>7}  ({fast_json / baseline:.1f}x / {binary / baseline:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Exercise Prescription JSON Service
+asyncio HTTP/1.1 service (standard library only) exposing the engines on
+localhost. Concurrent identical requests are coalesced into one computation;
+single calls run on a thread pool and batch calls on a process pool, so the
+event loop only parses requests and writes responses
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import enum
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from activity_query import default_query_engine
+from exercise_prescription_framework import ExercisePrescriptionSystem
+from fitt_vp_framework import FITTVPFramework
+from instrumentation import (PROMETHEUS_CONTENT_TYPE, InMemorySink, PrometheusExporter, enable_metrics,
+                             get_sink, stage)
+from met_introduction import METEducationSystem
+from special_populations import ChronicCondition, SpecialPopulation, SpecialPopulationExercise
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 8 * 1024 * 1024
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+
+logger = logging.getLogger(__name__)
+
+def json_default(value: Any) -> Any:
+    """JSON encoding for engine results: dataclasses, enums, read-only mappings, NumPy values"""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Field validation: a TypeError here becomes a 400 response naming the field
+
+def _text(params: Dict, name: str, default: Optional[str] = None) -> str:
+    """params[name] as a string; default when absent (required when default is None)"""
+    value = params[name] if default is None else params.get(name, default)
+    if not isinstance(value, str):
+        raise TypeError(f"{name} must be a string")
+    return value
+
+def _optional_text(params: Dict, name: str) -> Optional[str]:
+    return None if params.get(name) is None else _text(params, name)
+
+def _texts(params: Dict, name: str) -> Optional[List[str]]:
+    """params[name] as a list of strings, None when absent or null"""
+    value = params.get(name)
+    if value is not None and not (isinstance(value, list) and all(isinstance(item, str) for item in value)):
+        raise TypeError(f"{name} must be a list of strings")
+    return value
+
+def _text_or_texts(params: Dict, name: str, default: Optional[str] = None) -> Union[str, List[str]]:
+    """One string for everyone, or a list of strings (one per person)"""
+    value = params[name] if default is None else params.get(name, default)
+    return _text({name: value}, name) if not isinstance(value, list) else _texts({name: value}, name)
+
+def _individualized(params: Dict) -> Any:
+    return ExercisePrescriptionSystem.shared().create_individualized_prescription(
+        int(params["age"]),
+        float(params["body_weight_kg"]),
+        _text(params, "health_status", "healthy"),
+        _text(params, "fitness_level", "beginner")
+    )
+
+def _individualized_batch(params: Dict) -> Any:
+    return ExercisePrescriptionSystem.shared().create_individualized_prescriptions_batch(
+        params["ages"],
+        params["body_weights_kg"],
+        _text_or_texts(params, "health_statuses", "healthy"),
+        _text_or_texts(params, "fitness_levels", "beginner")
+    )
+
+def _fitt_vp(params: Dict) -> Any:
+    return FITTVPFramework.shared().create_prescription(
+        _text(params, "goal"),
+        _text(params, "current_fitness"),
+        int(params["time_available"]),
+        int(params["frequency_available"]),
+        _texts(params, "exercise_preferences"),
+        _texts(params, "limitations")
+    )
+
+def _fitt_vp_batch(params: Dict) -> Any:
+    limitations = params.get("limitations")
+    if limitations is not None:
+        if not isinstance(limitations, list):
+            raise TypeError("limitations must be a list with one entry per person")
+        for entry in limitations:
+            _texts({"limitations": entry}, "limitations")
+    return FITTVPFramework.shared().create_prescription_batch(
+        _text_or_texts(params, "goals"),
+        _text_or_texts(params, "current_fitness"),
+        params["time_available"],
+        params["frequency_available"],
+        limitations
+    )
+
+def _adapted(params: Dict) -> Any:
+    condition = _optional_text(params, "specific_condition")
+    return SpecialPopulationExercise.shared().create_adapted_prescription(
+        SpecialPopulation(_text(params, "population")),
+        int(params["age"]),
+        ChronicCondition(condition) if condition else None,
+        _text(params, "current_activity_level", "sedentary"),
+        [ChronicCondition(value) for value in _texts(params, "conditions") or ()]
+    )
+
+def _activity_query(params: Dict) -> Any:
+    filters = dict(params)
+    population = _optional_text(filters, "population")
+    conditions = _texts(filters, "conditions") or ()
+    cursor = _optional_text(filters, "cursor")
+    for name in ("population", "conditions", "cursor"):
+        filters.pop(name, None)
+    return default_query_engine().query(
+        SpecialPopulation(population) if population else None,
+        [ChronicCondition(value) for value in conditions],
+        int(filters.pop("limit", 20)),
+        cursor,
+        **filters
+    )
+
+def _weekly_met(params: Dict) -> Any:
+    activities = params["activities"]
+    if not (isinstance(activities, list) and
+            all(isinstance(activity, dict) and isinstance(activity.get("activity"), str)
+                for activity in activities)):
+        raise TypeError('activities must be a list of objects with an "activity" string')
+    return METEducationSystem.shared().calculate_weekly_met_minutes(activities)
+
+# POST path -> (handler, runs on the process pool)
+ROUTES: Dict[str, Tuple[Callable[[Dict], Any], bool]] = {
+    "/individualized": (_individualized, False),
+    "/individualized/batch": (_individualized_batch, True),
+    "/fitt-vp": (_fitt_vp, False),
+    "/fitt-vp/batch": (_fitt_vp_batch, True),
+    "/adapted": (_adapted, False),
+    "/weekly-met": (_weekly_met, False),
+    "/activities/query": (_activity_query, False)
+}
+
+def _compute(path: str, params: Dict) -> bytes:
+    """Run a route's handler and encode the result; executes on a worker thread or process"""
+    result = ROUTES[path][0](params)
+    with stage("service", "serialization"):
+        return json.dumps(result, ensure_ascii=False, default=json_default).encode("utf-8")
+
+class ServiceError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+class PrescriptionService:
+    """Routes requests to the engines, sharing one computation among identical in-flight requests"""
+    
+    def __init__(self, workers: Optional[int] = None, threads: int = 4):
+        self.workers = workers
+        self._threads = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="engine")
+        self._processes: Optional[ProcessPoolExecutor] = None  # started on the first batch call
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        self.stats = {"requests": 0, "computations": 0, "coalesced": 0, "errors": 0}
+    
+    async def compute(self, path: str, params: Dict) -> bytes:
+        """Encoded result for a route; joins an identical computation already running"""
+        key = (path, json.dumps(params, sort_keys=True, separators=(",", ":")))
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+        
+        if ROUTES[path][1]:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self.workers)
+            executor = self._processes
+        else:
+            executor = self._threads
+        
+        future = asyncio.get_running_loop().run_in_executor(executor, _compute, path, params)
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        self.stats["computations"] += 1
+        return await asyncio.shield(future)
+    
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, bytes, str]:
+        """(status, payload, content type) for one request"""
+        self.stats["requests"] += 1
+        try:
+            if path == "/health":
+                return HTTPStatus.OK, json.dumps({"status": "ok", **self.stats}).encode("utf-8"), JSON_CONTENT_TYPE
+            sink = get_sink()
+            if path == "/metrics" and isinstance(sink, InMemorySink):
+                # Engine metrics of this process; batch routes running on the process pool are not included
+                return HTTPStatus.OK, PrometheusExporter(sink).render().encode("utf-8"), PROMETHEUS_CONTENT_TYPE
+            if path not in ROUTES:
+                raise ServiceError(HTTPStatus.NOT_FOUND, f"Unknown endpoint {path}; "
+                                                         f"available: {', '.join(ROUTES)}")
+            if method != "POST":
+                raise ServiceError(HTTPStatus.METHOD_NOT_ALLOWED, f"{path} accepts POST")
+            try:
+                params = json.loads(body or b"{}")
+            except ValueError:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "Request body must be JSON") from None
+            if not isinstance(params, dict):
+                raise ServiceError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+            
+            try:
+                return HTTPStatus.OK, await self.compute(path, params), JSON_CONTENT_TYPE
+            except KeyError as error:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, f"Missing or unknown value: {error}") from None
+            except (TypeError, ValueError) as error:
+                raise ServiceError(HTTPStatus.BAD_REQUEST, str(error)) from None
+        except ServiceError as error:
+            self.stats["errors"] += 1
+            return (error.status, json.dumps({"error": str(error)}, ensure_ascii=False).encode("utf-8"),
+                    JSON_CONTENT_TYPE)
+        except Exception:
+            # An engine bug must not drop the connection; the details go to the log only
+            logger.exception("Unhandled error serving %s %s", method, path)
+            self.stats["errors"] += 1
+            return (HTTPStatus.INTERNAL_SERVER_ERROR, b'{"error": "Internal server error"}',
+                    JSON_CONTENT_TYPE)
+    
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve HTTP/1.1 requests on one connection, honouring keep-alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                parts = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                
+                length = int(headers.get("content-length") or 0)
+                content_type = JSON_CONTENT_TYPE
+                if len(parts) != 3:
+                    status, payload = HTTPStatus.BAD_REQUEST, b'{"error": "Malformed request line"}'
+                elif length > MAX_BODY_BYTES:
+                    status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, b'{"error": "Request body too large"}'
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload, content_type = await self.dispatch(parts[0], parts[1].split("?", 1)[0], body)
+                
+                keep_alive = (len(parts) == 3 and parts[2] == "HTTP/1.1" and length <= MAX_BODY_BYTES
+                              and headers.get("connection", "").lower() != "close")
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+    
+    def close(self):
+        self._threads.shutdown(wait=False)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False)
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: Optional[int] = None):
+    service = PrescriptionService(workers)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Serving {', '.join(ROUTES)} on http://{host}:{port} (GET /health for counters"
+          f"{', GET /metrics for Prometheus metrics' if isinstance(get_sink(), InMemorySink) else ''})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the exercise prescription engines as a JSON API")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="bind address (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size for batch calls")
+    parser.add_argument("--metrics", action="store_true", help="instrument the engines and serve GET /metrics")
+    args = parser.parse_args()
+    if args.metrics:
+        enable_metrics()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
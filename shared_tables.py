@@ -0,0 +1,74 @@
+"""
+Shared Engine Tables
+Lazily built, process-wide read-only tables and instances for the engines, so
+that constructing an engine after the first one is close to free
+"""
+
+import copy
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Type, TypeVar
+
+T = TypeVar("T")
+
+_lock = threading.RLock()  # re-entrant: a table builder may read another shared table
+_tables: Dict[tuple, Any] = {}
+_instances: Dict[type, Any] = {}
+
+class shared_table:
+    """Descriptor for a table built once per class by calling one of its builder methods
+    
+    The first read on any instance calls getattr(instance, builder_name)() and
+    stores the result, wrapped read-only, for every later instance of the same
+    class. Assigning the attribute on an instance replaces the table for that
+    instance only.
+    
+    Only the top-level dict is read-only; nested lists, dicts and dataclasses are
+    shared by every instance, so public getters hand out table_copy() results.
+    """
+    
+    def __init__(self, builder_name: str):
+        self.builder_name = builder_name
+        self.name = None
+    
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+    
+    def __get__(self, instance: Any, owner: type) -> Any:
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            pass
+        
+        key = (type(instance), self.name)
+        table = _tables.get(key)
+        if table is None:
+            with _lock:
+                table = _tables.get(key)
+                if table is None:
+                    table = getattr(instance, self.builder_name)()
+                    if isinstance(table, dict):
+                        table = MappingProxyType(table)
+                    _tables[key] = table
+        return table
+    
+    def __set__(self, instance: Any, value: Any):
+        instance.__dict__[self.name] = value
+
+def table_copy(value: Any) -> Any:
+    """Caller-owned deep copy of a shared table or any part of it (read-only mappings become dicts)"""
+    if isinstance(value, MappingProxyType):
+        return {key: table_copy(item) for key, item in value.items()}
+    return copy.deepcopy(value)
+
+def shared_instance(cls: Type[T]) -> T:
+    """Process-wide instance of cls, built on first use"""
+    instance = _instances.get(cls)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(cls)
+            if instance is None:
+                instance = _instances[cls] = cls()
+    return instance
@@ -4,9 +4,12 @@ Based on WHO 2020 Guidelines and clinical evidence
 """
 
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Tuple
 from enum import Enum
 
+from instrumentation import instrumented, stage
+from shared_tables import shared_instance, shared_table, table_copy
+
 class SpecialPopulation(Enum):
     PREGNANCY = "pregnancy"
     POSTPARTUM = "postpartum"
@@ -33,11 +36,109 @@ class SpecialPopulationGuideline:
     medical_clearance: bool
     progression_notes: str
 
+# Chronic condition guideline sections merged across conditions
+CONDITION_SECTIONS = ("exercise_benefits", "recommendations", "precautions", "contraindications")
+_CONDITION_BITS = {condition: 1 << index for index, condition in enumerate(ChronicCondition)}
+
+class ConditionRuleIndex:
+    """Chronic condition guidance interned to rule ids, one bitset per condition and section
+    
+    Merging several conditions is a few bitwise ORs; texts shared by two conditions,
+    or already in the population guideline, appear once. Merged results are cached
+    per (population, condition combination), at most 5 x 2^7 entries, and every
+    call returns its own copy.
+    """
+    
+    def __init__(self,
+                 guidelines: Dict[SpecialPopulation, SpecialPopulationGuideline],
+                 specifics: Dict[ChronicCondition, Dict]):
+        self.rules: List[Tuple[str, object]] = []  # id -> (section, text); recommendations hold (key, text)
+        self._ids: Dict[Tuple[str, object], int] = {}
+        # Population lists are interned first so bit order keeps their items ahead
+        self.population_masks = {
+            population: {
+                "precautions": self._mask("precautions", guideline.precautions),
+                "contraindications": self._mask("contraindications", guideline.contraindications)
+            }
+            for population, guideline in guidelines.items()
+        }
+        self.condition_masks = {
+            condition: {
+                section: self._mask(section, info[section].items() if section == "recommendations" else info[section])
+                for section in CONDITION_SECTIONS
+            }
+            for condition, info in specifics.items()
+        }
+        self._merged: Dict[Tuple[SpecialPopulation, int], Dict] = {}
+    
+    def _mask(self, section: str, items: Iterable) -> int:
+        mask = 0
+        for item in items:
+            key = (section, item)
+            rule_id = self._ids.get(key)
+            if rule_id is None:
+                rule_id = self._ids[key] = len(self.rules)
+                self.rules.append(key)
+            mask |= 1 << rule_id
+        return mask
+    
+    def _items(self, mask: int) -> List:
+        """Interned items of the set bits, in id order"""
+        items = []
+        while mask:
+            lowest = mask & -mask
+            items.append(self.rules[lowest.bit_length() - 1][1])
+            mask ^= lowest
+        return items
+    
+    def merge(self, population: SpecialPopulation, conditions: Iterable[ChronicCondition]) -> Dict:
+        """Combined guidance for conditions, minus what the population guideline already lists
+        
+        The result is a fresh dict the caller may modify.
+        """
+        conditions = sorted(set(conditions), key=_CONDITION_BITS.get)
+        key = (population, sum(_CONDITION_BITS[condition] for condition in conditions))
+        merged = self._merged.get(key)
+        if merged is None:
+            merged = self._merged[key] = self._merge(population, conditions)
+        return {section: value.copy() for section, value in merged.items()}
+    
+    def _merge(self, population: SpecialPopulation, conditions: List[ChronicCondition]) -> Dict:
+        
+        missing = [condition.value for condition in conditions if condition not in self.condition_masks]
+        if missing:
+            raise ValueError(f"No guidance for chronic conditions: {', '.join(missing)}")
+        masks = dict.fromkeys(CONDITION_SECTIONS, 0)
+        for condition in conditions:
+            for section, mask in self.condition_masks[condition].items():
+                masks[section] |= mask
+        for section, mask in self.population_masks.get(population, {}).items():
+            masks[section] &= ~mask
+        
+        # Conditions giving different advice under the same key are listed together
+        recommendations: Dict[str, str] = {}
+        for name, text in self._items(masks["recommendations"]):
+            recommendations[name] = f"{recommendations[name]}; {text}" if name in recommendations else text
+        
+        return {
+            "conditions": [condition.value for condition in conditions],
+            "benefits": self._items(masks["exercise_benefits"]),
+            "specific_recommendations": recommendations,
+            "additional_precautions": self._items(masks["precautions"]),
+            "additional_contraindications": self._items(masks["contraindications"])
+        }
+
 class SpecialPopulationExercise:
     
-    def __init__(self):
-        self.guidelines = self._create_special_population_guidelines()
-        self.chronic_condition_specifics = self._create_chronic_condition_guidelines()
+    # Built on first use and shared by every instance; assign to override per instance
+    guidelines = shared_table("_create_special_population_guidelines")
+    chronic_condition_specifics = shared_table("_create_chronic_condition_guidelines")
+    condition_rules = shared_table("_create_condition_rules")
+    
+    @classmethod
+    def shared(cls) -> "SpecialPopulationExercise":
+        """Process-wide instance whose tables and caches are built once"""
+        return shared_instance(cls)
     
     def _create_special_population_guidelines(self) -> Dict[SpecialPopulation, SpecialPopulationGuideline]:
         return {
@@ -135,6 +236,34 @@ class SpecialPopulationExercise:
                 progression_notes="Highly individualized progression based on specific disability and capabilities. Focus on functional improvements."
             ),
             
+            SpecialPopulation.CHRONIC_DISEASE: SpecialPopulationGuideline(
+                population="Adults with Chronic Conditions",
+                general_recommendations=(
+                    "Aim for the adult guidelines (150-300 minutes moderate aerobic activity and "
+                    "2+ days/week muscle strengthening) as far as the condition allows. "
+                    "Any amount of activity is better than none; follow condition-specific guidance."
+                ),
+                specific_activities=[
+                    "Walking (10-30 min, most days)",
+                    "Stationary cycling",
+                    "Water-based exercise",
+                    "Resistance training with bands or machines",
+                    "Flexibility and balance exercises"
+                ],
+                contraindications=[
+                    "Exercise during acute exacerbations or unstable symptoms",
+                    "Unsupervised high-intensity exercise without medical clearance"
+                ],
+                precautions=[
+                    "Review medications that affect heart rate, blood pressure or blood glucose",
+                    "Monitor symptoms and RPE during and after exercise",
+                    "Extended warm-up and cool-down",
+                    "Stop and seek advice if new symptoms appear"
+                ],
+                medical_clearance=True,
+                progression_notes="Progress slowly, guided by symptoms and condition-specific limits. Increase duration before intensity."
+            ),
+            
             SpecialPopulation.SEDENTARY: SpecialPopulationGuideline(
                 population="Sedentary Individuals",
                 general_recommendations=(
@@ -269,49 +398,141 @@ class SpecialPopulationExercise:
                     "Severe joint damage",
                     "Recent joint surgery"
                 ]
+            },
+            
+            ChronicCondition.COPD: {
+                "exercise_benefits": [
+                    "Reduced breathlessness",
+                    "Improved exercise tolerance",
+                    "Stronger breathing and limb muscles",
+                    "Fewer hospital admissions"
+                ],
+                "recommendations": {
+                    "supervised": "Pulmonary rehabilitation program where available",
+                    "aerobic": "20-60 min, 3-5 days/week, interval format if breathless",
+                    "intensity": "Dyspnea rating 4-6 on 0-10 scale",
+                    "resistance": "2-3 sessions/week, upper and lower limbs"
+                },
+                "precautions": [
+                    "Use prescribed inhaler before exercise",
+                    "Pursed-lip breathing during exertion",
+                    "Monitor oxygen saturation if prescribed oxygen",
+                    "Gradual warm-up and cool-down"
+                ],
+                "contraindications": [
+                    "Acute exacerbation",
+                    "Resting oxygen saturation below 85% without supplemental oxygen",
+                    "Unstable angina"
+                ]
+            },
+            
+            ChronicCondition.OBESITY: {
+                "exercise_benefits": [
+                    "Weight management",
+                    "Reduced cardiovascular risk",
+                    "Improved insulin sensitivity",
+                    "Better mobility and mood"
+                ],
+                "recommendations": {
+                    "aerobic": "250-300 min/week moderate intensity for weight loss",
+                    "resistance": "2-3 sessions/week",
+                    "low_impact": "Walking, cycling, water-based exercise"
+                },
+                "precautions": [
+                    "Prefer low-impact activities to protect joints",
+                    "Watch for heat intolerance",
+                    "Stay hydrated",
+                    "Increase duration before intensity"
+                ],
+                "contraindications": [
+                    "Uncontrolled blood pressure",
+                    "Acute joint injury"
+                ]
+            },
+            
+            ChronicCondition.OSTEOPOROSIS: {
+                "exercise_benefits": [
+                    "Slower bone loss",
+                    "Improved balance and fewer falls",
+                    "Better posture",
+                    "Stronger muscles around joints"
+                ],
+                "recommendations": {
+                    "resistance": "2-3 sessions/week, progressive loading",
+                    "weight_bearing": "Walking, stair climbing, low-impact aerobics",
+                    "balance": "Tai chi or balance training 2-3 times/week"
+                },
+                "precautions": [
+                    "Avoid spinal flexion and twisting under load",
+                    "Fall-proof the exercise environment",
+                    "Avoid high-impact activities with prior fractures",
+                    "Balance activity with rest"
+                ],
+                "contraindications": [
+                    "Recent vertebral fracture",
+                    "High-impact or contact sports with severe osteoporosis"
+                ]
             }
         }
     
+    def _create_condition_rules(self) -> "ConditionRuleIndex":
+        return ConditionRuleIndex(self.guidelines, self.chronic_condition_specifics)
+    
     def get_population_guidelines(self, population: SpecialPopulation) -> SpecialPopulationGuideline:
         """Get guidelines for specific special population"""
-        return self.guidelines[population]
+        return table_copy(self.guidelines[population])
     
     def get_chronic_condition_info(self, condition: ChronicCondition) -> Dict:
         """Get information for specific chronic condition"""
-        return self.chronic_condition_specifics[condition]
+        return table_copy(self.chronic_condition_specifics[condition])
     
+    @instrumented("special_populations")
     def create_adapted_prescription(self, 
                                   population: SpecialPopulation,
                                   age: int,
                                   specific_condition: Optional[ChronicCondition] = None,
-                                  current_activity_level: str = "sedentary") -> Dict:
-        """Create adapted exercise prescription for special population"""
+                                  current_activity_level: str = "sedentary",
+                                  conditions: Iterable[ChronicCondition] = ()) -> Dict:
+        """Create adapted exercise prescription for special population
         
-        base_guidelines = self.get_population_guidelines(population)
+        specific_condition adds its full guidance as "chronic_condition". Passing
+        conditions also adds "chronic_conditions": the guidance of every condition
+        (specific_condition included) merged, minus what the population lists.
+        """
         
-        prescription = {
-            "population": base_guidelines.population,
-            "medical_clearance_required": base_guidelines.medical_clearance,
-            "general_recommendations": base_guidelines.general_recommendations,
-            "recommended_activities": base_guidelines.specific_activities,
-            "contraindications": base_guidelines.contraindications,
-            "precautions": base_guidelines.precautions,
-            "progression": base_guidelines.progression_notes
-        }
-        
-        if specific_condition:
-            condition_info = self.get_chronic_condition_info(specific_condition)
-            prescription["chronic_condition"] = {
-                "condition": specific_condition.value,
-                "benefits": condition_info["exercise_benefits"],
-                "specific_recommendations": condition_info["recommendations"],
-                "additional_precautions": condition_info["precautions"],
-                "additional_contraindications": condition_info["contraindications"]
+        with stage("special_populations", "guideline_lookup"):
+            base_guidelines = self.guidelines[population]
+            
+            prescription = {
+                "population": base_guidelines.population,
+                "medical_clearance_required": base_guidelines.medical_clearance,
+                "general_recommendations": base_guidelines.general_recommendations,
+                "recommended_activities": list(base_guidelines.specific_activities),
+                "contraindications": list(base_guidelines.contraindications),
+                "precautions": list(base_guidelines.precautions),
+                "progression": base_guidelines.progression_notes
             }
         
+        conditions = set(conditions)
+        with stage("special_populations", "condition_safety_rules"):
+            if specific_condition:
+                condition_info = self.chronic_condition_specifics[specific_condition]
+                prescription["chronic_condition"] = {
+                    "condition": specific_condition.value,
+                    "benefits": list(condition_info["exercise_benefits"]),
+                    "specific_recommendations": dict(condition_info["recommendations"]),
+                    "additional_precautions": list(condition_info["precautions"]),
+                    "additional_contraindications": list(condition_info["contraindications"])
+                }
+            if conditions:
+                if specific_condition:
+                    conditions.add(specific_condition)
+                prescription["chronic_conditions"] = self.condition_rules.merge(population, conditions)
+        
         # Adapt based on current activity level
         if current_activity_level == "sedentary":
-            prescription["starter_program"] = self._create_starter_program(population)
+            with stage("special_populations", "starter_program"):
+                prescription["starter_program"] = self._create_starter_program(population)
         
         return prescription
     
@@ -357,6 +578,12 @@ def main():
             "age": 55,
             "specific_condition": ChronicCondition.DIABETES,
             "current_activity_level": "sedentary"
+        },
+        {
+            "population": SpecialPopulation.CHRONIC_DISEASE,
+            "age": 72,
+            "conditions": [ChronicCondition.DIABETES, ChronicCondition.HYPERTENSION, ChronicCondition.ARTHRITIS],
+            "current_activity_level": "active"
         }
     ]
     
@@ -383,6 +610,21 @@ def main():
             print(f"Exercise Benefits:")
             for benefit in cc['benefits'][:2]:
                 print(f"  • {benefit}")
+        
+        if 'chronic_conditions' in prescription:
+            cc = prescription['chronic_conditions']
+            print(f"\nChronic Conditions: {', '.join(c.title() for c in cc['conditions'])}")
+            print(f"Combined Contraindications:")
+            for contraindication in cc['additional_contraindications']:
+                print(f"  • {contraindication}")
+            print(f"Aerobic: {cc['specific_recommendations']['aerobic']}")
+    
+    # Callers get their own copy of the memoized merge
+    conditions = [ChronicCondition.DIABETES]
+    merged = system.create_adapted_prescription(SpecialPopulation.SEDENTARY, 40, conditions=conditions)
+    merged["chronic_conditions"]["benefits"].clear()
+    assert system.create_adapted_prescription(
+        SpecialPopulation.SEDENTARY, 40, conditions=conditions)["chronic_conditions"]["benefits"]
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
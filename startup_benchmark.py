@@ -0,0 +1,80 @@
+"""
+Startup Benchmark
+Reports import time, first construction, first-call latency and repeat
+construction cost for each engine module, each measured in a fresh interpreter
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+# module, engine class, representative first call (evaluated with the instance bound to `engine`)
+ENGINES = [
+    ("exercise_prescription_framework", "ExercisePrescriptionSystem",
+     "engine.create_individualized_prescription(35, 70.0)"),
+    ("fitt_vp_framework", "FITTVPFramework",
+     "engine.create_prescription('general_health', 'beginner', 30, 3)"),
+    ("met_introduction", "METEducationSystem",
+     "engine.search_activities('跑步')"),
+    ("age_specific_recommendations", "AgeSpecificRecommendations",
+     "engine.create_weekly_schedule(35)"),
+    ("special_populations", "SpecialPopulationExercise",
+     "engine.create_adapted_prescription(module.SpecialPopulation.PREGNANCY, 28)")
+]
+
+_PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+module = importlib.import_module({module!r})
+imported = time.perf_counter()
+engine = getattr(module, {cls!r})()
+constructed = time.perf_counter()
+{call}
+called = time.perf_counter()
+getattr(module, {cls!r})()
+reconstructed = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "first_construct_ms": (constructed - imported) * 1000,
+    "first_call_ms": (called - constructed) * 1000,
+    "repeat_construct_ms": (reconstructed - called) * 1000
+}}))
+"""
+
+def measure(module: str, cls: str, call: str, repeats: int = 5) -> Dict[str, float]:
+    """Median of each timing over `repeats` fresh interpreters"""
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, cls=cls, call=call)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        runs.append(json.loads(output))
+    return {key: sorted(run[key] for run in runs)[len(runs) // 2] for key in runs[0]}
+
+def run_startup_benchmark(repeats: int = 5) -> List[Dict]:
+    return [
+        {"module": module, "engine": cls, **measure(module, cls, call, repeats)}
+        for module, cls, call in ENGINES
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure engine import and first-call latency")
+    parser.add_argument("--repeats", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    args = parser.parse_args()
+    
+    results = run_startup_benchmark(args.repeats)
+    print(f"{'module':<34}{'import':>10}{'1st init':>10}{'1st call':>10}{'re-init':>10}  (ms)")
+    for result in results:
+        print(f"{result['module']:<34}{result['import_ms']:>10.2f}{result['first_construct_ms']:>10.3f}"
+              f"{result['first_call_ms']:>10.3f}{result['repeat_construct_ms']:>10.4f}")
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+if __name__ == "__main__":
+    main()
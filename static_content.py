@@ -0,0 +1,101 @@
+"""
+Shared Static Content References
+Versioned, content-addressed references for static guideline text that would
+otherwise be copied into every generated prescription
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Union
+
+# Bump when the layout of registered sections changes, so stored IDs stay unambiguous
+STATIC_CONTENT_VERSION = 1
+
+@dataclass(frozen=True)
+class StaticContentRef:
+    """Reference to one registered static section"""
+    section: str  # Section name, e.g. "met_詳細說明"
+    version: int  # STATIC_CONTENT_VERSION at registration time
+    digest: str  # SHA-256 prefix of the canonical JSON content
+    
+    @property
+    def id(self) -> str:
+        return f"{self.section}@v{self.version}:{self.digest}"
+    
+    def to_json(self) -> Dict[str, str]:
+        """Serialized form of the reference"""
+        return {"$ref": self.id}
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+class StaticContentRegistry:
+    """Content-addressed store of immutable static sections"""
+    
+    def __init__(self):
+        self._entries: Dict[str, tuple] = {}  # id -> (StaticContentRef, frozen content)
+    
+    def register(self, section: str, content: Any) -> StaticContentRef:
+        """Register content and return its shared reference
+        
+        Registering identical content again returns the existing reference
+        object, so every result that uses it shares one in-process copy.
+        """
+        canonical = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+        ref = StaticContentRef(section, STATIC_CONTENT_VERSION, digest)
+        entry = self._entries.get(ref.id)
+        if entry is None:
+            entry = self._entries[ref.id] = (ref, _freeze(content))
+        return entry[0]
+    
+    def resolve(self, ref: Union[StaticContentRef, str, Dict[str, str]]) -> Any:
+        """Return the immutable content for a reference, its ID or its serialized form"""
+        if isinstance(ref, StaticContentRef):
+            ref_id = ref.id
+        elif isinstance(ref, dict):
+            ref_id = ref["$ref"]
+        else:
+            ref_id = ref
+        try:
+            return self._entries[ref_id][1]
+        except KeyError:
+            raise KeyError(f"Unknown static content reference: {ref_id}") from None
+    
+    def resolve_all(self, data: Any) -> Any:
+        """Deep-copy data with every reference replaced by plain dicts and lists"""
+        if isinstance(data, StaticContentRef) or (
+                isinstance(data, dict) and len(data) == 1 and "$ref" in data):
+            return _thaw(self.resolve(data))
+        if isinstance(data, dict):
+            return {key: self.resolve_all(value) for key, value in data.items()}
+        if isinstance(data, list):
+            return [self.resolve_all(item) for item in data]
+        return data
+    
+    def export(self) -> Dict[str, Any]:
+        """All registered sections keyed by ID, for emitting once alongside serialized results"""
+        return {ref_id: _thaw(content) for ref_id, (_, content) in self._entries.items()}
+    
+    @staticmethod
+    def json_default(value: Any) -> Any:
+        """json.dumps default= hook that serializes references as {"$ref": id}"""
+        if isinstance(value, StaticContentRef):
+            return value.to_json()
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# Process-wide registry shared by all engines
+default_registry = StaticContentRegistry()
@@ -0,0 +1,62 @@
+"""Exclusion bitmaps must follow the special population guidelines"""
+
+import pytest
+
+from activity_query import (ActivityQueryEngine, condition_exclusions, default_query_engine,
+                            guideline_exclusions, population_exclusions)
+from special_populations import ChronicCondition, SpecialPopulation, SpecialPopulationExercise
+
+# Exclusions a guideline must produce whatever else its wording adds
+REQUIRED_EXCLUSIONS = {
+    SpecialPopulation.PREGNANCY: {("contact", True), ("fall_risk", True), ("supine", True)},
+    SpecialPopulation.POSTPARTUM: {("impact", "high"), ("isometric", True)},
+    SpecialPopulation.DISABILITY: {("intensity", "vigorous"), ("impact", "high")},
+    SpecialPopulation.CHRONIC_DISEASE: {("intensity", "vigorous")},
+    SpecialPopulation.SEDENTARY: {("intensity", "vigorous")},
+    ChronicCondition.DIABETES: {("intensity", "vigorous"), ("impact", "high")},
+    ChronicCondition.HYPERTENSION: {("isometric", True)},
+    ChronicCondition.HEART_DISEASE: {("intensity", "vigorous"), ("isometric", True)},
+    ChronicCondition.ARTHRITIS: {("impact", "high")},
+    ChronicCondition.COPD: {("intensity", "vigorous")},
+    ChronicCondition.OBESITY: {("impact", "high")},
+    ChronicCondition.OSTEOPOROSIS: {("impact", "high"), ("fall_risk", True), ("contact", True)}
+}
+
+def _guideline_texts(key):
+    system = SpecialPopulationExercise.shared()
+    if isinstance(key, SpecialPopulation):
+        guideline = system.guidelines[key]
+        return guideline.contraindications + guideline.precautions
+    info = system.chronic_condition_specifics[key]
+    return list(info["contraindications"]) + list(info["precautions"])
+
+def test_every_population_and_condition_has_exclusions():
+    assert set(population_exclusions()) == set(SpecialPopulation)
+    assert set(condition_exclusions()) == set(ChronicCondition)
+    for rules in list(population_exclusions().values()) + list(condition_exclusions().values()):
+        assert rules
+
+@pytest.mark.parametrize("key", list(REQUIRED_EXCLUSIONS), ids=lambda key: key.name)
+def test_exclusions_come_from_guideline_text(key):
+    table = population_exclusions() if isinstance(key, SpecialPopulation) else condition_exclusions()
+    assert table[key] == guideline_exclusions(_guideline_texts(key))
+    assert REQUIRED_EXCLUSIONS[key] <= set(table[key])
+
+@pytest.mark.parametrize("key", list(REQUIRED_EXCLUSIONS), ids=lambda key: key.name)
+def test_queries_drop_excluded_activities(key):
+    engine = default_query_engine()
+    if isinstance(key, SpecialPopulation):
+        positions = engine.mask(population=key)
+    else:
+        positions = engine.mask(conditions=[key])
+    for position, traits in enumerate(engine.traits):
+        if positions >> position & 1:
+            for attribute, value in REQUIRED_EXCLUSIONS[key]:
+                assert getattr(traits, attribute) != value, (engine.records[position].name, attribute)
+
+def test_cursor_rejected_for_reordered_catalog():
+    engine = default_query_engine()
+    page = engine.query(limit=3)
+    reordered = ActivityQueryEngine(engine.records[::-1], engine.traits[::-1])
+    with pytest.raises(ValueError):
+        reordered.query(limit=3, cursor=page.next_cursor)
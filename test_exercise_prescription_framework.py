@@ -0,0 +1,49 @@
+"""Batch prescriptions must match create_individualized_prescription row by row"""
+
+import itertools
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from exercise_prescription_framework import ExercisePrescriptionSystem
+
+AGES = [8, 17, 18, 40, 64, 65, 80]
+HEALTH_STATUSES = ["healthy", "hypertension", "膝關節炎", "knee pain", "下背痛與心臟病", "has_conditions"]
+FITNESS_LEVELS = ["beginner", "intermediate", "advanced"]
+
+def _rows():
+    return list(itertools.product(AGES, HEALTH_STATUSES, FITNESS_LEVELS))
+
+@pytest.mark.parametrize("columns", ["lists", "arrays"])
+def test_batch_matches_single_rows(columns):
+    import numpy as np
+    
+    system = ExercisePrescriptionSystem()
+    rows = _rows()
+    ages = [age for age, _, _ in rows]
+    weights = [50.0 + index % 40 for index in range(len(rows))]
+    statuses = [status for _, status, _ in rows]
+    levels = [level for _, _, level in rows]
+    if columns == "arrays":
+        statuses, levels = np.array(statuses), np.array(levels)
+    batch = system.create_individualized_prescriptions_batch(ages, weights, statuses, levels)
+    
+    assert batch["count"] == len(rows)
+    for index, (age, status, level) in enumerate(rows):
+        single = system.create_individualized_prescription(age, weights[index], status, level)
+        group = batch["age_group_labels"][batch["age_group_code"][index]]
+        assert group == single["age_group"]
+        assert batch["base_prescriptions"][group] == single["base_prescription"]
+        assert batch["modification_table"][batch["modification_code"][index]] == single["modifications"]
+        assert batch["safety_table"][batch["safety_code"][index]] == single["safety_considerations"]
+        calories = [sample["calories_30min"] for sample in single["推薦活動與MET值"].values()]
+        assert batch["calories_30min"][index][:len(calories)].tolist() == calories
+
+def test_scalar_columns_broadcast():
+    system = ExercisePrescriptionSystem()
+    batch = system.create_individualized_prescriptions_batch([30, 70], 70.0, "膝關節炎", "beginner")
+    for index, age in enumerate([30, 70]):
+        single = system.create_individualized_prescription(age, 70.0, "膝關節炎", "beginner")
+        assert batch["modification_table"][batch["modification_code"][index]] == single["modifications"]
+        assert batch["safety_table"][batch["safety_code"][index]] == single["safety_considerations"]
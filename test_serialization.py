@@ -0,0 +1,47 @@
+"""Every registered dataclass must survive a JSON and a binary round trip unchanged"""
+
+import pytest
+
+from serialization import (SCHEMA_IDS, _asdict_json, from_binary, from_json, sample_records, to_binary,
+                           to_json)
+
+RECORDS = sample_records()
+
+def _records_of(cls):
+    return [record for record in RECORDS if type(record) is cls]
+
+SCHEMA_CLASSES = pytest.mark.parametrize("cls", list(SCHEMA_IDS.values()), ids=lambda cls: cls.__name__)
+
+@SCHEMA_CLASSES
+def test_samples_cover_schema(cls):
+    assert _records_of(cls)
+
+@SCHEMA_CLASSES
+def test_json_matches_asdict_path(cls):
+    for record in _records_of(cls):
+        assert to_json(record) == _asdict_json(record)
+
+@SCHEMA_CLASSES
+def test_json_round_trip(cls):
+    records = _records_of(cls)
+    for record in records:
+        assert from_json(cls, to_json(record)) == record
+    assert from_json(cls, to_json(records)) == records
+
+@SCHEMA_CLASSES
+def test_binary_round_trip(cls):
+    records = _records_of(cls)
+    for record in records:
+        assert from_binary(to_binary(record)) == record
+    assert from_binary(to_binary(records)) == records
+
+def test_binary_round_trip_mixed_records():
+    assert from_binary(to_binary(RECORDS)) == RECORDS
+
+def test_unregistered_class_rejected():
+    with pytest.raises(TypeError):
+        from_json(dict, "{}")
+
+def test_trailing_bytes_rejected():
+    with pytest.raises(ValueError):
+        from_binary(to_binary(RECORDS[0]) + b"\x00")
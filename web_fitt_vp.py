@@ -0,0 +1,541 @@
+"""
+Web Form FITT-VP Engine
+Python port of calculateFITTVP in script.js, the prescription users see on the
+web page: a scalar port that mirrors the JavaScript rule by rule, and a batch
+engine that evaluates the same branching over NumPy columns. A parity harness
+runs an input grid through both ports and, when node is available, through
+script.js itself
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import shutil
+import subprocess
+import time
+from typing import Dict, List, Optional, Sequence
+
+from numpy_support import require_numpy
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "script.js")
+
+FITNESS_LEVELS = ("poor", "fair", "good", "excellent")
+EXERCISE_HABITS = ("none", "light", "moderate", "active", "student_athlete")
+# Bit order of the disease and limitation masks in batch input
+DISEASE_FLAGS = ("hypertension", "diabetes", "arthritis", "heart_recovery", "sarcopenia", "cancer_recovery")
+LIMITATION_FLAGS = ("pain", "fall_risk", "balance", "palpitation")
+INTENSITY_TABLE = ("moderate", "moderate-vigorous", "light", "light-moderate")
+
+# getAgeGroup codes: 0 under 6 ("unknown"), then 6-11, 12-17, 18-64, 65+
+AGE_GROUPS = ("unknown", "child", "adolescent", "adult", "senior")
+UNKNOWN, CHILD, ADOLESCENT, ADULT, SENIOR = range(len(AGE_GROUPS))
+
+ADULT_PROGRESSION = "每週增加10%運動量，逐步達到ACSM建議（每週150-300分鐘中強度或75-150分鐘高強度有氧）"
+
+# cleanupExerciseTypes: merged type -> the types it absorbs, in priority order
+TYPE_MERGES = (
+    ("有氧運動", ("有氧運動", "低衝擊有氧")),
+    ("肌力訓練", ("肌力訓練", "阻力訓練", "肌力訓練重點")),
+    ("平衡訓練", ("平衡訓練", "太極")),
+    ("柔軟度訓練", ("柔軟度訓練", "伸展運動")),
+    ("水中運動", ("水中運動",)),
+    ("自由遊戲", ("自由遊戲",)),
+    ("體能遊戲", ("體能遊戲",)),
+    ("基礎運動技能", ("基礎運動技能",)),
+    ("團體運動", ("團體運動",)),
+    ("專項訓練", ("專項技能訓練", "競技表現提升", "專項訓練"))
+)
+
+def js_round(value: float) -> int:
+    """Math.round: halves round up (Python's round() rounds them to even)"""
+    return math.floor(value + 0.5)
+
+def form_bmi(age: int, height_cm: float, weight_kg: float) -> Optional[float]:
+    """BMI as collectFormData computes it: adults only, rounded to 0.1"""
+    if age < 18:
+        return None
+    return js_round(weight_kg / (height_cm / 100) ** 2 * 10) / 10
+
+def age_group_code(age: int) -> int:
+    if 6 <= age <= 11:
+        return CHILD
+    if 12 <= age <= 17:
+        return ADOLESCENT
+    if 18 <= age <= 64:
+        return ADULT
+    if age >= 65:
+        return SENIOR
+    return UNKNOWN
+
+def cleanup_exercise_types(types: List[str]) -> List[str]:
+    """cleanupExerciseTypes: merge synonyms, order by priority, keep unmapped types after"""
+    result = []
+    processed = set()
+    present = set(types)
+    for main_type, subtypes in TYPE_MERGES:
+        if not present.isdisjoint(subtypes) and main_type not in processed:
+            result.append(main_type)
+            processed.add(main_type)
+            processed.update(subtypes)
+    for t in types:
+        if t not in processed and t and t != "蛋白質營養":
+            result.append(t)
+    return result
+
+def _exercise_specific_recommendations(prescription: Dict, age: int):
+    """generateExerciseSpecificRecommendations"""
+    recommendations = [
+        rec for rec in prescription["recommendations"]
+        if "每週至少" not in rec or "劇烈強度" in rec or "骨骼強化" in rec or "肌肉強化" in rec
+    ]
+    types = prescription["type"]
+    
+    if "有氧運動" in types or "低衝擊有氧" in types:
+        if 18 <= age <= 64:
+            recommendations.append("有氧運動：建議快走、游泳、騎車等，每次持續20-60分鐘")
+        elif age >= 65:
+            recommendations.append("有氧運動：選擇低衝擊活動如快走、水中運動，每次20-40分鐘")
+    
+    if "肌力訓練" in types or "阻力訓練" in types or "肌力訓練重點" in types:
+        if 18 <= age <= 64:
+            recommendations.append("肌力訓練：每週2-3次，針對主要肌群，每組8-12次重複")
+        elif age >= 65:
+            recommendations.append("肌力訓練：每週2次，使用輕重量或彈力帶，每組10-15次重複")
+    
+    if "平衡訓練" in types or "太極" in types:
+        if age >= 65:
+            recommendations.append("平衡訓練：每週3次，包含單腳站立、太極等，每次15-20分鐘")
+        elif age >= 18:
+            recommendations.append("平衡訓練：每週2-3次，提升身體穩定性，預防跌倒風險")
+    
+    if age >= 18:
+        if "柔軟度訓練" in types or "伸展運動" in types:
+            recommendations.append("柔軟度訓練：每週至少2-3次，每個伸展動作維持15-30秒")
+        else:
+            recommendations.append("伸展運動：每次運動前後進行5-10分鐘，改善關節活動度")
+    
+    if "水中運動" in types:
+        recommendations.append("水中運動：適合關節問題者，水溫28-30°C，每次30-45分鐘")
+    prescription["recommendations"] = recommendations
+
+def calculate_fittvp(data: Dict) -> Dict:
+    """calculateFITTVP(data) for one form submission
+    
+    data has the collectFormData keys used by the rules: age, bmi (None under
+    18), fitness_level, exercise_habit, diseases and limitations.
+    """
+    age = data["age"]
+    bmi = data.get("bmi")
+    diseases = data.get("diseases") or []
+    limitations = data.get("limitations") or []
+    p = {
+        "frequency": 3,
+        "intensity": "moderate",
+        "time": 30,
+        "type": [],
+        "volume": 450,
+        "progression": "每2-4週增加10%運動時間或頻率",
+        "warnings": [],
+        "recommendations": [],
+        "ageGroup": AGE_GROUPS[age_group_code(age)]
+    }
+    
+    if 6 <= age <= 11:
+        p.update(frequency=7, time=60, intensity="moderate-vigorous", volume=0,
+                 type=["自由遊戲", "體能遊戲", "基礎運動技能"], progression="逐漸增加活動的複雜性和技能挑戰")
+        p["recommendations"] += ["重點在趣味性和多樣性，而非競技表現", "包含骨骼強化活動，每週至少3次",
+                                 "包含肌肉強化活動，每週至少3次"]
+        p["warnings"].append("避免過度專項化訓練")
+    elif 12 <= age <= 17:
+        p.update(frequency=7, time=60, intensity="moderate-vigorous", volume=0,
+                 type=["有氧運動", "肌力訓練", "團體運動"], progression="每2-3週增加運動強度或技能難度")
+        p["recommendations"] += ["每週至少3次劇烈強度有氧運動", "每週至少3次肌肉和骨骼強化活動"]
+        p["warnings"].append("注意運動傷害預防和適當休息")
+    elif 18 <= age <= 64:
+        p.update(frequency=5, time=30, intensity="moderate", volume=525, progression=ADULT_PROGRESSION)
+        p["type"] += ["有氧運動", "肌力訓練"]
+    elif age >= 65:
+        p.update(frequency=5, time=30, intensity="moderate", volume=525,
+                 progression=ADULT_PROGRESSION + "，並加強平衡訓練")
+        p["type"] += ["有氧運動", "肌力訓練", "平衡訓練", "柔軟度訓練"]
+        p["warnings"].append("高齡使用者請特別注意運動安全")
+        p["recommendations"].append("每週至少3次平衡訓練，預防跌倒")
+    
+    fitness = data.get("fitness_level")
+    if age >= 18:
+        if fitness == "poor":
+            p.update(frequency=3, time=30, intensity="light", volume=270, progression=ADULT_PROGRESSION)
+        elif fitness == "fair":
+            p.update(frequency=4, time=30, intensity="light-moderate", volume=420, progression=ADULT_PROGRESSION)
+        elif fitness == "excellent":
+            p.update(frequency=6, time=40, volume=840, progression="可維持高頻率或增加運動強度")
+        
+        if bmi:
+            if bmi < 18.5:
+                p["recommendations"].append("體重過輕：建議增加肌力訓練，配合適當營養補充")
+                p["type"].append("肌力訓練重點")
+            elif 24 <= bmi < 27:
+                p["recommendations"].append("體重過重：建議增加有氧運動頻率，控制飲食")
+                p["frequency"] = min(p["frequency"] + 1, 6)
+            elif bmi >= 27:
+                p["recommendations"].append("BMI偏高：建議以低衝擊有氧運動為主，配合飲食管理")
+                p["type"] = ["低衝擊有氧", "水中運動", "肌力訓練"]
+                p["warnings"].append("建議諮詢醫師或營養師制定完整的體重管理計畫")
+    else:
+        if fitness == "poor":
+            p["time"] = max(30, p["time"])
+            p["recommendations"].append("可分段進行，如每次10-15分鐘，分2-3次完成")
+        elif fitness == "fair":
+            p["time"] = max(45, p["time"])
+        elif fitness == "good":
+            p["time"] = max(60, p["time"])
+        elif fitness == "excellent":
+            p["time"] = 80
+            p["recommendations"].append("可增加運動技能挑戰和競技元素")
+    
+    if "hypertension" in diseases:
+        p["type"].append("有氧運動")
+        p["warnings"].append("避免閉氣用力動作，運動中保持呼吸順暢")
+        p["recommendations"].append("建議每次運動前後測量血壓")
+    if "diabetes" in diseases:
+        p["type"] += ["有氧運動", "阻力訓練"]
+        p["warnings"].append("運動前後檢查血糖，攜帶糖果備用")
+        p["recommendations"].append("建議餐後1-2小時運動")
+    if "arthritis" in diseases:
+        p["type"] += ["水中運動", "柔軟度訓練"]
+        p["warnings"].append("避免高衝擊運動，關節疼痛時應停止")
+        p["time"] = min(p["time"], 30)
+    if "heart_recovery" in diseases:
+        p["intensity"] = "light-moderate"
+        p["warnings"].append("嚴格監控心率，出現胸痛立即停止")
+        p["recommendations"].append("建議在醫師監督下開始運動計畫")
+    if "sarcopenia" in diseases:
+        p["type"].append("阻力訓練")
+        p["recommendations"] += ["重點加強肌力訓練，每週至少3次阻力運動", "建議搭配營養師指導，確保足夠蛋白質攝取"]
+        p["warnings"].append("漸進式增加負重，避免過度訓練造成傷害")
+        if age >= 18:
+            p["frequency"] = min(p["frequency"] + 1, 4)
+    if "cancer_recovery" in diseases:
+        if age >= 18:
+            p["frequency"] = min(p["frequency"], 3)
+        p["type"] += ["有氧運動", "阻力訓練"]
+        p["warnings"].append("依據治療階段調整運動強度")
+    
+    if "pain" in limitations:
+        p["intensity"] = "light"
+        p["warnings"].append("疼痛時立即停止運動")
+    if "fall_risk" in limitations:
+        p["type"].append("平衡訓練")
+        p["warnings"].append("避免需要快速方向改變的運動")
+        p["recommendations"].append("建議在安全環境下運動，有人陪伴")
+    if "balance" in limitations:
+        p["type"] += ["平衡訓練", "太極"]
+        p["warnings"].append("運動時應有支撐物在旁")
+    if "palpitation" in limitations:
+        p["intensity"] = "light-moderate"
+        p["warnings"].append("心跳過快時立即停止並休息")
+    
+    if age >= 18 and "有氧運動" not in p["type"]:
+        p["type"].insert(0, "有氧運動")
+    
+    habit = data.get("exercise_habit")
+    if habit == "none" and age >= 18:
+        p.update(frequency=max(3, math.floor(p["frequency"] * 0.6)), time=20, progression=ADULT_PROGRESSION)
+    elif habit == "light" and age >= 18:
+        p.update(frequency=max(4, math.floor(p["frequency"] * 0.8)), time=25, progression=ADULT_PROGRESSION)
+    elif habit == "active" and age >= 18:
+        p.update(frequency=min(p["frequency"] + 1, 6), time=min(math.floor((p["time"] + 5) / 5) * 5, 45),
+                 progression="可維持現有頻率或追求更高運動目標")
+    elif habit == "student_athlete":
+        if age <= 17:
+            p["type"] += ["專項技能訓練", "競技表現提升"]
+            p["recommendations"].append("配合專業教練指導")
+            p["warnings"].append("注意訓練負荷管理，避免過度訓練")
+        else:
+            p.update(frequency=min(p["frequency"] + 1, 6), time=min(math.floor((p["time"] + 10) / 10) * 10, 60),
+                     progression="在專業指導下可維持高訓練量")
+            p["type"].append("專項訓練")
+    
+    p["type"] = cleanup_exercise_types(p["type"])
+    p["time"] = js_round(p["time"] / 5) * 5
+    if p["volume"] > 0:
+        p["volume"] = js_round(3.5 * p["time"] * p["frequency"])
+    
+    _exercise_specific_recommendations(p, age)
+    return p
+
+def _label_codes(values, labels: Sequence[str], count: int):
+    """int8 index into labels per row (len(labels) for anything else); a plain string broadcasts"""
+    np = require_numpy()
+    index = {label: code for code, label in enumerate(labels)}
+    if isinstance(values, str):
+        return np.full(count, index.get(values, len(labels)), dtype=np.int8)
+    if isinstance(values, np.ndarray):
+        # A few vectorized comparisons are far cheaper than sorting a string column
+        codes = np.full(count, len(labels), dtype=np.int8)
+        for code, label in enumerate(labels):
+            codes[np.broadcast_to(values == label, (count,))] = code
+        return codes
+    return np.fromiter((index.get(value, len(labels)) for value in values), dtype=np.int8, count=count)
+
+def _flag_masks(values, flags: Sequence[str], count: int):
+    """int32 bitmask per row from per-row lists of names; an int array is taken as masks already"""
+    np = require_numpy()
+    if values is None:
+        return np.zeros(count, dtype=np.int32)
+    if isinstance(values, np.ndarray) and values.dtype.kind in "iu":
+        return np.broadcast_to(values.astype(np.int32), (count,))
+    bits = {flag: 1 << position for position, flag in enumerate(flags)}
+    return np.fromiter((sum(bits.get(name, 0) for name in set(names or ())) for names in values),
+                       dtype=np.int32, count=count)
+
+class WebFITTVPEngine:
+    """calculateFITTVP over whole batches of form submissions
+    
+    Frequency, time, volume and intensity are computed with vectorized
+    branching over NumPy columns. The text fields (type, warnings,
+    recommendations, progression) depend only on each row's decision profile
+    (age group, fitness level, BMI band, habit and the disease and limitation
+    flags), so they are built once per distinct profile and returned as a
+    table with a code per row.
+    """
+    
+    def calculate(self, data: Dict) -> Dict:
+        return calculate_fittvp(data)
+    
+    def calculate_batch(self,
+                        ages,
+                        fitness_levels,
+                        exercise_habits,
+                        heights_cm=None,
+                        weights_kg=None,
+                        diseases=None,
+                        limitations=None,
+                        bmis=None) -> Dict:
+        """Prescriptions for many submissions at once
+        
+        Columns take sequences or NumPy arrays; fitness_levels and
+        exercise_habits also take one string. BMI comes from heights_cm and
+        weights_kg as collectFormData computes it, or directly from bmis (NaN
+        where absent). diseases and limitations are None, per-row lists of
+        names, or int bitmasks in DISEASE_FLAGS / LIMITATION_FLAGS bit order.
+        """
+        np = require_numpy()
+        ages = np.asarray(ages, dtype=np.int64).reshape(-1)
+        count = ages.shape[0]
+        fitness = _label_codes(fitness_levels, FITNESS_LEVELS, count)
+        habit = _label_codes(exercise_habits, EXERCISE_HABITS, count)
+        disease = _flag_masks(diseases, DISEASE_FLAGS, count)
+        limitation = _flag_masks(limitations, LIMITATION_FLAGS, count)
+        
+        group = np.select([(ages >= 6) & (ages <= 11), (ages >= 12) & (ages <= 17), (ages >= 18) & (ages <= 64),
+                           ages >= 65], [CHILD, ADOLESCENT, ADULT, SENIOR], UNKNOWN).astype(np.int8)
+        adult = ages >= 18
+        if bmis is None:
+            height_m = np.asarray(heights_cm, dtype=np.float64) / 100
+            bmis = np.floor(np.asarray(weights_kg, dtype=np.float64) / height_m ** 2 * 10 + 0.5) / 10
+        bmis = np.where(adult, np.asarray(bmis, dtype=np.float64), np.nan)
+        # 0 no BMI (missing or 0, falsy in JS), 1 under 18.5, 2 normal, 3 24-27, 4 27 and above
+        bmi_band = np.select([~(bmis != 0) | np.isnan(bmis), bmis < 18.5, bmis < 24, bmis < 27], [0, 1, 2, 3], 4)
+        
+        has = lambda mask, flags, name: (mask & (1 << flags.index(name))) != 0
+        poor, fair, good, excellent = (fitness == code for code in range(4))
+        
+        # Age group base values
+        youth = (group == CHILD) | (group == ADOLESCENT)
+        frequency = np.where(youth, 7, np.where(adult, 5, 3))
+        time_minutes = np.where(youth, 60, 30)
+        volume = np.where(youth, 0, np.where(adult, 525, 450))
+        intensity = np.where(youth, 1, 0)
+        
+        # Fitness level: adults get new targets, younger users a time floor
+        frequency = np.select([adult & poor, adult & fair, adult & excellent], [3, 4, 6], frequency)
+        time_minutes = np.select(
+            [adult & (poor | fair), adult & excellent, ~adult & poor, ~adult & fair, ~adult & good, ~adult & excellent],
+            [30, 40, np.maximum(30, time_minutes), np.maximum(45, time_minutes), np.maximum(60, time_minutes), 80],
+            time_minutes)
+        volume = np.select([adult & poor, adult & fair, adult & excellent], [270, 420, 840], volume)
+        intensity = np.select([adult & poor, adult & fair], [2, 3], intensity)
+        frequency = np.where(adult & (bmi_band == 3), np.minimum(frequency + 1, 6), frequency)
+        
+        # Diseases and limitations, in the JavaScript's order
+        time_minutes = np.where(has(disease, DISEASE_FLAGS, "arthritis"), np.minimum(time_minutes, 30), time_minutes)
+        intensity = np.where(has(disease, DISEASE_FLAGS, "heart_recovery"), 3, intensity)
+        frequency = np.where(adult & has(disease, DISEASE_FLAGS, "sarcopenia"), np.minimum(frequency + 1, 4), frequency)
+        frequency = np.where(adult & has(disease, DISEASE_FLAGS, "cancer_recovery"), np.minimum(frequency, 3), frequency)
+        intensity = np.where(has(limitation, LIMITATION_FLAGS, "pain"), 2, intensity)
+        intensity = np.where(has(limitation, LIMITATION_FLAGS, "palpitation"), 3, intensity)
+        
+        # Exercise habit (adults only)
+        none, light, _, active, athlete = (adult & (habit == code) for code in range(5))
+        frequency = np.select(
+            [none, light, active | athlete],
+            [np.maximum(3, np.floor(frequency * 0.6)), np.maximum(4, np.floor(frequency * 0.8)),
+             np.minimum(frequency + 1, 6)],
+            frequency)
+        time_minutes = np.select(
+            [none, light, active, athlete],
+            [20, 25, np.minimum((time_minutes + 5) // 5 * 5, 45), np.minimum((time_minutes + 10) // 10 * 10, 60)],
+            time_minutes)
+        
+        time_minutes = np.floor(time_minutes / 5 + 0.5) * 5
+        volume = np.where(volume > 0, np.floor(3.5 * time_minutes * frequency + 0.5), 0)
+        
+        # One text entry per distinct decision profile (senior vs adult matters to the recommendations)
+        profile = (group.astype(np.int64) | fitness.astype(np.int64) << 3 | habit.astype(np.int64) << 6
+                   | bmi_band.astype(np.int64) << 9 | disease.astype(np.int64) << 12
+                   | limitation.astype(np.int64) << 20)
+        profiles, first, profile_code = np.unique(profile, return_index=True, return_inverse=True)
+        profile_table = []
+        for row in first.tolist():
+            text = calculate_fittvp({
+                "age": int(ages[row]),
+                "bmi": None if bmi_band[row] == 0 else float(bmis[row]),
+                "fitness_level": FITNESS_LEVELS[fitness[row]] if fitness[row] < len(FITNESS_LEVELS) else None,
+                "exercise_habit": EXERCISE_HABITS[habit[row]] if habit[row] < len(EXERCISE_HABITS) else None,
+                "diseases": [name for bit, name in enumerate(DISEASE_FLAGS) if disease[row] >> bit & 1],
+                "limitations": [name for bit, name in enumerate(LIMITATION_FLAGS) if limitation[row] >> bit & 1]
+            })
+            profile_table.append({key: text[key] for key in ("type", "warnings", "recommendations",
+                                                             "progression", "ageGroup")})
+        
+        return {
+            "count": count,
+            "frequency": frequency.astype(np.int16),
+            "time": time_minutes.astype(np.int16),
+            "volume": volume.astype(np.int32),
+            "intensity_code": intensity.astype(np.int8),
+            "intensity_table": INTENSITY_TABLE,
+            "profile_code": profile_code.reshape(-1).astype(np.int32),
+            "profile_table": profile_table
+        }
+    
+    def batch_row(self, batch: Dict, index: int) -> Dict:
+        """Row `index` of a calculate_batch result in calculateFITTVP's output shape"""
+        return {
+            "frequency": int(batch["frequency"][index]),
+            "intensity": batch["intensity_table"][int(batch["intensity_code"][index])],
+            "time": int(batch["time"][index]),
+            "volume": int(batch["volume"][index]),
+            **batch["profile_table"][int(batch["profile_code"][index])]
+        }
+
+def extract_js_function(source: str, name: str) -> str:
+    """Source text of a top-level `function name(...) {...}` in source (braces in string literals skipped)"""
+    start = source.index(f"function {name}(")
+    depth = 0
+    quote = None
+    position = source.index("{", start)
+    while True:
+        char = source[position]
+        if quote:
+            if char == "\\":
+                position += 1
+            elif char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return source[start:position + 1]
+        position += 1
+
+# Node driver: the script.js functions plus collectFormData's BMI rule, over JSON lines on stdin
+_NODE_DRIVER = """
+{functions}
+const lines = require('fs').readFileSync(0, 'utf8').split('\\n').filter(Boolean);
+const out = [];
+for (const line of lines) {{
+    const data = JSON.parse(line);
+    let bmi = null;
+    if (data.age >= 18) {{
+        bmi = data.weight / Math.pow(data.height / 100, 2);
+        bmi = Math.round(bmi * 10) / 10;
+    }}
+    data.bmi = bmi;
+    const p = calculateFITTVP(data);
+    out.push(JSON.stringify(p));
+}}
+process.stdout.write(out.join('\\n'));
+"""
+
+def run_script_js(submissions: List[Dict], script_path: str = SCRIPT_PATH) -> Optional[List[Dict]]:
+    """calculateFITTVP from script.js for each submission via node; None when node is not installed"""
+    node = shutil.which("node") or shutil.which("nodejs")
+    if node is None:
+        return None
+    with open(script_path, encoding="utf-8") as handle:
+        source = handle.read()
+    functions = "\n".join(extract_js_function(source, name) for name in (
+        "calculateFITTVP", "cleanupExerciseTypes", "generateExerciseSpecificRecommendations", "getAgeGroup"))
+    output = subprocess.run(
+        [node, "-e", _NODE_DRIVER.format(functions=functions)],
+        input="\n".join(json.dumps(s, ensure_ascii=False) for s in submissions),
+        check=True, capture_output=True, text=True, encoding="utf-8"
+    ).stdout
+    return [json.loads(line) for line in output.splitlines()]
+
+def parity_grid() -> List[Dict]:
+    """Submissions covering every age band edge, fitness level, habit, BMI band edge and rule"""
+    ages = [5, 6, 11, 12, 17, 18, 40, 64, 65, 82]
+    # Height 170 cm: these weights give BMI 18.4, 18.5, 23.9, 24.0, 26.9, 27.0, 31.1
+    weights = [53.2, 53.5, 69.1, 69.4, 77.8, 78.1, 90.0]
+    diseases = [[], ["hypertension"], ["diabetes"], ["arthritis"], ["heart_recovery"], ["sarcopenia"],
+                ["cancer_recovery"], ["arthritis", "sarcopenia", "cancer_recovery"], list(DISEASE_FLAGS)]
+    limitations = [[], ["pain"], ["fall_risk"], ["balance"], ["palpitation"], ["pain", "palpitation"],
+                   list(LIMITATION_FLAGS)]
+    return [
+        {"age": age, "height": 170, "weight": weight, "fitness_level": fitness, "exercise_habit": habit,
+         "diseases": disease, "limitations": limitation}
+        for age, weight, fitness, habit, disease, limitation in itertools.product(
+            ages, weights, FITNESS_LEVELS, EXERCISE_HABITS, diseases, limitations)
+    ]
+
+def parity_check(submissions: Optional[List[Dict]] = None, use_node: bool = True) -> Dict:
+    """Compare the scalar port, the batch engine and (if node is available) script.js"""
+    submissions = submissions if submissions is not None else parity_grid()
+    scalar = [calculate_fittvp({**s, "bmi": form_bmi(s["age"], s["height"], s["weight"])}) for s in submissions]
+    
+    engine = WebFITTVPEngine()
+    batch = engine.calculate_batch(
+        [s["age"] for s in submissions], [s["fitness_level"] for s in submissions],
+        [s["exercise_habit"] for s in submissions], [s["height"] for s in submissions],
+        [s["weight"] for s in submissions], [s["diseases"] for s in submissions],
+        [s["limitations"] for s in submissions])
+    mismatches = {"batch": [i for i, p in enumerate(scalar) if engine.batch_row(batch, i) != p]}
+    
+    reference = run_script_js(submissions) if use_node else None
+    if reference is not None:
+        mismatches["script_js"] = [i for i, (p, js) in enumerate(zip(scalar, reference)) if p != js]
+    return {"cases": len(submissions), "node": reference is not None, "mismatches": mismatches}
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the Python port of calculateFITTVP against script.js")
+    parser.add_argument("--no-node", action="store_true", help="skip running script.js under node")
+    parser.add_argument("--batch-size", type=int, default=1_000_000, help="rows for the batch timing")
+    args = parser.parse_args()
+    
+    result = parity_check(use_node=not args.no_node)
+    print(f"Parity over {result['cases']} submissions"
+          f"{'' if result['node'] else ' (node not found: script.js not run)'}")
+    for against, rows in result["mismatches"].items():
+        print(f"  scalar port vs {against}: {len(rows)} mismatches{f' (first rows {rows[:5]})' if rows else ''}")
+    
+    np = require_numpy()
+    rng = np.random.default_rng(0)
+    n = args.batch_size
+    masks = lambda flags, p: (rng.random((n, len(flags))) < p) @ (1 << np.arange(len(flags)))
+    started = time.perf_counter()
+    batch = WebFITTVPEngine().calculate_batch(
+        rng.integers(6, 95, n), rng.choice(np.array(FITNESS_LEVELS), n), rng.choice(np.array(EXERCISE_HABITS), n),
+        rng.uniform(140, 200, n), rng.uniform(35, 130, n), masks(DISEASE_FLAGS, 0.08), masks(LIMITATION_FLAGS, 0.1))
+    print(f"\nBatch of {n:,} submissions: {time.perf_counter() - started:.2f}s, "
+          f"{len(batch['profile_table'])} distinct profiles")
+
+if __name__ == "__main__":
+    main()